@@ -0,0 +1,144 @@
+"""
+cost of stack frames: push/pop cycles, variable lookups through deep stacks
+and memory allocated per procedure call.
+
+run from the repository root:
+	python -m benchmarks.bench_frames
+
+the dict based frames Tclish_task used before slotted frames are kept
+here as Dict_task, to compare against.
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+
+from tclish import Tclish_interpreter, Tclish_task
+
+class Dict_task():
+	"""the task stack before slotted frames, one dict per frame and a walk per lookup"""
+	def __init__(self,args=None):
+		self.states=[]
+		self.push(args)
+
+	def push(self,args=None,label=""):
+		self.states.append({
+			"args": args if args is not None else [],
+			"values":{},
+			"label":label,
+		})
+		return True
+
+	def pop(self):
+		self.states.pop()
+		return True
+
+	def get_value(self,key):
+		for stackframe in reversed(self.states):
+			if key in stackframe["values"]:
+				return stackframe["values"][key]
+		return None
+
+	def set_value(self,key,value):
+		self.states[-1]["values"][key]=value
+		return True
+
+def frame_task(args=None):
+	task=Tclish_task("",args)
+	task.stack_limit=1000
+	return task
+
+def call_cycle(task,n):
+	"""what a procedure call does to the task: push, bind a parameter, read it, pop"""
+	args=["1"]
+	for _ in range(n):
+		task.push(args,"body")
+		task.set_value("n","1")
+		task.get_value("n")
+		task.pop()
+
+def deep_lookup(task,depth,n):
+	task.set_value("global","1")
+	for _ in range(depth):
+		task.push([],"level")
+	start=time.perf_counter()
+	for _ in range(n):
+		task.get_value("global")
+	elapsed=time.perf_counter()-start
+	for _ in range(depth):
+		task.pop()
+	return elapsed
+
+def peak_bytes(f,*args):
+	"""the most memory f had allocated at once, above what was allocated when it started"""
+	tracemalloc.start()
+	tracemalloc.reset_peak()
+	base,_=tracemalloc.get_traced_memory()
+	f(*args)
+	_,peak=tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return peak-base
+
+def frame_bytes(make_task,depth=1000):
+	"""memory held by each live frame"""
+	task=make_task()
+	tracemalloc.start()
+	base,_=tracemalloc.get_traced_memory()
+	for _ in range(depth):
+		task.push(["1"],"body")
+		task.set_value("n","1")
+	used,_=tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return (used-base)/depth
+
+def blocks_per_push(make_task,depth=1000):
+	"""memory blocks allocated per frame, after the stack was that deep once before"""
+	task=make_task()
+	for _ in range(depth):
+		task.push(["1"],"body")
+		task.set_value("n","1")
+	for _ in range(depth):
+		task.pop()
+	before=sys.getallocatedblocks()
+	for _ in range(depth):
+		task.push(["1"],"body")
+		task.set_value("n","1")
+	return (sys.getallocatedblocks()-before)/depth
+
+def proc_call_bytes(n=2000):
+	"""memory allocated per call of a small procedure, measured as peak over the loop"""
+	vm=Tclish_interpreter()
+	vm.add_stdlibs()
+	task=Tclish_task("")
+	asyncio.run(vm.eval(task,"proc f {x} {get x}"))
+	loop=f"foreach i [range {n}] {{ f $i }}"
+	asyncio.run(vm.eval(task,loop))
+	async def run():
+		await vm.eval(task,loop)
+	start=time.perf_counter()
+	peak=peak_bytes(lambda:asyncio.run(run()))
+	return peak,(time.perf_counter()-start)/n
+
+def main(cycles=200000,lookups=200000):
+	print(f"{'':<24}{'dict frames':>14}{'slot frames':>14}")
+	for name,make_task in (("dict",Dict_task),("slot",frame_task)):
+		call_cycle(make_task(),1000)
+	old_cycle=min(timed_cycle(Dict_task(),cycles) for _ in range(3))
+	new_cycle=min(timed_cycle(frame_task(),cycles) for _ in range(3))
+	print(f"{'push/pop cycle ns':<24}{old_cycle*1e9:>14.0f}{new_cycle*1e9:>14.0f}")
+	for depth in (1,8,64):
+		old=deep_lookup(Dict_task(),depth,lookups)/lookups
+		new=deep_lookup(frame_task(),depth,lookups)/lookups
+		print(f"{f'lookup at depth {depth} ns':<24}{old*1e9:>14.0f}{new*1e9:>14.0f}")
+	print(f"{'bytes per live frame':<24}{frame_bytes(Dict_task):>14.0f}{frame_bytes(frame_task):>14.0f}")
+	print(f"{'blocks per push':<24}{blocks_per_push(Dict_task):>14.2f}{blocks_per_push(frame_task):>14.2f}")
+	peak,per_call=proc_call_bytes()
+	print(f"\nproc call through the interpreter: {per_call*1e6:.1f} us, peak {peak} bytes over 2000 calls")
+
+def timed_cycle(task,n):
+	start=time.perf_counter()
+	call_cycle(task,n)
+	return (time.perf_counter()-start)/n
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,75 @@
+"""
+time per call of small definitions, interpreted and translated to python by the jit.
+
+run from the repository root:
+	python -m benchmarks.bench_jit
+"""
+import asyncio
+import time
+
+from tclish import Tclish_interpreter, Tclish_task
+
+DEFINITIONS="""
+proc small? {x} {
+	if {< $x 0} {return ""}
+	if {> $x 100} {return ""}
+	return true
+}
+proc hyp {a b} {+ [* $a $a] [* $b $b]}
+proc clamp {x lo hi} {
+	if {< $x $lo} {return $lo} elif {> $x $hi} {return $hi} else {return $x}
+}
+proc fib {n} {
+	if {< $n 2} {return $n}
+	+ [fib [- $n 1]] [fib [- $n 2]]
+}
+proc count {n acc} {
+	if {< $n 1} {return $acc}
+	return [count [- $n 1] [+ $acc 1]]
+}
+proc label {name n} {
+	set total [+ $n 1]
+	lower "$name-$total"
+}
+"""
+
+# program, calls of the definition it makes
+CASES=(
+	("small? 42",1),
+	("hyp 3 4",1),
+	("clamp 120 0 100",1),
+	("label Item 4",1),
+	("fib 10",177),
+	("count 200 0",201),
+)
+
+async def make_vm(jit_threshold):
+	vm=Tclish_interpreter(jit_threshold=jit_threshold)
+	vm.add_stdlibs()
+	await vm.eval(Tclish_task(""),DEFINITIONS)
+	return vm
+
+async def measure(vm,program,repeat,rounds):
+	task=Tclish_task("")
+	ok,code=vm.compile(task,"\n".join([program]*repeat))
+	# warm up, past the jit threshold
+	await vm.eval_code(task,code)
+	best=None
+	for _ in range(rounds):
+		start=time.perf_counter()
+		ok,res=await vm.eval_code(task,code)
+		elapsed=time.perf_counter()-start
+		if not vm.is_ok(ok):
+			raise RuntimeError(res)
+		best=elapsed if best is None else min(best,elapsed)
+	return best/repeat
+
+async def main(repeat=100,rounds=5):
+	print(f"{'program':<18}{'interp us/call':>16}{'jit us/call':>14}{'speedup':>10}")
+	for program,calls in CASES:
+		slow=await measure(await make_vm(None),program,repeat,rounds)/calls
+		fast=await measure(await make_vm(2),program,repeat,rounds)/calls
+		print(f"{program:<18}{slow*1e6:>16.2f}{fast*1e6:>14.2f}{slow/fast:>9.2f}x")
+
+if __name__ == '__main__':
+	asyncio.run(main())
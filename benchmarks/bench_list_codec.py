@@ -0,0 +1,66 @@
+"""
+time to pack and unpack lists of growing size.
+
+run from the repository root:
+	python -m benchmarks.bench_list_codec
+
+the slicing decoder the codec replaced is timed next to it up to
+LEGACY_LIMIT items, past that it takes minutes.
+"""
+import time
+
+from tclish.std_utils import (
+	pack_strings,
+	unpack_strings,
+	split_string_internal,
+	unescape_string)
+
+SIZES=(10,100,1000,10000,100000,1000000)
+LEGACY_LIMIT=20000
+
+def legacy_unpack_strings(s):
+	"""the decoder before the rewrite, one slice of the rest per item"""
+	if s.startswith("{") and s.endswith("}"):
+		s=s[1:-1]
+	strings=[]
+	while len(s)>1:
+		ok,start,endpos=split_string_internal(None,s)
+		if not ok:
+			break
+		substr=s[start:endpos]
+		s=s[endpos:]
+		if substr.startswith("'") and substr.endswith("'"):
+			substr=unescape_string(substr[1:-1])
+		strings.append(substr)
+	if len(s)>0:
+		strings.append(s)
+	return True,strings
+
+def make_items(n):
+	# every tenth item needs escaping
+	return [f"item {i}" if i%10 else f"it's {{{i}}}" for i in range(n)]
+
+def timed(f,*args):
+	start=time.perf_counter()
+	result=f(*args)
+	return time.perf_counter()-start,result
+
+def main():
+	print(f"{'items':>10}{'pack ms':>12}{'unpack ms':>12}{'ns/item':>10}{'legacy ms':>12}")
+	for n in SIZES:
+		items=make_items(n)
+		pack_time,text=timed(pack_strings,None,items)
+		unpack_time,(ok,decoded)=timed(unpack_strings,None,text)
+		if decoded!=items:
+			raise RuntimeError(f"round trip failed for {n} items")
+		per_item=(pack_time+unpack_time)/n*1e9
+		legacy="-"
+		if n<=LEGACY_LIMIT:
+			legacy_time,(ok,legacy_decoded)=timed(legacy_unpack_strings,text)
+			if legacy_decoded!=items:
+				raise RuntimeError(f"legacy decoder disagrees for {n} items")
+			legacy=f"{legacy_time*1e3:.2f}"
+		print(f"{n:>10}{pack_time*1e3:>12.2f}{unpack_time*1e3:>12.2f}{per_item:>10.0f}{legacy:>12}")
+
+if __name__ == '__main__':
+	main()
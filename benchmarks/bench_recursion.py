@@ -0,0 +1,86 @@
+"""
+cost of deep recursion: tail calls reuse the caller's frame, other calls nest.
+
+run from the repository root:
+	python -m benchmarks.bench_recursion
+
+prints the time per call and the deepest python stack seen while running,
+every definition should stay at the same python depth at any n: tail calls
+reuse the frame, other calls nest on the task's stack.
+"""
+import asyncio
+import sys
+import time
+
+from tclish import Tclish_interpreter, Tclish_task
+
+# PROBE is replaced by a command recording the python stack depth, or removed for timing
+DEFINITIONS="""
+proc count {n acc} {
+	PROBE
+	if {< $n 1} {return $acc}
+	return [count [- $n 1] [+ $acc 1]]
+}
+proc even {n} {
+	PROBE
+	if {< $n 1} {return yes} else {odd [- $n 1]}
+}
+proc odd {n} {
+	PROBE
+	if {< $n 1} {return no} else {even [- $n 1]}
+}
+proc depth {n} {
+	PROBE
+	if {< $n 1} {return 0}
+	+ 1 [depth [- $n 1]]
+}
+"""
+
+CASES=(
+	("count {n} 0",(10,1000,100000)),
+	("even {n}",(10,1000,100000)),
+	("depth {n}",(10,1000,9000)),
+)
+
+def python_depth():
+	depth=0
+	frame=sys._getframe()
+	while frame is not None:
+		depth+=1
+		frame=frame.f_back
+	return depth
+
+def make_vm(probed):
+	vm=Tclish_interpreter()
+	vm.add_stdlibs()
+	deepest=0
+	def probe(vm,task,args):
+		nonlocal deepest
+		deepest=max(deepest,python_depth())
+		return vm.ok("")
+	vm.commands.add("probe",probe,"")
+	asyncio.run(vm.eval(Tclish_task(""),DEFINITIONS.replace("PROBE","probe" if probed else "")))
+	return vm,lambda:deepest
+
+async def measure(vm,program,n):
+	task=Tclish_task("")
+	start=time.perf_counter()
+	ok,res=await vm.eval(task,program)
+	elapsed=time.perf_counter()-start
+	if not vm.is_ok(ok):
+		raise RuntimeError(res)
+	return elapsed/n
+
+def main():
+	print(f"{'call':<14}{'n':>8}{'us/call':>10}{'py depth':>10}")
+	for template,sizes in CASES:
+		for n in sizes:
+			program=template.format(n=n)
+			vm,deepest=make_vm(False)
+			per_call=asyncio.run(measure(vm,program,n))
+			vm,deepest=make_vm(True)
+			asyncio.run(measure(vm,program,n))
+			print(f"{template.split()[0]:<14}{n:>8}{per_call*1e6:>10.2f}{deepest():>10}")
+
+if __name__ == '__main__':
+	main()
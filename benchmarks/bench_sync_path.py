@@ -0,0 +1,89 @@
+"""
+per-sentence overhead of the evaluator, now and before the series.
+sentences that only reach plain functions are evaluated without creating a coroutine,
+the definition is classified sync and runs the same way.
+
+run from the repository root:
+	python -m benchmarks.bench_sync_path
+
+the before column runs the same programs on tclish as of the first commit,
+extracted with git archive and timed in a python process of its own.
+both columns evaluate the program text, the evaluator before the series
+parsed it on every evaluation, now it comes from the parse cache.
+"""
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+from tclish import Tclish_interpreter, Tclish_task
+
+SENTENCES={
+	"literal":"+ 1 2",
+	"variable":"+ $a 1",
+	"substitution":"+ $a [* $a 2]",
+	"interpolation":"set b \"a is $a\"",
+	"if":"if {> $a 1} {+ $a 1} else {- $a 1}",
+	"definition":"inc $a",
+}
+
+def make_vm():
+	vm=Tclish_interpreter()
+	vm.add_stdlibs()
+	vm.add_definition("inc","args map x\n+ $x 1","")
+	return vm
+
+async def measure(vm,sentence,repeat,rounds):
+	task=Tclish_task("")
+	task.set_value("a","5")
+	program="\n".join([sentence]*repeat)
+	best=None
+	for _ in range(rounds):
+		start=time.perf_counter()
+		ok,res=await vm.eval(task,program)
+		elapsed=time.perf_counter()-start
+		if not vm.is_ok(ok):
+			raise RuntimeError(res)
+		best=elapsed if best is None else min(best,elapsed)
+	return best/repeat
+
+async def times(repeat=1000,rounds=15):
+	"""seconds per sentence for every entry of SENTENCES, on the tclish this process imported"""
+	return {name:await measure(make_vm(),sentence,repeat,rounds) for name,sentence in SENTENCES.items()}
+
+def baseline_times():
+	"""times() on tclish as of the first commit, None if git can't provide it"""
+	root=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	try:
+		first=subprocess.run(["git","rev-list","--max-parents=0","HEAD"],cwd=root,capture_output=True,text=True,check=True).stdout.split()[-1]
+		archive=subprocess.run(["git","archive",first,"tclish"],cwd=root,capture_output=True,check=True).stdout
+	except (OSError,subprocess.CalledProcessError,IndexError):
+		return None
+	with tempfile.TemporaryDirectory() as tree:
+		with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+			tar.extractall(tree)
+		# run as a script, so the tclish it imports is the extracted one
+		env=dict(os.environ,PYTHONPATH=tree)
+		worker=subprocess.run([sys.executable,os.path.abspath(__file__),"--times"],env=env,capture_output=True,text=True)
+	if worker.returncode!=0:
+		return None
+	return json.loads(worker.stdout)
+
+def main():
+	now=asyncio.run(times())
+	before=baseline_times()
+	print(f"{'sentence':<16}{'before us':>11}{'now us':>10}")
+	for name in SENTENCES:
+		old=f"{before[name]*1e6:.2f}" if before is not None else "-"
+		print(f"{name:<16}{old:>11}{now[name]*1e6:>10.2f}")
+
+if __name__ == '__main__':
+	if sys.argv[1:]==["--times"]:
+		print(json.dumps(asyncio.run(times())))
+	else:
+		main()
@@ -0,0 +1,77 @@
+"""
+many tasks calling object methods concurrently on one interpreter.
+
+run from the repository root:
+	python -m benchmarks.bench_tasks
+
+every task owns a counter object and increments it in a method that suspends
+between reading and writing the counter, so the tasks interleave inside the methods.
+self is bound to the task calling the method, a task that saw another task's
+self would count on the wrong object and the totals would be off.
+"""
+import asyncio
+import time
+
+from tclish import Tclish_interpreter, Tclish_task
+
+CLASSES="""
+class counter \\
+	var count integer? 0 \\
+	method step {
+		set before [self get count]
+		pause
+		self set count [+ $before 1]
+		pause
+		self get count
+	}
+"""
+
+PROGRAM="""
+new counter c{n}
+set i 0
+while {{< $i {steps}}} {{
+	c{n} step
+	set i [+ $i 1]
+}}
+c{n} get count
+"""
+
+async def pause(vm,task,args):
+	await asyncio.sleep(0)
+	return vm.ok("")
+
+async def make_vm():
+	vm=Tclish_interpreter()
+	vm.add_stdlibs()
+	vm.commands.add("pause",pause,"")
+	ok,res=await vm.eval(Tclish_task(""),CLASSES)
+	if not vm.is_ok(ok):
+		raise RuntimeError(res)
+	return vm
+
+async def run(tasks,steps,concurrent):
+	vm=await make_vm()
+	programs=[PROGRAM.format(n=n,steps=steps) for n in range(tasks)]
+	start=time.perf_counter()
+	if concurrent:
+		results=await asyncio.gather(*[vm.eval(Tclish_task(""),program) for program in programs])
+	else:
+		results=[await vm.eval(Tclish_task(""),program) for program in programs]
+	elapsed=time.perf_counter()-start
+	for ok,res in results:
+		if not vm.is_ok(ok):
+			raise RuntimeError(res)
+		if str(res)!=str(steps):
+			raise RuntimeError(f"a counter reached {res} instead of {steps}, tasks shared self")
+	return elapsed/(tasks*steps)
+
+async def main():
+	print(f"{'tasks':>6}{'steps':>7}{'mode':>12}{'us/call':>10}")
+	for tasks,steps in ((10,100),(200,20),(500,10)):
+		for concurrent in (False,True):
+			per_call=await run(tasks,steps,concurrent)
+			mode="concurrent" if concurrent else "sequential"
+			print(f"{tasks:>6}{steps:>7}{mode:>12}{per_call*1e6:>10.2f}")
+
+if __name__ == '__main__':
+	asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+cost of scheduling, cancelling and running events with many of them pending,
+the timer queue behind schedule-event against a bare heapq of (time, sequence, event).
+
+run from the repository root:
+	python -m benchmarks.bench_timers
+
+times are spread over an hour from a fixed start, the clock is simulated,
+running drains everything due over the hour in 1000 steps.
+a bare heap can only cancel by searching for the event, it has no cancel column.
+"""
+import heapq
+import random
+import time
+
+from tclish.timers import Tclish_timer_queue
+
+START=1_700_000_000.0
+SPAN=3600.0
+STEPS=1000
+
+def queue_run(times):
+	queue=Tclish_timer_queue()
+	start=time.perf_counter()
+	ids=[queue.add(t,t) for t in times]
+	added=time.perf_counter()
+	# cancel a tenth, the way timeouts that didn't fire are dropped
+	for event_id in ids[::10]:
+		queue.cancel(event_id)
+	cancelled=time.perf_counter()
+	ran=0
+	for step in range(1,STEPS+1):
+		now=START+SPAN*step/STEPS
+		while queue.pop(now) is not None:
+			ran+=1
+	done=time.perf_counter()
+	return added-start,cancelled-added,done-cancelled,ran
+
+def heap_run(times):
+	heap=[]
+	start=time.perf_counter()
+	for sequence,t in enumerate(times):
+		heapq.heappush(heap,(t,sequence,t))
+	added=time.perf_counter()
+	ran=0
+	for step in range(1,STEPS+1):
+		now=START+SPAN*step/STEPS
+		while heap and heap[0][0]<=now:
+			heapq.heappop(heap)
+			ran+=1
+	done=time.perf_counter()
+	return added-start,done-added,ran
+
+def main():
+	random.seed(0)
+	print(f"{'pending':>9}{'kind':>7}{'add us':>9}{'cancel us':>11}{'run us':>9}")
+	for n in (10_000,100_000,1_000_000):
+		times=[START+random.random()*SPAN for _ in range(n)]
+		add,cancel,run,ran=queue_run(times)
+		print(f"{n:>9}{'queue':>7}{add/n*1e6:>9.2f}{cancel/(n//10)*1e6:>11.2f}{run/ran*1e6:>9.2f}")
+		add,run,ran=heap_run(times)
+		print(f"{n:>9}{'heap':>7}{add/n*1e6:>9.2f}{'-':>11}{run/ran*1e6:>9.2f}")
+
+if __name__ == '__main__':
+	main()
@@ -14,4 +14,5 @@ from .std_utils import (
 	extract_header,
 	nested_help_function)
 from .db import Tclish_DB
-from .db_disk import Tclish_DB_disk
\ No newline at end of file
+from .db_disk import Tclish_DB_disk
+from .values import Tclish_value, Tclish_list, Tclish_number, Tclish_range, Tclish_error
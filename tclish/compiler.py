@@ -0,0 +1,380 @@
+##=================================================================##
+##  COMPILER                                                       ##
+##=================================================================##
+# turns program text into a tree of typed nodes, so the interpreter
+# doesn't have to rediscover what every word is each time it runs.
+from .std_utils import (
+	escape_length,
+	unescape_string,
+	read_word,
+	skip_command_string,
+	to_text)
+from .values import text_args
+
+
+class Tclish_literal():
+	"""a word that evaluates to itself: bare words, {...} and '...'"""
+	__slots__=("value",)
+	def __init__(self,value):
+		self.value=value
+	def __repr__(self):
+		return f"Tclish_literal({self.value!r})"
+
+class Tclish_variable():
+	"""$name"""
+	__slots__=("name",)
+	def __init__(self,name):
+		self.name=name
+	def __repr__(self):
+		return f"Tclish_variable({self.name!r})"
+
+class Tclish_local():
+	"""
+	$name inside a definition body, where name is a parameter or a local of the definition.
+	it reads slot of the frame running the body, layout identifies the definition the slot belongs to.
+	"""
+	__slots__=("name","slot","layout")
+	def __init__(self,name,slot,layout):
+		self.name=name
+		self.slot=slot
+		self.layout=layout
+	def __repr__(self):
+		return f"Tclish_local({self.name!r},{self.slot})"
+
+class Tclish_substitution():
+	"""[command ...], holds the compiled inner program"""
+	__slots__=("code",)
+	def __init__(self,code):
+		self.code=code
+	def __repr__(self):
+		return f"Tclish_substitution({self.code.source!r})"
+
+class Tclish_interpolation():
+	"""\"...\" with embedded $variables and [commands]"""
+	__slots__=("parts",)
+	def __init__(self,parts):
+		self.parts=parts
+	def __repr__(self):
+		return f"Tclish_interpolation({self.parts!r})"
+
+class Tclish_splat():
+	"""{*} word, the value of word is unpacked into several arguments"""
+	__slots__=("word",)
+	def __init__(self,word):
+		self.word=word
+	def __repr__(self):
+		return f"Tclish_splat({self.word!r})"
+
+class Tclish_sentence():
+	"""
+	a single command invocation.
+	name and modifier are resolved at compile time when the command word is a literal,
+	otherwise name is None and the command word is evaluated at runtime.
+	sync caches whether the sentence only reaches plain functions, see Tclish_interpreter.code_is_sync,
+	it is valid while sync_version matches the interpreter's dispatch_version.
+	"""
+	__slots__=("command","args","name","modifier","sync","sync_version","__weakref__")
+	def __init__(self,command,args):
+		self.command=command
+		self.args=args
+		self.name=None
+		self.modifier=False
+		self.sync=False
+		self.sync_version=-1
+		if type(command) is Tclish_literal:
+			self.name,self.modifier=split_modifier(command.value)
+	def __repr__(self):
+		return f"Tclish_sentence({self.command!r},{self.args!r})"
+
+class Tclish_code():
+	"""a compiled program, a tuple of sentences and the text it was compiled from"""
+	__slots__=("sentences","source","sync","sync_version","layout","params","body","calls","jit")
+	def __init__(self,sentences,source):
+		self.sentences=sentences
+		self.source=source
+		self.sync=False
+		self.sync_version=-1
+		# name -> slot for definition bodies, see resolve_locals
+		self.layout=None
+		# names of a leading args map, bound by eval before it runs body, the sentences after it
+		self.params=None
+		self.body=None
+		# times a definition body ran interpreted, None for code that isn't one
+		# or is waiting for one of the names it calls to change, see jit.py
+		self.calls=None
+		# the python function jit.py translated the body to
+		self.jit=None
+	def __repr__(self):
+		return f"Tclish_code({self.sentences!r})"
+
+
+def split_modifier(command):
+	"""
+	commands ending with a single "=" modify the variable named by their first argument.
+	returns the command to call and whether it is a modifier.
+	"""
+	if len(command)>=2 and command[-1]=="=" and command[-2]!="=":
+		return command[:-1],True
+	return command,False
+
+def compile_interpolation(vm,task,s):
+	tmp=s[1:]
+	parts=[]
+	chunk=[]
+	pos=0
+
+	def flush():
+		if chunk:
+			parts.append(Tclish_literal("".join(chunk)))
+			chunk.clear()
+
+	while pos<len(tmp) and tmp[pos]!="\"":
+		char=tmp[pos]
+		if char=="\\":
+			l=escape_length(tmp,pos)
+			chunk.append(unescape_string(tmp[pos:pos+l+1]))
+			pos+=l+1
+		elif char=="$":
+			word,npos=read_word(tmp,pos+1)
+			if word:
+				flush()
+				parts.append(Tclish_variable(word))
+				pos=npos
+			else:
+				chunk.append("$")
+				pos+=1
+		elif char=="[":
+			start=pos
+			success,pos=skip_command_string(vm,tmp,pos)
+			if not success:
+				return vm.error(task,pos,"compile")
+			if pos==start:
+				return vm.error(task,"error compiling big string","compile")
+			ok,code=compile_program(vm,task,tmp[start+1:pos-1])
+			if vm.is_error(ok):
+				return ok,code
+			flush()
+			parts.append(Tclish_substitution(code))
+		else:
+			chunk.append(char)
+			pos+=1
+
+	flush()
+	if len(parts)==0:
+		return vm.ok(Tclish_literal(""))
+	if len(parts)==1 and type(parts[0]) is Tclish_literal:
+		return vm.ok(parts[0])
+	return vm.ok(Tclish_interpolation(tuple(parts)))
+
+def compile_word(vm,task,s):
+	if len(s)<1:
+		return vm.ok(Tclish_literal(s))
+	first=s[0]
+	if first=="{":
+		return vm.ok(Tclish_literal(s[1:-1]))
+	if first=="'":
+		return vm.ok(Tclish_literal(unescape_string(s[1:-1])))
+	if first=="$":
+		return vm.ok(Tclish_variable(s[1:]))
+	if first=="[":
+		ok,code=compile_program(vm,task,s[1:-1])
+		if vm.is_error(ok):
+			return ok,code
+		return vm.ok(Tclish_substitution(code))
+	if first=="\"":
+		return compile_interpolation(vm,task,s)
+	return vm.ok(Tclish_literal(s))
+
+def compile_sentence(vm,task,words):
+	unpack_command="{*}"
+	ok,command=compile_word(vm,task,words[0])
+	if vm.is_error(ok):
+		return ok,command
+
+	args=[]
+	pos=1
+	while pos<len(words):
+		word=words[pos]
+		if word==unpack_command:
+			if pos==1 and type(command) is Tclish_literal and command.value=="help":
+				args.append(Tclish_literal(unpack_command))
+				pos+=1
+				continue
+			pos+=1
+			if pos>=len(words):
+				# a trailing {*} splats itself
+				ok,node=compile_word(vm,task,unpack_command)
+			else:
+				ok,node=compile_word(vm,task,words[pos])
+			if vm.is_error(ok):
+				return ok,node
+			args.append(Tclish_splat(node))
+		else:
+			ok,node=compile_word(vm,task,word)
+			if vm.is_error(ok):
+				return ok,node
+			args.append(node)
+		pos+=1
+
+	return vm.ok(Tclish_sentence(command,tuple(args)))
+
+def compile_program(vm,task,prog):
+	"""compile program text into a Tclish_code, comments are dropped"""
+	ok,sentences=vm.split_sentences(task,prog)
+	if vm.is_error(ok):
+		return ok,sentences
+	compiled=[]
+	for words in sentences:
+		if len(words)<1 or len(words[0])<1 or words[0][0]=="#":
+			continue
+		ok,sentence=compile_sentence(vm,task,words)
+		if vm.is_error(ok):
+			return ok,sentence
+		compiled.append(sentence)
+	return vm.ok(Tclish_code(tuple(compiled),prog))
+
+def local_names(code):
+	"""
+	the names a definition body binds in its own frame:
+	the names of a leading args map, and the literal targets of set and modifiers.
+	"""
+	names=[]
+	for i,sentence in enumerate(code.sentences):
+		args=sentence.args
+		if len(args)<1 or type(args[0]) is not Tclish_literal:
+			continue
+		if i==0 and sentence.name=="args" and not sentence.modifier and args[0].value=="map":
+			targets=args[1:]
+		elif sentence.name=="set" or sentence.modifier:
+			targets=args[:1]
+		else:
+			continue
+		for word in targets:
+			if type(word) is Tclish_literal and word.value not in names:
+				names.append(word.value)
+	return names
+
+def resolve_word(word,layout):
+	kind=type(word)
+	if kind is Tclish_variable:
+		slot=layout.get(word.name)
+		if slot is not None:
+			return Tclish_local(word.name,slot,layout)
+	elif kind is Tclish_substitution:
+		resolve_code(word.code,layout)
+	elif kind is Tclish_interpolation:
+		word.parts=tuple(resolve_word(part,layout) for part in word.parts)
+	elif kind is Tclish_splat:
+		word.word=resolve_word(word.word,layout)
+	return word
+
+def resolve_code(code,layout):
+	for sentence in code.sentences:
+		sentence.command=resolve_word(sentence.command,layout)
+		sentence.args=tuple(resolve_word(word,layout) for word in sentence.args)
+
+def resolve_locals(code):
+	"""
+	give the parameters and locals of a definition body fixed slots in its frame,
+	and turn the $name words that read them into Tclish_local.
+	braced code the body passes on (if, while, ...) is compiled on its own and keeps looking names up.
+	the code must not be shared, compile it with compile_program instead of taking it from the parse cache.
+	"""
+	names=local_names(code)
+	if not names:
+		return code
+	layout={name:slot for slot,name in enumerate(names)}
+	resolve_code(code,layout)
+	code.layout=layout
+	params=leading_params(code)
+	if params is not None:
+		code.params=params
+		code.body=Tclish_code(code.sentences[1:],code.source)
+		code.body.layout=layout
+	return code
+
+def leading_params(code):
+	"""the names of an args map that starts the code, if they are all literal"""
+	if len(code.sentences)<1:
+		return None
+	sentence=code.sentences[0]
+	args=sentence.args
+	if sentence.name!="args" or sentence.modifier or len(args)<1:
+		return None
+	if type(args[0]) is not Tclish_literal or args[0].value!="map":
+		return None
+	if not all(type(word) is Tclish_literal for word in args[1:]):
+		return None
+	return tuple(word.value for word in args[1:])
+
+
+def fold_code(vm,code):
+	"""
+	replace [command ...] words calling a pure command with literal arguments by its result.
+	sentences are changed in place and recorded with vm.record_fold,
+	redefining one of the commands folded into them puts the original words back.
+	returns the names of the commands folded.
+	"""
+	folded=set()
+	for sentence in code.sentences:
+		names=set()
+		args=fold_words(vm,sentence.args,names)
+		if names:
+			vm.record_fold(names,sentence,sentence.args)
+			sentence.args=args
+			folded|=names
+	return folded
+
+def fold_words(vm,words,names):
+	"""words with the foldable ones replaced, the names of the commands folded are added to names"""
+	folded=[]
+	for word in words:
+		kind=type(word)
+		if kind is Tclish_substitution:
+			word=fold_substitution(vm,word,names)
+		elif kind is Tclish_interpolation:
+			inner=set()
+			parts=fold_words(vm,word.parts,inner)
+			if inner:
+				names|=inner
+				if all(type(part) is Tclish_literal for part in parts):
+					word=Tclish_literal("".join(to_text(part.value) for part in parts))
+				else:
+					word=Tclish_interpolation(parts)
+		elif kind is Tclish_splat:
+			inner=set()
+			parts=fold_words(vm,(word.word,),inner)
+			if inner:
+				names|=inner
+				word=Tclish_splat(parts[0])
+		folded.append(word)
+	return tuple(folded)
+
+def fold_substitution(vm,word,names):
+	inner=fold_code(vm,word.code)
+	sentences=word.code.sentences
+	if len(sentences)!=1:
+		return word
+	sentence=sentences[0]
+	if sentence.name is None or sentence.modifier:
+		return word
+	if not all(type(arg) is Tclish_literal for arg in sentence.args):
+		return word
+	entry=vm.dispatch.get(sentence.name)
+	if entry is None:
+		entry=vm.resolve_command(sentence.name)
+	if entry is None or not entry.pure or entry.is_async:
+		return word
+	args=[arg.value for arg in sentence.args]
+	if not entry.takes_values:
+		text_args(args)
+	try:
+		ok,result=entry.function(vm,None,args)
+	except Exception:
+		# left for the call at runtime to report
+		return word
+	if not vm.is_ok(ok) or result is None:
+		return word
+	names|=inner
+	names.add(sentence.name)
+	return Tclish_literal(result)
@@ -195,6 +195,27 @@ class Tclish_DB():
 				return []  # Key not found, return an empty list
 		return [key for key in current_node.keys() if isinstance(key,str)]
 
+	def iter_keys(self, keys):
+		"""
+		Iterates over the immediate child keys under the specified hierarchical keys,
+		reading them one at a time instead of listing them up front.
+
+		Args:
+			keys (list[str]): A list of strings representing the hierarchical keys.
+
+		Yields:
+			str: The immediate child keys, a RuntimeError is raised if keys are set or removed under them meanwhile.
+		"""
+		current_node = self.db
+		for key in keys:
+			if key in current_node:
+				current_node = current_node[key]
+			else:
+				return  # Key not found, nothing to iterate over
+		for key in current_node:
+			if isinstance(key,str):
+				yield key
+
 	def prune(self, keys):
 		"""
 		Prunes the hierarchical key-value store by removing the specified keys and their subkeys.
@@ -0,0 +1,294 @@
+##=================================================================##
+##  JIT                                                            ##
+##=================================================================##
+# definitions called often are translated into python source that calls
+# the functions their sentences resolve to, compiled with compile() and
+# run instead of walking the compiled tree.
+# the translation bakes in what every name resolved to, the interpreter
+# drops it when one of those names changes, see Tclish_interpreter.deoptimize,
+# and interprets the body for tasks that bound a handle to one of them.
+from .std_utils import isTrue,to_text
+from .compiler import (
+	Tclish_code,
+	Tclish_literal,
+	Tclish_variable,
+	Tclish_local,
+	Tclish_substitution,
+	Tclish_interpolation)
+
+
+class Tclish_jit_unsupported(Exception):
+	"""the code uses something the translator doesn't handle, it stays interpreted"""
+
+
+##=================================================================##
+##  RUNTIME HELPERS                                                ##
+##=================================================================##
+# called from the generated code
+
+def text(value):
+	return value if value.__class__ is str else str(value)
+
+def variable(vm,task,name):
+	val=vm.get_value(name,task=task)
+	return "" if val is None else val
+
+def call_definition(vm,task,code,name,args):
+	# only calls to sync definitions are translated, and the translation is dropped
+	# when a name they reach changes, so this never suspends
+	return vm.eval_sync(task,code,args=args)
+
+
+##=================================================================##
+##  TRANSLATOR                                                     ##
+##=================================================================##
+
+class Tclish_jit_writer():
+	"""
+	writes the python source for one definition.
+	objects the source refers to (compiled code, command functions, words)
+	are passed in as globals named k0, k1, ...
+	"""
+	def __init__(self,vm):
+		self.vm=vm
+		self.lines=[]
+		self.constants={}
+		# command names the translation depends on
+		self.names=set()
+		self.count=0
+
+	def constant(self,value):
+		name=f"k{len(self.constants)}"
+		self.constants[name]=value
+		return name
+
+	def temp(self,prefix):
+		self.count+=1
+		return f"{prefix}{self.count}"
+
+	def emit(self,indent,line):
+		self.lines.append("\t"*indent+line)
+
+	def code(self,indent,code,target,tail):
+		"""emit the sentences of code, leaving its result in target"""
+		self.emit(indent,f'{target}=""')
+		sentences=code.sentences
+		for i,sentence in enumerate(sentences):
+			self.sentence(indent,sentence,target,tail and i==len(sentences)-1)
+
+	def sentence(self,indent,sentence,target,tail):
+		vm=self.vm
+		name=sentence.name
+		if name is None or sentence.modifier or name in vm.sync_barriers:
+			raise Tclish_jit_unsupported(name)
+		entry=vm.dispatch.get(name)
+		if entry is None:
+			entry=vm.resolve_command(name)
+		if entry is None:
+			raise Tclish_jit_unsupported(name)
+		self.names.add(name)
+
+		if entry.code is not None:
+			if type(entry.code) is not Tclish_code:
+				raise Tclish_jit_unsupported(name)
+			if tail:
+				# eval runs it in the reused frame, where it may suspend
+				args=self.args(indent,sentence.args,True)
+				self.emit(indent,f"return TAIL_CALL,({self.constant(entry.code)},[{args}])")
+				return
+			# any other call has to finish before the generated code goes on
+			if not vm.code_is_sync(entry.code):
+				raise Tclish_jit_unsupported(name)
+			vm.sync_names(entry.code,self.names)
+			args=self.args(indent,sentence.args,True)
+			code=self.constant(entry.code)
+			self.call(indent,f"call_definition(vm,task,{code},{name!r},[{args}])",name,target)
+			return
+
+		if name=="if":
+			self.if_sentence(indent,sentence,target,tail)
+			return
+		if name=="&&" or name=="||":
+			self.conditions(indent,self.literals(sentence),target,name=="&&")
+			return
+
+		words=sentence.args
+		if tail and name=="return" and len(words)==1 and type(words[0]) is Tclish_substitution and len(words[0].code.sentences)==1:
+			# return [call ...], the call is a tail call
+			value=self.temp("v")
+			self.code(indent,words[0].code,value,True)
+			self.emit(indent,f"return FORCED_RETURN,{value}")
+			return
+
+		if entry.is_async:
+			raise Tclish_jit_unsupported(name)
+		args=self.args(indent,words,entry.takes_values)
+		function=self.constant(entry.function)
+		self.call(indent,f"{function}(vm,task,[{args}])",name,target)
+
+	def call(self,indent,expression,name,target):
+		result=self.temp("r")
+		self.emit(indent,f"ok,{result}={expression}")
+		self.emit(indent,f"if ok is NORMAL and {result} is not None:")
+		self.emit(indent+1,f"{target}={result}")
+		# the rest is what eval_sentence does with anything but a plain success
+		self.emit(indent,"else:")
+		self.emit(indent+1,"if ok.__class__ is not FLAG:")
+		self.emit(indent+2,f"return vm.bad_response(task,{name!r},ok,{result})")
+		self.emit(indent+1,f"if {result} is None:")
+		self.emit(indent+2,'return vm.error(task,"something went horribly wrong","evalSentence")')
+		self.emit(indent+1,"if ok is not COMMENT:")
+		self.emit(indent+2,f"return ok,{result}")
+
+	def args(self,indent,words,takes_values):
+		"""
+		emit what evaluating words needs and return the argument list source.
+		every argument that isn't a literal goes through a temporary, so they are evaluated in order.
+		"""
+		args=[]
+		for word in words:
+			if type(word) is Tclish_literal:
+				args.append(self.literal(word))
+				continue
+			value=self.word(indent,word)
+			arg=self.temp("a")
+			self.emit(indent,f"{arg}={value}" if takes_values else f"{arg}=text({value})")
+			args.append(arg)
+		return ",".join(args)
+
+	def literal(self,word):
+		value=word.value
+		if value.__class__ is str:
+			return repr(value)
+		# value objects folded into the code, see compiler.fold_code
+		return self.constant(value)
+
+	def word(self,indent,word):
+		"""emit what evaluating word needs and return an expression for its value"""
+		kind=type(word)
+		if kind is Tclish_literal:
+			return self.literal(word)
+		if kind is Tclish_variable:
+			return f"variable(vm,task,{word.name!r})"
+		if kind is Tclish_local:
+			return f"vm.get_local(task,{self.constant(word)})"
+		if kind is Tclish_substitution:
+			value=self.temp("s")
+			self.code(indent,word.code,value,False)
+			return value
+		if kind is Tclish_interpolation:
+			parts=[]
+			for part in word.parts:
+				value=self.temp("p")
+				self.emit(indent,f"{value}=to_text({self.word(indent,part)})")
+				parts.append(value)
+			return f"\"\".join(({','.join(parts)},))" if parts else '""'
+		# splats
+		raise Tclish_jit_unsupported(kind.__name__)
+
+	def if_sentence(self,indent,sentence,target,tail):
+		"""the chain of conditions and bodies of an if, read the way vmif reads them"""
+		values=self.literals(sentence)
+		branches=[(values[0] if len(values)>0 else "",values[1] if len(values)>1 else "")]
+		otherwise=None
+		pos=2
+		while pos<len(values):
+			keyword=values[pos].lower()
+			pos+=1
+			if keyword=="else":
+				otherwise=values[pos] if pos<len(values) else ""
+				break
+			if keyword=="elseif" or keyword=="elif":
+				branches.append((values[pos] if pos<len(values) else "",values[pos+1] if pos+1<len(values) else ""))
+				pos+=2
+		self.branch(indent,branches,otherwise,target,tail)
+
+	def branch(self,indent,branches,otherwise,target,tail):
+		if not branches:
+			if otherwise is None:
+				self.emit(indent,f'{target}=""')
+			else:
+				self.code(indent,self.compile(otherwise),target,tail)
+			return
+		condition,body=branches[0]
+		value=self.temp("c")
+		self.code(indent,self.compile(condition),value,False)
+		self.emit(indent,f"if isTrue({value}):")
+		self.code(indent+1,self.compile(body),target,tail)
+		self.emit(indent,"else:")
+		self.branch(indent+1,branches[1:],otherwise,target,tail)
+
+	def conditions(self,indent,conditions,target,all_true):
+		"""the conditions of && (all_true) or ||, evaluated until one decides the result"""
+		if not conditions:
+			self.emit(indent,f'{target}="true"' if all_true else f'{target}=""')
+			return
+		value=self.temp("c")
+		self.code(indent,self.compile(conditions[0]),value,False)
+		self.emit(indent,f"if not isTrue({value}):" if all_true else f"if isTrue({value}):")
+		self.emit(indent+1,f'{target}=""' if all_true else f'{target}="true"')
+		self.emit(indent,"else:")
+		self.conditions(indent+1,conditions[1:],target,all_true)
+
+	def literals(self,sentence):
+		"""the words of a control sentence, which has to know its code up front"""
+		values=[]
+		for word in sentence.args:
+			if type(word) is not Tclish_literal:
+				raise Tclish_jit_unsupported(sentence.name)
+			values.append(word.value)
+		return values
+
+	def compile(self,source):
+		ok,code=self.vm.compile(None,source)
+		if self.vm.is_error(ok):
+			raise Tclish_jit_unsupported(source)
+		return code
+
+def translate(writer,code):
+	"""the python source for a definition body, writer is left holding its globals"""
+	writer.emit(0,"def jitted(vm,task):")
+	body=code
+	if code.params is not None:
+		writer.emit(1,f"ok,r=vm.bind_params(task,{code.params!r})")
+		writer.emit(1,"if ok is not NORMAL:")
+		writer.emit(2,"return ok,r")
+		body=code.body
+	writer.code(1,body,"result",True)
+	writer.emit(1,"return NORMAL,result")
+	return "\n".join(writer.lines)
+
+def jit_definition(vm,code):
+	"""
+	a python function evaluating the body of a definition in the frame eval pushed for it,
+	and the command names it depends on. None when the body can't be translated,
+	the names are then the ones it got to, redefining one of them may change that.
+	"""
+	# the flags live in the interpreter module, which imports this one
+	from .tclish_interpreter import Tclish_response_flag,NORMAL,COMMENT,FORCED_RETURN,TAIL_CALL
+	writer=Tclish_jit_writer(vm)
+	try:
+		source=translate(writer,code)
+	except Tclish_jit_unsupported as unsupported:
+		name=unsupported.args[0]
+		if name is not None:
+			# not defined yet, or not sync yet
+			writer.names.add(name)
+		return None,writer.names
+	namespace=dict(writer.constants)
+	namespace.update(
+		FLAG=Tclish_response_flag,
+		NORMAL=NORMAL,
+		COMMENT=COMMENT,
+		FORCED_RETURN=FORCED_RETURN,
+		TAIL_CALL=TAIL_CALL,
+		isTrue=isTrue,
+		to_text=to_text,
+		text=text,
+		variable=variable,
+		call_definition=call_definition)
+	exec(compile(source,"<jit>","exec"),namespace)
+	jitted=namespace["jitted"]
+	# checked against the handles of the calling task, see Tclish_interpreter.eval_steps
+	jitted.names=frozenset(writer.names)
+	return jitted,writer.names
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+class Tclish_lru_cache():
+	"""
+	A bounded least-recently-used cache with hit/miss/eviction counters.
+
+	Used by the interpreter to keep parsed program text around, so a loop
+	body or a procedure body is only tokenized once no matter how many
+	times it runs.
+	"""
+	def __init__(self,maxsize=1024):
+		self.entries=OrderedDict()
+		self.maxsize=maxsize
+		self.hits=0
+		self.misses=0
+		self.evictions=0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __contains__(self,key):
+		return key in self.entries
+
+	def get(self,key,default=None):
+		entries=self.entries
+		if key in entries:
+			self.hits+=1
+			entries.move_to_end(key)
+			return entries[key]
+		self.misses+=1
+		return default
+
+	def put(self,key,value):
+		if self.maxsize<=0:
+			return value
+		entries=self.entries
+		entries[key]=value
+		entries.move_to_end(key)
+		while len(entries)>self.maxsize:
+			entries.popitem(last=False)
+			self.evictions+=1
+		return value
+
+	def remove(self,key):
+		if key in self.entries:
+			del self.entries[key]
+
+	def resize(self,maxsize):
+		self.maxsize=maxsize
+		while len(self.entries)>max(maxsize,0):
+			self.entries.popitem(last=False)
+			self.evictions+=1
+
+	def clear(self):
+		self.entries.clear()
+
+	def reset_stats(self):
+		self.hits=0
+		self.misses=0
+		self.evictions=0
+
+	def stats(self):
+		return {
+			"size":len(self.entries),
+			"maxsize":self.maxsize,
+			"hits":self.hits,
+			"misses":self.misses,
+			"evictions":self.evictions,
+		}
@@ -1,15 +1,55 @@
-from .std_utils import getl,unpack_strings,escape_string
+from .std_utils import getl,unpack_strings,escape_string,is_async_function
+
+class Tclish_dispatch_entry():
+	"""
+	what a command name resolves to, see Tclish_interpreter.resolve_command.
+	kind is one of "directive", "command", "object", "handle" or "definition".
+	definitions carry their compiled body in code instead of a function,
+	memoized ones the function looking up their results, see Tclish_memo.
+	is_async is set for functions that have to be awaited, coroutine functions
+	and evaluation steps like those of control directives and memoized definitions.
+	control directives have code_args, listing the code the sentence will run given its arguments.
+	takes_values is false when value objects have to be turned into strings before the call.
+	pure is set for commands registered as pure, see tclish_command_registry.add.
+	"""
+	__slots__=("name","kind","function","is_async","code","code_args","takes_values","pure")
+	def __init__(self,name,kind,function=None,code=None,takes_values=False,pure=False):
+		self.name=name
+		self.kind=kind
+		self.function=function
+		self.is_async=is_async_function(function) if function is not None else True
+		self.code=code
+		self.code_args=None
+		self.takes_values=takes_values
+		self.pure=pure
+
+	def __repr__(self):
+		return f"Tclish_dispatch_entry({self.name!r},{self.kind!r})"
+
 class tclish_command_registry():
 	"""docstring for tclish_command_registry"""
 	def __init__(self,parent=None):
 		self.commands={}
 		self.parent=None
+		# called with the name of every added or removed command
+		self.on_change=None
+
+	def changed(self,name):
+		if self.on_change is not None:
+			self.on_change(name)
 
 	def remove(self,name):
 		if name in self.commands:
 			del self.commands[name]
+			self.changed(name)
 
-	def add(self,name,func,helps):
+	def add(self,name,func,helps,values=False,pure=False):
+		"""
+		values=True means func accepts the value objects from values.py as arguments,
+		otherwise they are converted to strings before the call.
+		pure=True means the result only depends on the arguments and the call has no side effects,
+		calls with literal arguments are then folded into their result when code is compiled.
+		"""
 		#name=name.encode("utf-8")
 		if name in self.commands:
 			return False,f"'{name}' is already defined"
@@ -17,7 +57,10 @@ class tclish_command_registry():
 		self.commands[name]={
 			"function" : func,
 			"help" : helps,
+			"values" : values,
+			"pure" : pure,
 		}
+		self.changed(name)
 		return True,""
 
 	def get(self,name):
@@ -27,6 +70,14 @@ class tclish_command_registry():
 			return self.parent.get(name)
 		return None
 
+	def lookup(self,name):
+		"""the whole registration of name"""
+		if name in self.commands:
+			return self.commands[name]
+		if self.parent is not None:
+			return self.parent.lookup(name)
+		return None
+
 	def help(self,name):
 		if name in self.commands:
 			return self.commands[name]["help"]
@@ -45,6 +96,8 @@ class tclish_object_registry():
 		self.named_objects={}
 		self.classes={}
 		self.names={}
+		# class name -> {"constructor":Tclish_code, "methods":{name:Tclish_code}}
+		self.class_code={}
 
 	def tojson(self):
 		return {
@@ -64,6 +117,7 @@ class tclish_object_registry():
 		if "classes" in data:
 			for k,v in data["classes"].items():
 				self.classes[k]=v
+				self.class_code.pop(k,None)
 		if "names" in data:
 			for k,v in data["names"].items():
 				self.names[k]=v
@@ -148,6 +202,39 @@ class tclish_object_registry():
 		return "".join(text)
 
 
+	def compile_class(self,vm,class_name):
+		prototype=self.classes[class_name]
+		compiled={"constructor":None,"methods":{}}
+		if prototype["constructor"]!="":
+			ok,code=vm.compile_definition(None,prototype["constructor"])
+			if not vm.is_error(ok):
+				compiled["constructor"]=code
+		for name,body in prototype["methods"].items():
+			ok,code=vm.compile_definition(None,body)
+			if not vm.is_error(ok):
+				compiled["methods"][name]=code
+		self.class_code[class_name]=compiled
+		return compiled
+
+	def method_code(self,vm,class_name,method):
+		"""the compiled body of a method, or its source if it didn't compile"""
+		compiled=self.class_code.get(class_name)
+		if compiled is None:
+			compiled=self.compile_class(vm,class_name)
+		code=compiled["methods"].get(method)
+		if code is None:
+			return self.classes[class_name]["methods"][method]
+		return code
+
+	def constructor_code(self,vm,class_name):
+		compiled=self.class_code.get(class_name)
+		if compiled is None:
+			compiled=self.compile_class(vm,class_name)
+		code=compiled["constructor"]
+		if code is None:
+			return self.classes[class_name]["constructor"]
+		return code
+
 	def get_instance(self,object_id):
 		if object_id in self.objects:
 			return self.objects[object_id]
@@ -194,8 +281,8 @@ class tclish_object_registry():
 				splat="{*}"
 				type_validator=prototype["vars"][varname]["type"]
 				ok,res=await vm.eval(task,f"{type_validator} {splat} [args list]",args=[varvalue])
-				if not ok:
-					return vm.error(task,f"error in type validator {varname} <{type_validator}> = {varvalue}.\n{res}","object")
+				if vm.is_abort(ok):
+					return vm.error(task,f"error in type validator {varname} <{type_validator}> = {varvalue}.","object",cause=res)
 				if res=="":
 					return vm.error(task,f"value is not valid for type {varname} <{type_validator}> = {varvalue}.","object")
 				instance["vars"][varname]=varvalue
@@ -221,16 +308,19 @@ class tclish_object_registry():
 		elif method == "delete":
 			if instance["name"] in self.named_objects:
 				del self.named_objects[instance["name"]]
+				vm.invalidate_dispatch(instance["name"])
 			del self.objects[instance["id"]]
+			vm.invalidate_dispatch(instance["id"])
 			return vm.ok("")
 
 		elif method in prototype["methods"]:
-			method_body=prototype["methods"][method]
-			vm.add_handle("self",self.get_handle(instance),self.get_help(instance))
+			method_body=self.method_code(vm,instance["class"],method)
+			# bound to the task, methods of other objects may be running in other tasks
+			prev=task.add_handle("self",self.get_handle(instance),self.get_help(instance))
 
 			ok,res=await vm.eval(task,method_body,args=args[1:])
 
-			vm.remove_handle("self")
+			task.remove_handle("self",prev)
 			return ok,res
 
 		elif method in instance["vars"]:
@@ -312,11 +402,11 @@ class tclish_object_registry():
 			instance["vars"][name]=things["value"]
 
 		if self.classes[class_name]["constructor"] != "":
-			vm.add_handle("self",self.get_handle(instance),self.get_help(instance))
+			prev=task.add_handle("self",self.get_handle(instance),self.get_help(instance))
 
-			ok,res=await vm.eval(task,self.classes[class_name]["constructor"],args=args[2:])
+			ok,res=await vm.eval(task,self.constructor_code(vm,class_name),args=args[2:])
 
-			vm.remove_handle("self")
+			task.remove_handle("self",prev)
 
 			if vm.is_abort(ok):
 				return ok,res
@@ -324,6 +414,7 @@ class tclish_object_registry():
 			self.objects[instance["id"]]=instance
 			if instance_name is not None:
 				self.named_objects[instance_name]=instance["id"]
+				vm.invalidate_dispatch(instance_name)
 			return vm.ok(res)
 		else:
 			pos=2
@@ -345,7 +436,7 @@ class tclish_object_registry():
 					type_validator = self.classes[class_name]["vars"][varname]["type"]
 					ok,res=await vm.eval(task,f"{type_validator} {splat} [args list]",args=[varvalue])
 					if vm.is_abort(ok):
-						return vm.error(task,f"error in type validator {varname} <{type_validator}> = {varvalue}.\n{res}",f"new {class_name}")
+						return vm.error(task,f"error in type validator {varname} <{type_validator}> = {varvalue}.",f"new {class_name}",cause=res)
 					if res=="":
 						return vm.error(task,f"value is not valid for type {varname} <{type_validator}> = {varvalue}.",f"new {class_name}")
 					instance["vars"][varname]=varvalue
@@ -354,6 +445,7 @@ class tclish_object_registry():
 		self.objects[instance["id"]]=instance
 		if instance_name is not None:
 			self.named_objects[instance_name]=instance["id"]
+			vm.invalidate_dispatch(instance_name)
 		
 		return vm.ok(instance["id"])
 
@@ -445,6 +537,7 @@ class tclish_object_registry():
 						return vm.error(task,"helps need a helpstring","class helps")
 
 		self.classes[class_name]=prototype
+		self.compile_class(vm,class_name)
 		return vm.ok("")
 
 
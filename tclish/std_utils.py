@@ -23,7 +23,11 @@ def is_command_name(name):
 
 
 def is_async_function(func):
-	return inspect.iscoroutinefunction(func)
+	"""coroutine functions, and generators marked with types.coroutine, which are awaited the same way"""
+	if inspect.iscoroutinefunction(func):
+		return True
+	code=getattr(func,"__code__",None)
+	return code is not None and bool(code.co_flags & inspect.CO_ITERABLE_COROUTINE)
 
 async def call_async(f,*args,**kvargs):
 	if is_async_function(f):
@@ -75,33 +79,30 @@ def encode_char(s,pos):
 	e=s[pos+1].encode("unicode_escape")
 	return e
 
+escape_table = {ord(char): "\\"+char for char in special_chars}
+escape_table[ord("\\")] = "\\\\"
+
 def escape_string(s):
-	r=""
-	for char in s:
-		if char in special_chars:
-			r+="\\"+char
-		elif char=="\\":
-			r+="\\\\"
-		else:
-			r+=char
-	return r
+	return s.translate(escape_table)
 
 def unescape_string(s):
 	if False:
 		return s.encode().decode("unicode_escape")
+	if "\\" not in s:
+		return s
 	pos=0
-	r=""
+	r=[]
 	while pos<len(s):
 		if s[pos]=="\\":
 			l=escape_length(s,pos)
 			#print(s[pos:pos+l])
 			if l==1:
 				if s[pos+1] in escapes_chars:
-					r+=escapes_chars[s[pos+1]]
+					r.append(escapes_chars[s[pos+1]])
 				else:
-					r+=s[pos+1]
+					r.append(s[pos+1])
 			else:
-				r+=s[pos:pos+l+1].encode("utf-8").decode("unicode_escape")
+				r.append(s[pos:pos+l+1].encode("utf-8").decode("unicode_escape"))
 			pos+=l+1
 			# if pos+2<len(s) and (s[pos+1] in hex_set) and (s[pos+1] in hex_set):
 			# 	r+=chr(int(s[pos+1:pos+3],16))
@@ -113,9 +114,12 @@ def unescape_string(s):
 			# 	r+="\\"
 			# 	pos+=1
 		else:
-			r+=s[pos]
-			pos+=1
-	return r
+			start=pos
+			pos=s.find("\\",pos)
+			if pos<0:
+				pos=len(s)
+			r.append(s[start:pos])
+	return "".join(r)
 
 def skip_whitespace(s, pos):
 	newline = False
@@ -351,51 +355,67 @@ async def clean_strings(vm, task, s, e=None):
 	return await f(vm, task, s, e)
 
 
-def pack_strings(self,strings):
-	r="{"
-	for s in strings:
-		r+="'"+escape_string(s)+"'"
-	return r+"}"
+def to_text(value):
+	"""the text of a value, see values.py"""
+	if type(value) is str:
+		return value
+	return str(value)
 
-def split_string_internal(self,s):
-	pos,newline=skip_whitespace(s,0)
+def pack_strings(self,strings):
+	return "{"+"".join(["'"+escape_string(to_text(s))+"'" for s in strings])+"}"
+
+def split_string_internal(self,s,pos=0):
+	"""
+	the next list item of s at or after pos.
+	returns success, the item's start and its end.
+	"""
+	pos,newline=skip_whitespace(s,pos)
+	if pos<len(s) and s[pos]=="'":
+		# the common case, a quoted item without escapes
+		endpos=s.find("'",pos+1)
+		if endpos>=0 and s.find("\\",pos+1,endpos)<0:
+			return True,pos,endpos+1
 	success, endpos = skip_string(self, s, pos)
 	if not success:
-		return False, endpos, None
+		return False, pos, endpos
 
 	if endpos==pos:
 		#force a minimum length of 1
 		endpos+=1
 
-	substr = s[pos:endpos]
-	reststr = s[endpos:]
-
-	return True, substr,reststr
+	return True,pos,endpos
 
 def unpack_strings(self, s):
+	if type(s) is not str:
+		# values that already know their items
+		return True,list(s.elements())
 	if s.startswith("{") and s.endswith("}"):
 		s=s[1:-1]
 
+	# walks s by index, slicing only the items themselves
 	strings=[]
+	pos=0
+	end=len(s)
 
-	while len(s)>1:
-		ok,substr,temp_s=split_string_internal(self,s)
-		#print(f"[{ok}|{substr}|{temp_s}]")
-		if ok:
-			s=temp_s
-			if substr.startswith("'") and substr.endswith("'"):
-				substr=unescape_string(substr[1:-1])
-			#ok,substr=clean_strings(self,substr,e=lambda _,s:s)
-			strings.append(substr)
-		else:
+	while end-pos>1:
+		ok,start,endpos=split_string_internal(self,s,pos)
+		if not ok:
 			break
-	if len(s)>0:
-		strings.append(s)
+		pos=endpos
+		substr=s[start:endpos]
+		if substr.startswith("'") and substr.endswith("'"):
+			substr=unescape_string(substr[1:-1])
+		strings.append(substr)
+	if pos<end:
+		strings.append(s[pos:])
 	return True,strings
 
 
 
 def to_number(s):
+	if s.__class__ is not str and hasattr(s,"as_number"):
+		# value objects, numbers from math commands skip the parsing
+		return s.as_number()
 	try:
 		return int(s)
 	except ValueError:
@@ -410,6 +430,10 @@ def to_number(s):
 		pass
 	return None
 def to_integer(s):
+	if s.__class__ is not str and hasattr(s,"as_number"):
+		s=s.as_number()
+		if s is None:
+			return None
 	try:
 		return int(s)
 	except ValueError:
@@ -3,6 +3,8 @@
 ##=================================================================##
 import random
 from .std_utils import *
+from .values import Tclish_list,Tclish_range,list_value,list_items
+from .stdlib_concurrency import channel_of,foreach_channel
 
 def choose_async(switch,async_f,f):
     if switch:
@@ -24,40 +26,32 @@ def vmputs(vm,task,args):
     return vm.ok("")
 
 def vmlist(vm,task,args):
-    return vm.ok(pack_strings(vm,args))
+    return vm.ok(Tclish_list(args))
 
 def vmtake(vm,task,args):
     if len(args)<2:
         return vm.error(task,"take require a list and a number","take")
-    ok,l=vm.unpack_strings(args[0])
-    if not ok:
-        return vm.error(task,"error unpacking list","take")
-    n=to_number(args[1])
+    l=list_value(args[0])
+    n=to_number(to_text(args[1]))
     if n is None:
         return vm.error(task,f"take require a valid number, {args[1]} is not a valid number.","take")
-    res=[getl(l,i,"") for i in range(0,n)]
-    return vm.ok(vm.pack_strings(res))
+    res=[l.index(i) for i in range(0,n)]
+    return vm.ok(Tclish_list(res))
 
 
 def vmlindex(vm,task,args):
     if len(args)<2:
         return vm.error(task,"lindex require a list and a number","lindex")
-    ok,l=vm.unpack_strings(args[0])
-    n=to_number(args[1])
-    if not ok:
-        return vm.error(task,"error unpacking list","lindex")
+    l=list_value(args[0])
+    n=to_number(to_text(args[1]))
     if n is None:
         return vm.error(task,f"lindex require a valid number, {args[1]} is not a valid number.","lindex")
-    return vm.ok(getl(l,n-1,""))
+    return vm.ok(l.index(n-1))
 
 def vmlcount(vm,task,args):
     if len(args)<1:
         return vm.error(task,"lcount require a list","lcount")
-    ok,l=vm.unpack_strings(args[0])
-    if not ok:
-        return vm.error(task,"error unpacking list","lindex")
-    n=len(l)
-    return vm.ok(to_string(n))
+    return vm.ok(to_string(list_value(args[0]).length))
 # {
 #     proc lcount {l} {
 #         eval "args count" {*} l
@@ -69,24 +63,18 @@ def vmljoin(vm,task,args):
         return vm.error(task,"expected list")
     l=args[0]
     if len(args)>1:
-        sep=args[1]
+        sep=to_text(args[1])
     else:
         sep=""
     ok,l=vm.unpack_strings(l)
     if not ok:
         return vm.error(task,l)
-    return vm.ok(sep.join(l))
+    return vm.ok(sep.join([to_text(item) for item in l]))
 
 def vmlappend(vm,task,args):
     if len(args)<1:
         return vm.error(task,"expected list")
-    l=args[0]
-    ok,l=vm.unpack_strings(l)
-    if not ok:
-        return vm.error(task,l,"lappend")
-    for item in args[1:]:
-        l.append(item)
-    return vm.ok(vm.pack_strings(l))
+    return vm.ok(list_value(args[0]).append(args[1:]))
 
 def vmlzip(vm,task,args):
     everything=[]
@@ -103,7 +91,7 @@ def vmlzip(vm,task,args):
         for l in everything:
             output.append(getl(l,i,""))
 
-    return vm.ok(vm.pack_strings(output))
+    return vm.ok(Tclish_list(output))
 
 def vmlzipmin(vm,task,args):
     everything=[]
@@ -123,25 +111,7 @@ def vmlzipmin(vm,task,args):
         for l in everything:
             output.append(getl(l,i,""))
 
-    return vm.ok(vm.pack_strings(output))
-
-async def vmgather(vm,task,args):
-    ok,expected=vm.unpack_strings(args[0])
-    
-    pos=1
-    def done():
-        return pos>=len(args)
-    def consume():
-        nonlocal pos
-        r=getl(args,pos,"")
-        pos+=1
-        return r
-
-    data={}
-    while not done():
-        pass
-
-
+    return vm.ok(Tclish_list(output))
 
 async def vmtry(vm,task,args):
     if len(args)<1:
@@ -204,7 +174,7 @@ async def vmforeach_new(vm,task,args):
         return pos>=len(args)
 
     #for
-    packed_names=consume()
+    packed_names=to_text(consume())
     #print(f"packed_names : {packed_names}")
     keyword=consume()
     #print(f"keyword : {keyword}")
@@ -213,7 +183,7 @@ async def vmforeach_new(vm,task,args):
     
     body=consume()
 
-    if keyword.lower() != "in":
+    if type(keyword) is not str or keyword.lower() != "in":
         #keyword not present
         input_list,body=keyword,input_list
     
@@ -224,24 +194,24 @@ async def vmforeach_new(vm,task,args):
     if len(names)<1:
         return vm.error(task,f"'{packed_names}' does not contain at least one name","range")
 
-    ok,variable_list=vm.unpack_strings(input_list)
-    if not ok:
-        return vm.error(task,f"{input_list} is an invalid list of strings","range")
+    channel=channel_of(vm,input_list)
+    if channel is not None:
+        return await foreach_channel(vm,task,names,channel,body)
 
+    variable_list=list_items(input_list)
+    first_name=names[0]
+    other_names=names[1:]
 
-    pos_I=0
-    def consume_I():
-        nonlocal pos_I
-        r=getl(variable_list,pos_I,"")
-        pos_I+=1
-        return r
-    def done_I():
-        return pos_I>=len(variable_list)
     result=""
-    while not done_I():
-        for name in names:
-            task.set_value(name,consume_I())
+    for item in variable_list:
+        task.set_value(first_name,item)
+        for name in other_names:
+            task.set_value(name,next(variable_list,""))
         ok,res=await vm.simple_eval(task,body)
+        if vm.is_break(ok):
+            break
+        if vm.is_continue(ok):
+            continue
         if vm.is_abort(ok):
             return ok,res
         if vm.is_error(res):
@@ -255,21 +225,22 @@ async def vmforeach_new(vm,task,args):
 async def vmforeach(vm,task,args):
     if len(args)<3:
         return vm.error(task,"expected name, list and code")
-    name=args[0]
+    name=to_text(args[0])
     l=args[1]
     code=args[2]
     #print(f"{name}|{l}|{code}")
-    ok,l=unpack_strings(vm,l)
-    if not ok:
-        return vm.error(task,l)
     # if len(l)<1:
     #     return vm.error(task,"one or more name must be provided","foreach")
     result=""
-    for i,elem in enumerate(l):
+    for i,elem in enumerate(list_items(l)):
         task.set_value(name,elem)
         task.set_value("i",str(i))
         task.set_value("ans",result)
         ok,res=await vm.simple_eval(task,code)
+        if vm.is_break(ok):
+            break
+        if vm.is_continue(ok):
+            continue
         if vm.is_abort(ok):
             return ok,res
         result=res
@@ -280,29 +251,23 @@ async def vmlmap(vm,task,args):
         return vm.error(task,"expected list and code")
     l=args[0]
     code=args[1]
-    ok,l=unpack_strings(vm,l)
-    if not ok:
-        return vm.error(task,l)
     result=[]
     res=""
-    for i,elem in enumerate(l):
+    for i,elem in enumerate(list_items(l)):
         ok,res=await vm.do_codebody(task,code,args=[elem,str(i),res])
         if vm.is_abort(ok):
             return ok,res
         result.append(res)
     
-    return vm.ok(pack_strings(vm,result))
+    return vm.ok(Tclish_list(result))
 
 async def vmlreduce(vm,task,args):
     if len(args)<2:
         return vm.error(task,"expected list and code")
     l=args[0]
     code=args[1]
-    ok,l=unpack_strings(vm,l)
-    if not ok:
-        return vm.error(task,l)
     result=getl(args,2,"")
-    for i,elem in enumerate(l):
+    for i,elem in enumerate(list_items(l)):
         ok,res=await vm.do_codebody(task,code,args=[elem,str(i),result])
         if vm.is_abort(ok):
             return ok,res
@@ -314,18 +279,15 @@ async def vmlfilter(vm,task, args):
         return vm.error(task,"expected list and code")
     l = args[0]
     code = args[1]
-    ok, l = unpack_strings(vm, l)
-    if not ok:
-        return vm.error(task,l)
     result = []
     res=""
-    for i, elem in enumerate(l):
+    for i, elem in enumerate(list_items(l)):
         ok, res = await vm.do_codebody(task,code, args=[elem, str(i),res])
         if not ok:
             return ok, res
-        if istrue(res):
+        if is_true(res):
             result.append(elem)
-    return vm.ok(pack_strings(vm, result))
+    return vm.ok(Tclish_list(result))
 
 def vmproc(vm,task,args):
     #lambda vm,a:vm.state.add_definition(getl(a,0,""),getl(a,1,""),getl(a,2,""))
@@ -391,7 +353,11 @@ def vmrange(vm,task,args):
     else:
         return vm.error(task,"please specify a range","range")
 
-    return vm.ok(vm.pack_strings([str(n) for n in range(start,stop,step)]))
+    if not all(type(n) is int for n in (start,stop,step)):
+        return vm.error(task,"start, step and stop must be integers","range")
+    if step==0:
+        return vm.error(task,"step can't be 0","range")
+    return vm.ok(Tclish_range(range(start,stop,step)))
 
 def add_stdcommon(registry):
     registry.add("choose",vmchoose,"""usage:
@@ -411,7 +377,10 @@ Returns a list of number in the specified range.
 (2) returns a list from start to stop
 (3) returns a list of every <step> number from <start> to <stop>
 
-""")
+the numbers are only listed when the text is needed,
+foreach, for, lmap, lreduce, lfilter, lcount and lindex work on the range directly.
+""",
+    values=True)
     registry.add("proc",vmproc,"""usage:
   proc <name> <arguments> <body> [<helpstring>]
 
@@ -482,7 +451,7 @@ Creates a list containing the specified elements.
 
 Example:
   set myList [list 1 2 3 4]
-""")
+""",values=True,pure=True)
     registry.add("take",vmtake,"""Usage:
   take <list> <count>
 
@@ -492,7 +461,7 @@ Example:
   take [list 1 2 3] 2
 returns:
   [list 1 2]
-""")
+""",values=True,pure=True)
     registry.add("lindex",vmlindex,"""Usage:
   take <list> <index>
 
@@ -502,7 +471,7 @@ Example:
   lindex [list 1 2 3] 2
 returns:
   2
-""")
+""",values=True,pure=True)
     registry.add("lcount",vmlcount,"""Usage:
   lcount <list>
 
@@ -512,7 +481,7 @@ Example:
   lcount [list a b c]
 returns:
   3
-""")
+""",values=True,pure=True)
     registry.add("ljoin",vmljoin,"""Usage:
   ljoin <list> [<sep>]
 
@@ -520,7 +489,7 @@ Concatenates all the values in <list>, optinally separated by <sep>
 
 Example:
   set result [ljoin $list1 $list2]
-""")
+""",values=True,pure=True)
     registry.add("lappend",vmlappend,"""Usage:
   lappend <list> <items>...
 
@@ -528,7 +497,7 @@ Append <items> onto <list>
 
 Example:
   lappend [list a b c] d e f
-""")
+""",values=True,pure=True)
     registry.add("lzip",vmlzip,"""Usage:
   lzip <lists>...
 
@@ -540,7 +509,7 @@ Example:
   lzip [list 1 2 3] [list a b c d]
 Returns:
   [list 1 a 2 b 3 c "" d]
-""")
+""",values=True,pure=True)
     registry.add("lzipmax",vmlzip,"""Usage:
   lzipmax <lists>...
 
@@ -553,7 +522,7 @@ Example:
   lzipmax [list 1 2 3] [list a b c d]
 Returns:
   [list 1 a 2 b 3 c "" d]
-""")
+""",values=True,pure=True)
     registry.add("lzipmin",vmlzipmin,"""Usage:
   lzipmin <lists>...
 
@@ -565,7 +534,7 @@ Example:
   lzipmin [list 1 2 3] [list a b c d]
 Returns:
   [list 1 a 2 b 3 c]
-""")
+""",values=True,pure=True)
     registry.add("lmap",vmlmap,"""Usage:
   lmap <list> <script>
 
@@ -576,7 +545,7 @@ Example:
     args map item intex prev-item
     * $item $item
   }}]
-""")
+""",values=True)
     registry.add("lreduce",vmlreduce,"""Usage:
   lreduce <list> <script> [<initial_value>]
 
@@ -587,7 +556,7 @@ Example:
     args map item position accumulator
     + $accumulator $item
   }} 0]
-""")
+""",values=True)
     registry.add("lfilter",vmlfilter,"""Usage:
   lfilter <list> <script>
 
@@ -598,7 +567,7 @@ Example:
     args item pos prev-item
     % $item 2 == 0
   }}]
-""")
+""",values=True)
 
     registry.add("for",vmforeach,"""Usage:
   for <variable> <list> <script>
@@ -611,16 +580,18 @@ Example:
   foreach i $numbers {
     print "Current value of \$i: $i"
   }
-""")
+""",values=True)
     registry.add("foreach",vmforeach_new,"""Usage:
   foreach <var-names> [in] <list> <script>
 
 Iterates over elements in a list, assigning each element to the variable and executing the script.
 Execution happens in the current scope and can be shorted with the return command
 
+<list> may be a channel, see chan, values are then taken from it until it is closed and empty.
+
 Example:
   set numbers { a 1 b 2 c 3 d 4}
   foreach {letter number} $numbers {
     print "Current value of $letter: $number"
   }
-""")
+""",values=True)
@@ -0,0 +1,286 @@
+##=================================================================##
+##  CONCURRENCY                                                    ##
+##=================================================================##
+# spawn runs a body in a Tclish_task of its own, scheduled as an asyncio task
+# next to the one that spawned it. the handle it returns names the asyncio task
+# in vm.spawned until await or gather collects its result.
+# at most unclaimed_limit finished tasks wait there to be collected, past that
+# the oldest are forgotten and their errors reported like those of events.
+# tasks pass values to each other through channels, bounded queues a producer
+# waits on while they are full.
+import asyncio
+from .std_utils import *
+from .values import Tclish_value,Tclish_list
+
+
+unclaimed_limit=1024
+
+async def run_spawned(vm,child,body,args):
+    try:
+        return await vm.eval(child,body,args=args)
+    except Exception as e:
+        return vm.error(child,f"{type(e).__name__}: {e}","spawn")
+
+def spawn_finished(vm,handle,child,body,args,future):
+    """done callback of a spawned task, keeps it for await and gather unless too many are waiting"""
+    if handle not in vm.spawned or future.cancelled():
+        return
+    vm.unclaimed[handle]=(child,body,args)
+    while len(vm.unclaimed)>unclaimed_limit:
+        oldest=next(iter(vm.unclaimed))
+        child,body,args=vm.unclaimed.pop(oldest)
+        ok,res=vm.spawned.pop(oldest).result()
+        if vm.is_error(ok):
+            # nothing will await it anymore
+            vm.push_event(child,0,"on-event-error",args=[body,res]+args)
+
+def vmspawn(vm,task,args):
+    # the task class lives in the interpreter module, which imports this one
+    from .tclish_interpreter import Tclish_task
+    if len(args)<1:
+        return vm.error(task,"expected a body","spawn")
+    body=to_text(args[0])
+    child=Tclish_task(body)
+    # the child sees the handles of its parent, self in a method among them
+    child.handles=dict(task.handles)
+    vm.spawn_count+=1
+    handle=f"task{vm.spawn_count}"
+    args=list(args[1:])
+    future=vm.spawned[handle]=asyncio.ensure_future(run_spawned(vm,child,body,args))
+    future.add_done_callback(lambda future:spawn_finished(vm,handle,child,body,args,future))
+    return vm.ok(handle)
+
+async def collect(vm,task,handle,label):
+    """wait for the spawned task handle and forget it, its error is wrapped in one of label"""
+    handle=to_text(handle)
+    future=vm.spawned.pop(handle,None)
+    vm.unclaimed.pop(handle,None)
+    if future is None:
+        return vm.error(task,f"{handle} is not a spawned task, or was already collected",label)
+    ok,res=await future
+    if vm.is_error(ok):
+        return vm.error(task,f"{handle} failed",label,cause=res)
+    return vm.ok(res)
+
+async def vmawait(vm,task,args):
+    if len(args)<1:
+        return vm.error(task,"expected a task handle","await")
+    return await collect(vm,task,args[0],"await")
+
+async def vmgather(vm,task,args):
+    # the tasks already run side by side, waiting for them one after the other takes as long as the slowest
+    results=[]
+    error=None
+    for handle in args:
+        ok,res=await collect(vm,task,handle,"gather")
+        if vm.is_error(ok):
+            # the others are still collected, so none is left behind in vm.spawned
+            if error is None:
+                error=(ok,res)
+            continue
+        results.append(res)
+    if error is not None:
+        return error
+    return vm.ok(Tclish_list(results))
+
+async def vmsleep(vm,task,args):
+    seconds=to_number(getl(args,0,"0"))
+    if seconds is None or seconds<0:
+        return vm.error(task,f"{args[0]} is not a valid number of seconds","sleep")
+    await asyncio.sleep(seconds)
+    return vm.ok("")
+
+
+##=================================================================##
+##  CHANNELS                                                       ##
+##=================================================================##
+
+# left in the queue of a closed channel, wakes the tasks waiting on get
+closed_marker=object()
+
+class Tclish_channel(Tclish_value):
+    """
+    an asyncio queue between tasks, renders to its handle.
+    put waits while capacity values are queued, 0 means unbounded.
+    """
+    __slots__=("name","queue","closed","marked")
+
+    def __init__(self,name,capacity):
+        self.name=name
+        self.queue=asyncio.Queue(capacity)
+        self.closed=False
+        # closed_marker is in the queue, and nothing else
+        self.marked=False
+        self.text=name
+
+    def render(self):
+        return self.name
+
+    async def put(self,value):
+        await self.queue.put(value)
+
+    async def get(self):
+        """True and the next value, or False and None once the channel is closed and drained"""
+        queue=self.queue
+        if self.closed and queue.empty():
+            return False,None
+        value=await queue.get()
+        if value is closed_marker:
+            # for the next task waiting on it
+            queue.put_nowait(closed_marker)
+            return False,None
+        return True,value
+
+    def close(self):
+        self.closed=True
+        if self.queue.empty():
+            # getters only wait on an empty queue
+            self.queue.put_nowait(closed_marker)
+            self.marked=True
+
+    def drained(self):
+        """closed with no value left to take"""
+        return self.closed and (self.marked or self.queue.empty())
+
+def forget_drained(vm,channel):
+    """drop a channel nothing can go through anymore from vm.channels"""
+    if channel.drained():
+        vm.channels.pop(channel.name,None)
+
+def channel_of(vm,value):
+    """the channel value is, or names, None if it isn't one"""
+    if type(value) is Tclish_channel:
+        return value
+    if value.__class__ is str:
+        return vm.channels.get(value)
+    return None
+
+async def foreach_channel(vm,task,names,channel,body):
+    """foreach over a channel, it ends when the channel is closed and drained"""
+    result=""
+    while True:
+        ok,item=await channel.get()
+        if not ok:
+            forget_drained(vm,channel)
+            break
+        task.set_value(names[0],item)
+        for name in names[1:]:
+            ok,item=await channel.get()
+            task.set_value(name,item if ok else "")
+        ok,res=await vm.simple_eval(task,body)
+        if vm.is_break(ok):
+            break
+        if vm.is_continue(ok):
+            continue
+        if vm.is_abort(ok):
+            return ok,res
+        result=res
+    return vm.ok(result)
+
+async def vmchan(vm,task,args):
+    directive=to_text(getl(args,0,"")).lower()
+    if directive=="create":
+        capacity=to_integer(getl(args,1,"0"))
+        if capacity is None or capacity<0:
+            return vm.error(task,f"{args[1]} is not a valid capacity","chan create")
+        vm.channel_count+=1
+        channel=Tclish_channel(f"chan{vm.channel_count}",capacity)
+        vm.channels[channel.name]=channel
+        return vm.ok(channel)
+    if directive not in ("put","get","close"):
+        return vm.error(task,f"unknown directive {directive}, expected create, put, get or close","chan")
+    if len(args)<2:
+        return vm.error(task,"expected a channel",f"chan {directive}")
+    channel=channel_of(vm,args[1])
+    if channel is None:
+        return vm.error(task,f"{args[1]} is not a channel",f"chan {directive}")
+    if directive=="put":
+        if channel.closed:
+            return vm.error(task,f"{channel.name} is closed","chan put")
+        for value in args[2:]:
+            await channel.put(value)
+            if channel.closed:
+                # closed while the put waited for room, the values after it are dropped
+                return vm.error(task,f"{channel.name} was closed while putting","chan put")
+        return vm.ok("")
+    if directive=="get":
+        ok,value=await channel.get()
+        forget_drained(vm,channel)
+        if not ok:
+            return vm.error(task,f"{channel.name} is closed","chan get")
+        return vm.ok(value)
+    channel.close()
+    forget_drained(vm,channel)
+    return vm.ok("")
+
+
+def add_stdconcurrency(registry):
+    registry.add("spawn",vmspawn,"""Usage:
+  spawn <body> [<args>...]
+
+Starts evaluating <body> with <args> in a task of its own and returns a handle for it right away.
+The body runs whenever the spawning task waits, on await, gather, sleep or any other command that suspends.
+It has its own variables and sees the handles of the spawning task, like self in a method.
+Collect the result with await or gather.
+At most 1024 finished tasks wait to be collected, past that the oldest are forgotten,
+the error of a forgotten task that failed goes to on-event-error like the error of an event.
+
+Example:
+  set a [spawn {
+    sleep 1
+    list a
+  }]
+  set b [spawn {
+    sleep 1
+    list b
+  }]
+  gather $a $b
+  # takes one second, not two
+""")
+    registry.add("await",vmawait,"""Usage:
+  await <handle>
+
+Waits for the task spawned as <handle> and returns the result of its body.
+If the body failed, await fails with its error.
+A handle can be collected once, by await or gather.
+""")
+    registry.add("gather",vmgather,"""Usage:
+  gather <handle>...
+
+Waits for all the spawned tasks and returns the list of their results, in the order of the handles.
+If any of them failed, gather fails with the error of the first failed one, after waiting for the others.
+""")
+    registry.add("sleep",vmsleep,"""Usage:
+  sleep <seconds>
+
+Suspends the task for <seconds>, letting spawned tasks and events run.
+""")
+    registry.add("chan",vmchan,"""Usage:
+(1) chan create [<capacity>]
+(2) chan put <channel> <value>...
+(3) chan get <channel>
+(4) chan close <channel>
+
+Channels pass values between spawned tasks, in the order they were put.
+
+(1) returns a new channel holding at most <capacity> values, 0 or none for no limit
+(2) adds the values, waiting while the channel is full, so a fast producer can't run ahead of a slow consumer.
+    fails if the channel is closed, or gets closed while it waits for room. the value it was waiting with still goes in
+(3) takes the oldest value, waiting while the channel is empty. fails once the channel is closed and every value was taken
+(4) closes the channel, nothing can be put anymore, the values in it can still be taken.
+    its handle stops naming it once they all were
+
+foreach takes values from a channel until it is closed and empty.
+
+Example:
+  set jobs [chan create 10]
+  set producer [spawn {
+    args map jobs
+    for n [range 100] {chan put $jobs $n}
+    chan close $jobs
+  } $jobs]
+  set total 0
+  foreach n $jobs {set total [+ $total $n]}
+  await $producer
+  get total
+""",values=True)
@@ -0,0 +1,349 @@
+##=================================================================##
+##  EXPR                                                           ##
+##=================================================================##
+# infix expressions, compiled once into nested python closures.
+# a compiled expression is a function of the task, it reads the
+# variables it needs when it runs and keeps everything else in python.
+import math
+import re
+
+from .std_utils import *
+from .values import Tclish_number
+
+
+class Tclish_expr_error(Exception):
+	"""raised while compiling or running an expression, turned into vm.error by expr"""
+
+
+token_pattern=re.compile(r"""\s*(?:
+	(?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?)
+	|\$\{(?P<braced>[^}]*)\}
+	|\$(?P<variable>[A-Za-z0-9_]+)
+	|"(?P<string>(?:[^"\\]|\\.)*)"
+	|(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+	|(?P<operator>\*\*|==|!=|<=|>=|&&|\|\||[-+*/%<>!()?:,])
+	)""",re.VERBOSE)
+
+def tokenize(s):
+	tokens=[]
+	pos=0
+	end=len(s.rstrip())
+	while pos<end:
+		match=token_pattern.match(s,pos)
+		if match is None or match.end()==pos:
+			raise Tclish_expr_error(f"unexpected character {s[pos:].strip()[:1]!r} in {s!r}")
+		kind=match.lastgroup
+		tokens.append((kind,match.group(kind)))
+		pos=match.end()
+	tokens.append(("end",None))
+	return tokens
+
+
+##=================================================================##
+##  RUNTIME HELPERS                                                ##
+##=================================================================##
+
+def number(value):
+	cls=value.__class__
+	if cls is int or cls is float:
+		return value
+	if cls is bool:
+		return int(value)
+	n=to_number(value)
+	if n is None:
+		raise Tclish_expr_error(f"expected a number but got {to_text(value)!r}")
+	return n
+
+def maybe_number(value):
+	cls=value.__class__
+	if cls is int or cls is float:
+		return value
+	if cls is bool:
+		return int(value)
+	return to_number(value)
+
+def truth(value):
+	"""empty strings and zero are false"""
+	cls=value.__class__
+	if cls is bool:
+		return value
+	if cls is int or cls is float:
+		return value!=0
+	if value=="":
+		return False
+	n=to_number(value)
+	return n is None or n!=0
+
+def text(value):
+	if value.__class__ is bool:
+		return "true" if value else ""
+	if value.__class__ is int or value.__class__ is float:
+		return to_string(value)
+	return to_text(value)
+
+def result(value):
+	"""python value to what the expr command returns"""
+	cls=value.__class__
+	if cls is bool:
+		return "true" if value else ""
+	if cls is int or cls is float:
+		return Tclish_number(value)
+	return value
+
+def divide(a,b):
+	if b==0:
+		raise Tclish_expr_error("division by zero")
+	return a/b
+
+def modulo(a,b):
+	if b==0:
+		raise Tclish_expr_error("division by zero")
+	return a%b
+
+def power(a,b):
+	try:
+		return a**b
+	except (OverflowError,ZeroDivisionError) as e:
+		raise Tclish_expr_error(str(e))
+
+def equals(a,b):
+	na,nb=maybe_number(a),maybe_number(b)
+	if na is not None and nb is not None:
+		return na==nb
+	return text(a)==text(b)
+
+def compare(a,b):
+	"""-1, 0 or 1, numerically when both sides are numbers, otherwise as text"""
+	na,nb=maybe_number(a),maybe_number(b)
+	if na is None or nb is None:
+		na,nb=text(a),text(b)
+	return (na>nb)-(na<nb)
+
+arithmetic={
+	"+":lambda a,b:a+b,
+	"-":lambda a,b:a-b,
+	"*":lambda a,b:a*b,
+	"/":divide,
+	"%":modulo,
+	"**":power,
+}
+
+comparisons={
+	"==":equals,
+	"!=":lambda a,b:not equals(a,b),
+	"<":lambda a,b:compare(a,b)<0,
+	"<=":lambda a,b:compare(a,b)<=0,
+	">":lambda a,b:compare(a,b)>0,
+	">=":lambda a,b:compare(a,b)>=0,
+}
+
+def checked_math(f):
+	def call(*args):
+		try:
+			return f(*args)
+		except (ValueError,OverflowError) as e:
+			raise Tclish_expr_error(str(e))
+	return call
+
+functions={
+	"abs":(1,1,abs),
+	"min":(1,None,min),
+	"max":(1,None,max),
+	"int":(1,1,checked_math(int)),
+	"double":(1,1,float),
+	"round":(1,1,checked_math(round)),
+	"floor":(1,1,checked_math(math.floor)),
+	"ceil":(1,1,checked_math(math.ceil)),
+	"sqrt":(1,1,checked_math(math.sqrt)),
+	"pow":(2,2,power),
+}
+
+# binding power of the binary operators, higher binds tighter
+binary_precedence={
+	"||":1,
+	"&&":2,
+	"==":3,"!=":3,
+	"<":4,"<=":4,">":4,">=":4,
+	"+":5,"-":5,
+	"*":6,"/":6,"%":6,
+	"**":8,
+}
+unary_precedence=7
+
+
+##=================================================================##
+##  COMPILER                                                       ##
+##=================================================================##
+# every node compiles to (closure,constant).
+# constant is True when the closure doesn't read variables,
+# those are folded into a single value at compile time.
+
+def constant(value):
+	return (lambda task:value),True
+
+def fold(node):
+	f,is_constant=node
+	if is_constant:
+		return constant(f(None))
+	return node
+
+class Tclish_expr_parser():
+	def __init__(self,vm,source):
+		self.vm=vm
+		self.source=source
+		self.tokens=tokenize(source)
+		self.pos=0
+
+	def peek(self):
+		return self.tokens[self.pos]
+
+	def next(self):
+		token=self.tokens[self.pos]
+		self.pos+=1
+		return token
+
+	def expect(self,value):
+		kind,got=self.next()
+		if got!=value:
+			raise Tclish_expr_error(f"expected {value!r} in {self.source!r}")
+
+	def parse(self):
+		node=self.ternary()
+		kind,value=self.peek()
+		if kind!="end":
+			raise Tclish_expr_error(f"unexpected {value!r} in {self.source!r}")
+		return fold(node)
+
+	def ternary(self):
+		condition=self.binary(0)
+		kind,value=self.peek()
+		if value!="?":
+			return condition
+		self.next()
+		when_true=self.ternary()
+		self.expect(":")
+		when_false=self.ternary()
+		(c,c_const),(t,t_const),(f,f_const)=condition,when_true,when_false
+		return fold(((lambda task:t(task) if truth(c(task)) else f(task)),c_const and t_const and f_const))
+
+	def binary(self,min_precedence):
+		left=self.unary()
+		while True:
+			kind,op=self.peek()
+			precedence=binary_precedence.get(op) if kind=="operator" else None
+			if precedence is None or precedence<=min_precedence:
+				return left
+			self.next()
+			# ** is right associative
+			right=self.binary(precedence-1 if op=="**" else precedence)
+			left=fold(self.combine(op,left,right))
+
+	def combine(self,op,left,right):
+		(l,l_const),(r,r_const)=left,right
+		is_constant=l_const and r_const
+		if op=="&&":
+			return (lambda task:truth(l(task)) and truth(r(task))),is_constant
+		if op=="||":
+			return (lambda task:truth(l(task)) or truth(r(task))),is_constant
+		if op in comparisons:
+			f=comparisons[op]
+			return (lambda task:f(l(task),r(task))),is_constant
+		f=arithmetic[op]
+		if r_const:
+			b=number(r(None))
+			return (lambda task:f(number(l(task)),b)),is_constant
+		return (lambda task:f(number(l(task)),number(r(task)))),is_constant
+
+	def unary(self):
+		kind,value=self.peek()
+		if kind=="operator" and value in ("-","+","!"):
+			self.next()
+			operand,is_constant=self.binary(unary_precedence)
+			if value=="-":
+				return fold(((lambda task:-number(operand(task))),is_constant))
+			if value=="+":
+				return fold(((lambda task:number(operand(task))),is_constant))
+			return fold(((lambda task:not truth(operand(task))),is_constant))
+		return self.primary()
+
+	def primary(self):
+		kind,value=self.next()
+		if kind=="number":
+			return constant(to_number(value))
+		if kind=="string":
+			return constant(unescape_string(value))
+		if kind=="variable" or kind=="braced":
+			return self.variable(value)
+		if kind=="name":
+			return self.call(value)
+		if value=="(":
+			node=self.ternary()
+			self.expect(")")
+			return node
+		if kind=="end":
+			raise Tclish_expr_error(f"unexpected end of {self.source!r}")
+		raise Tclish_expr_error(f"unexpected {value!r} in {self.source!r}")
+
+	def variable(self,name):
+		get_value=self.vm.get_value
+		def read(task):
+			value=get_value(name,task=task)
+			if value is None:
+				raise Tclish_expr_error(f"no such variable {name}")
+			return value
+		return read,False
+
+	def call(self,name):
+		if name not in functions:
+			raise Tclish_expr_error(f"unknown function {name} in {self.source!r}")
+		least,most,f=functions[name]
+		self.expect("(")
+		args=[]
+		kind,value=self.peek()
+		if value!=")":
+			args.append(self.ternary())
+			while self.peek()[1]==",":
+				self.next()
+				args.append(self.ternary())
+		self.expect(")")
+		if len(args)<least or (most is not None and len(args)>most):
+			raise Tclish_expr_error(f"wrong number of arguments to {name}()")
+		closures=[arg for arg,is_constant in args]
+		is_constant=all(is_constant for arg,is_constant in args)
+		return fold(((lambda task:f(*[number(arg(task)) for arg in closures])),is_constant))
+
+def compile_expr(vm,source):
+	"""the closure for an expression, cached per expression text"""
+	closure=vm.expr_cache.get(source)
+	if closure is None:
+		closure,is_constant=Tclish_expr_parser(vm,source).parse()
+		vm.expr_cache.put(source,closure)
+	return closure
+
+
+def vmexpr(vm,task,args):
+	if len(args)<1:
+		return vm.error(task,"needs an expression","expr")
+	source=args[0] if len(args)==1 else " ".join(args)
+	try:
+		return vm.ok(result(compile_expr(vm,source)(task)))
+	except Tclish_expr_error as e:
+		return vm.error(task,str(e),"expr")
+
+expr_helpstring="""usage:
+  expr <expression>...
+
+evaluates an infix expression, the arguments are joined with spaces.
+brace the expression to have it compiled only once: expr {$a * $b + 1}
+
+operands:  numbers, "strings", $name, ${name}, (...)
+operators: ** then unary - + ! then * / % then + - then < <= > >= then == != then && then || then ?:
+functions: abs min max int double round floor ceil sqrt pow
+
+comparisons are numeric when both sides are numbers, otherwise they compare text.
+empty strings and zero are false, comparisons return true or an empty string.
+commands can't be called from inside an expression, substitute them outside the braces.
+"""
+
+def add_stdexpr(registry):
+	registry.add("expr",vmexpr,expr_helpstring)
@@ -1,4 +1,7 @@
+import math
+
 from .std_utils import *
+from .values import Tclish_number
 def vm_number_question(vm, task, args):
     """
     ["number?"]=function(self, args)
@@ -120,16 +123,16 @@ def vm_le(vm,task, args):
 
     nPrev = to_number(args[0])
     if nPrev is None:
-        return vm.error(task,"all arguments must be numbers, first is not", "<")
+        return vm.error(task,"all arguments must be numbers, first is not", "<=")
 
     for i in range(1, len(args)):
         n = to_number(args[i])
         if n is None:
             return vm.error(task,
-                f"all arguments must be numbers, arg {i+1} is not", "<"
+                f"all arguments must be numbers, arg {i+1} is not", "<="
             )
 
-        sorted = sorted and (nPrev < n)
+        sorted = sorted and (nPrev <= n)
         nPrev = n
 
         if not sorted:
@@ -148,16 +151,16 @@ def vm_lt(vm,task, args):
 
     nPrev = to_number(args[0])
     if nPrev is None:
-        return vm.error(task,"all arguments must be numbers, first is not", "<=")
+        return vm.error(task,"all arguments must be numbers, first is not", "<")
 
     for i in range(1, len(args)):
         n = to_number(args[i])
         if n is None:
             return vm.error(task,
-                f"all arguments must be numbers, arg {i+1} is not", "<="
+                f"all arguments must be numbers, arg {i+1} is not", "<"
             )
 
-        sorted = sorted and (nPrev <= n)
+        sorted = sorted and (nPrev < n)
         nPrev = n
 
         if not sorted:
@@ -209,8 +212,8 @@ def vm_round(vm,task, args):
     if n is None:
         return vm.error(task,"Invalid input, must be a number", "round")
     if isinstance(n,float):
-        return vm.ok(to_string(round(rounded_value)))
-    return vm.ok(to_string(n))
+        return vm.ok(Tclish_number(round(n)))
+    return vm.ok(Tclish_number(n))
 
 def vm_and(vm,task, args):
     """
@@ -241,7 +244,7 @@ def vm_add(vm,task, args):
         if n is not None:
             total_sum += n
 
-    return vm.ok(to_string(total_sum))
+    return vm.ok(Tclish_number(total_sum))
 
 def vm_multiply(vm,task, args):
     """
@@ -254,7 +257,7 @@ def vm_multiply(vm,task, args):
         if n is not None:
             total_product *= n
 
-    return vm.ok(to_string(total_product))
+    return vm.ok(Tclish_number(total_product))
 
 def vm_divide(vm,task, args):
     """
@@ -273,7 +276,7 @@ def vm_divide(vm,task, args):
         if n is not None:
             first_number /= n
 
-    return vm.ok(to_string(first_number))
+    return vm.ok(Tclish_number(first_number))
 
 def vm_subtract(vm, task, args):
     """
@@ -289,7 +292,7 @@ def vm_subtract(vm, task, args):
         return vm.error(task,"cannot negate non-numbers","-")
 
     if len(args) == 1:
-        return vm.ok(to_string(-n))
+        return vm.ok(Tclish_number(-n))
 
     first_number = n
     for value in args[1:]:
@@ -297,7 +300,7 @@ def vm_subtract(vm, task, args):
         if n is not None:
             first_number -= n
 
-    return vm.ok(to_string(first_number))
+    return vm.ok(Tclish_number(first_number))
 
 def vm_modulo(vm,task, args):
     """
@@ -316,7 +319,7 @@ def vm_modulo(vm,task, args):
     if b is None:
         return vm.error(task,"b must be a number", "%")
 
-    return vm.ok(to_string(a % b))
+    return vm.ok(Tclish_number(a % b))
 
 def vm_floor(vm,task, args):
     """
@@ -334,8 +337,8 @@ def vm_floor(vm,task, args):
     if n is None:
         return vm.error(task,"Invalid input, must be a number", "floor")
     if isinstance(n,float):
-        return vm.ok(to_string(math.floor(n)))
-    return vm.ok(to_string(n))
+        return vm.ok(Tclish_number(math.floor(n)))
+    return vm.ok(Tclish_number(n))
 
 def vm_ceil(vm,task, args):
     """
@@ -352,8 +355,8 @@ def vm_ceil(vm,task, args):
     if n is None:
         return vm.error(task,"Invalid input, must be a number", "ceil")
     if isinstance(n,float):
-        return vm.ok(to_string(math.ceil(n)))
-    return vm.ok(to_string(n))
+        return vm.ok(Tclish_number(math.ceil(n)))
+    return vm.ok(Tclish_number(n))
 
 
 def add_stdmath(registry):
@@ -364,7 +367,9 @@ def add_stdmath(registry):
   floor <a>
 
 truncates the number.
-throws an error if <a> is a non-number""")
+throws an error if <a> is a non-number""",
+        values=True,
+        pure=True)
     registry.add(
         "ceil",
         vm_ceil,
@@ -372,14 +377,18 @@ throws an error if <a> is a non-number""")
   ceil <a>
 
 truncates the number.
-throws an error if <a> is a non-number""")
+throws an error if <a> is a non-number""",
+        values=True,
+        pure=True)
     registry.add(
         "number?",
         vm_number_question,
     """usage:
   number? <value>
 
-returns true if <value> is a valid number""")
+returns true if <value> is a valid number""",
+        values=True,
+        pure=True)
     registry.add(
         "integer?",
         vm_integer_question,
@@ -388,7 +397,9 @@ returns true if <value> is a valid number""")
       integer? <value>
     
     returns true if <value> is a valid integer
-    """)
+    """,
+        values=True,
+        pure=True)
     registry.add(
         ">",
         vm_gt,
@@ -396,7 +407,9 @@ returns true if <value> is a valid number""")
   > a b
 
 take two numbers and returns true if a is larger than b
-throws an error if either is not a valid number""")
+throws an error if either is not a valid number""",
+        values=True,
+        pure=True)
     registry.add(
         ">=",
         vm_gte,
@@ -404,7 +417,9 @@ throws an error if either is not a valid number""")
   >= a b
 
 take two numbers and returns true if a is larger or equal to b
-throws error if either is not a valid number""")
+throws error if either is not a valid number""",
+        values=True,
+        pure=True)
     registry.add(
         "==",
         vm_eq,
@@ -412,7 +427,8 @@ throws error if either is not a valid number""")
   == a b
 
 take two numbers and returns true if a is equal to b
-throws error if either is not a valid number""")
+throws error if either is not a valid number""",
+        pure=True)
     registry.add(
         "<=",
         vm_le,
@@ -420,7 +436,9 @@ throws error if either is not a valid number""")
   <= <nums...>
 
 take two numbers and returns true if a is less than or equal to b
-throws error if either is not a valid number""")
+throws error if either is not a valid number""",
+        values=True,
+        pure=True)
     registry.add(
         "<",
         vm_lt,
@@ -428,28 +446,33 @@ throws error if either is not a valid number""")
   < a b
 
 take two numbers and returns true if a is smaller than b
-throws error if either is not a valid number""")
+throws error if either is not a valid number""",
+        values=True,
+        pure=True)
     registry.add(
         "=",
         vm_eq,
     """usage:
   = a b
 
-take two or more strings and return true if they are all equal""")
+take two or more strings and return true if they are all equal""",
+        pure=True)
     registry.add(
         "!=",
         vm_neq,
     """usage:
   != <strs...>
 
-returns true if none of the provided strings are equal""")
+returns true if none of the provided strings are equal""",
+        pure=True)
     registry.add(
         "!",
         vm_not,
     """usage:
   ! <value>
 
-returns true if input is false (empty string)""")
+returns true if input is false (empty string)""",
+        pure=True)
     registry.add(
         "round",
         vm_round,
@@ -457,21 +480,27 @@ returns true if input is false (empty string)""")
   round <value>
 
 rounds the given input to the nearest integer
-non-number are considered 0""")
+non-number are considered 0""",
+        values=True,
+        pure=True)
     registry.add(
         "and",
         vm_and,
     """usage:
   and <values>...
 
-returns true if all given arguments are true (non-empty strings)""")
+returns true if all given arguments are true (non-empty strings)
+every argument is substituted before the call, see && for one that stops at the first false condition""",
+        pure=True)
     registry.add(
         "or",
         vm_or,
     """usage:
   or <values>...
 
-returns true if at least one given argument is true (non-empty strings)""")
+returns true if at least one given argument is true (non-empty strings)
+every argument is substituted before the call, see || for one that stops at the first true condition""",
+        pure=True)
     registry.add(
         "+",
         vm_add,
@@ -479,7 +508,9 @@ returns true if at least one given argument is true (non-empty strings)""")
   + <values>...
 
 returns a sum of all the inputs
-non-numbers are ignored""")
+non-numbers are ignored""",
+        values=True,
+        pure=True)
     registry.add(
         "*",
         vm_multiply,
@@ -487,7 +518,9 @@ non-numbers are ignored""")
   * <values>...
 
 returns a product of all the inputs
-non-numbers are ignored""")
+non-numbers are ignored""",
+        values=True,
+        pure=True)
     registry.add(
         "/",
         vm_divide,
@@ -496,7 +529,9 @@ non-numbers are ignored""")
 
 returns the first number divided by the subsequent valid numbers
 throws an error if the first number is invalid
-subsequent non-numbers are ignored""")
+subsequent non-numbers are ignored""",
+        values=True,
+        pure=True)
     registry.add(
         "-",
         vm_subtract,
@@ -507,7 +542,9 @@ subsequent non-numbers are ignored""")
 (1) negates the numeric value of the input.
 (2) subtracts the subsequent numbers from the first number.
 
-non numbers are treated as 0""")
+non numbers are treated as 0""",
+        values=True,
+        pure=True)
     registry.add(
         "%",
         vm_modulo,
@@ -515,5 +552,7 @@ non numbers are treated as 0""")
   % a b
 
 performs the modulo operation on the two given numbers.
-throws an error if either is a non-number""")
+throws an error if either is a non-number""",
+        values=True,
+        pure=True)
 
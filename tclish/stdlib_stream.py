@@ -0,0 +1,143 @@
+##=================================================================##
+##  STREAMS                                                        ##
+##=================================================================##
+# a stream runs a chain of map, filter, take and reduce stages over the
+# items of a list, a range or the keys of a db entry in a single pass.
+# every item goes through all stages before the next one is read,
+# so no stage builds the list it hands to the next one, and the keys
+# of a db entry are read from it one at a time.
+from .std_utils import *
+from .values import Tclish_list,list_items
+
+
+class Tclish_stream_stage():
+    """one stage of a stream, with the position and last result its script sees"""
+    __slots__=("kind","script","limit","index","last")
+
+    def __init__(self,kind,script="",limit=0,last=""):
+        self.kind=kind
+        self.script=script
+        self.limit=limit
+        self.index=0
+        self.last=last
+
+
+def stream_source(vm,task,args):
+    """the items named by the first two words of a stream"""
+    if len(args)<2:
+        return vm.error(task,"expected a source and its list or db fields","stream")
+    kind=to_text(args[0]).lower()
+    if kind=="from":
+        return vm.ok(list_items(args[1]))
+    if kind=="db":
+        ok,fields=unpack_strings(vm,to_text(args[1]))
+        if not ok:
+            return vm.error(task,f"{args[1]} is not a valid list of fields","stream")
+        return vm.ok(vm.db.iter_keys(fields))
+    return vm.error(task,f"unknown source {kind}, expected from or db","stream")
+
+def stream_stages(vm,task,args):
+    """the stages following the source, reduce can only be the last one"""
+    stages=[]
+    pos=2
+    while pos<len(args):
+        kind=to_text(args[pos]).lower()
+        if pos+1>=len(args):
+            return vm.error(task,f"{kind} needs an argument","stream")
+        if kind=="map" or kind=="filter":
+            stages.append(Tclish_stream_stage(kind,script=to_text(args[pos+1])))
+            pos+=2
+        elif kind=="take":
+            limit=to_integer(args[pos+1])
+            if limit is None:
+                return vm.error(task,f"{args[pos+1]} is not a valid number of items","stream")
+            stages.append(Tclish_stream_stage(kind,limit=limit))
+            pos+=2
+        elif kind=="reduce":
+            if pos+3<len(args):
+                return vm.error(task,"reduce has to be the last stage","stream")
+            stages.append(Tclish_stream_stage(kind,script=to_text(args[pos+1]),last=getl(args,pos+2,"")))
+            pos+=3
+        else:
+            return vm.error(task,f"unknown stage {kind}","stream")
+    return vm.ok(stages)
+
+async def vmstream(vm,task,args):
+    ok,items=stream_source(vm,task,args)
+    if vm.is_error(ok):
+        return ok,items
+    ok,stages=stream_stages(vm,task,args)
+    if vm.is_error(ok):
+        return ok,stages
+
+    reduce=stages[-1] if stages and stages[-1].kind=="reduce" else None
+    result=[]
+    # a take that lets nothing through ends the stream before the first item is read
+    done=any(stage.kind=="take" and stage.limit<=0 for stage in stages)
+    while not done:
+        try:
+            item=next(items,None)
+        except RuntimeError:
+            # a stage set or removed keys under the db entry being read
+            return vm.error(task,f"{args[1]} changed while its keys were streamed","stream")
+        if item is None:
+            break
+        for stage in stages:
+            kind=stage.kind
+            if kind=="take":
+                stage.index+=1
+                # the item still goes through the stages after this one
+                if stage.index>=stage.limit:
+                    done=True
+                continue
+            ok,res=await vm.do_codebody(task,stage.script,args=[item,str(stage.index),stage.last])
+            if vm.is_abort(ok):
+                return ok,res
+            stage.index+=1
+            stage.last=res
+            if kind=="filter":
+                if not is_true(res):
+                    break
+            elif kind=="map":
+                item=res
+        else:
+            if reduce is None:
+                result.append(item)
+    if reduce is not None:
+        return vm.ok(reduce.last)
+    return vm.ok(Tclish_list(result))
+
+
+def add_stdstream(registry):
+    registry.add("stream",vmstream,"""Usage:
+  stream from <list> [<stage>...]
+  stream db <fields> [<stage>...]
+
+Runs the items of <list>, or the keys under the db entry <fields>, through the stages in a single pass
+and returns the list of items that made it through, or the result of the reduce stage.
+Each item goes through all stages before the next one is read, no stage builds an intermediate list,
+and a take stage stops reading the source once enough items went through.
+The keys of a db entry are read as the stream goes, setting or removing keys under it
+from a stage ends the stream with an error.
+
+Stages:
+  map <script>                  replaces the item by the result of the script
+  filter <script>               drops the item unless the script returns true
+  take <n>                      lets the first <n> items through and ends the stream
+  reduce <script> [<initial>]   combines the items into one value, only as the last stage
+
+Scripts are called like the ones of lmap, lfilter and lreduce, with the item, its position in the
+items reaching the stage and the previous result of the script, the accumulator for reduce.
+
+Example:
+  stream from [range 1000000] filter {
+    args map item
+    == [% $item 7] 0
+  } map {
+    args map item
+    * $item $item
+  } take 10 reduce {
+    args map item position accumulator
+    + $accumulator $item
+  } 0
+""",values=True)
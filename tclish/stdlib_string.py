@@ -180,48 +180,48 @@ Returns a uuid in string form.""")
 	register.add("sub", vmsubstring, """usage:
   sub <string> <start> <end>
 
-Returns a substring of the given string with both ends inclusive.""")
+Returns a substring of the given string with both ends inclusive.""",pure=True)
 
 	register.add("len", vmlen, """usage:
   len <string>
 
-Returns the length of the given string.""")
+Returns the length of the given string.""",pure=True)
 
 	register.add("strip", vmstrip, """usage:
   strip <string>
 
-Returns a copy of the string with leading and trailing whitespace removed.""")
+Returns a copy of the string with leading and trailing whitespace removed.""",pure=True)
 
 	register.add("lower", vmlower, """usage:
   lower <string>
 
-Returns a lowercase version of the given string.""")
+Returns a lowercase version of the given string.""",pure=True)
 
 	register.add("upper", vmupper, """usage:
   upper <string>
 
-Returns an uppercase version of the given string.""")
+Returns an uppercase version of the given string.""",pure=True)
 
 	register.add("split", vmsplit, """usage:
   split <string> <separator>
 
-Splits the string into a list of substrings using the specified separator.""")
+Splits the string into a list of substrings using the specified separator.""",pure=True)
 
 	register.add("join", vmjoin, """usage:
   join <string1> <string2> ...
 
-Joins the given strings into a single string.""")
+Joins the given strings into a single string.""",pure=True)
 
 
 	register.add("chars",vmchars,"""usage:
   chars <string>
 
-Returns a list of characters in the given string.""")
+Returns a list of characters in the given string.""",pure=True)
 
 	register.add("escape",vmescape,"""usage:
   escape <string>
 
-Escapes a string.""")
+Escapes a string.""",pure=True)
 	register.add("regex-match", regex_match, r"""Usage:
   regex-match <pattern> <string> [<code_body>]
 
@@ -266,7 +266,7 @@ Returns:
 
 Example:
   glob-match "abc*" "abcdef"
-""")
+""",pure=True)
 	register.add("glob-test", glob_test, r"""Usage:
   glob-test <pattern> <string>
 
@@ -282,7 +282,7 @@ Returns:
 
 Example:
   glob-test "abc*" "abcdef"
-""")
+""",pure=True)
 	register.add("regex-test", regex_test, r"""Usage:
   regex-test <pattern> <string>
 
@@ -297,6 +297,6 @@ Returns:
 
 Example:
   regex-test "^abc.*" "abcdef"
-""")
+""",pure=True)
 
 
@@ -6,18 +6,85 @@ from .db_disk import Tclish_DB_disk
 from .stdlib_math  import add_stdmath
 from .stdlib_common import add_stdcommon
 from .stdlib_string import add_stdstring
-from .registries import tclish_command_registry,tclish_object_registry
+from .stdlib_expr import add_stdexpr
+from .stdlib_stream import add_stdstream
+from .stdlib_concurrency import add_stdconcurrency
+from .registries import tclish_command_registry,tclish_object_registry,Tclish_dispatch_entry
+from .lru_cache import Tclish_lru_cache
+from .timers import Tclish_timer_queue
+from .jit import jit_definition
+from .values import Tclish_list,Tclish_error,text_args
+from .compiler import (
+	Tclish_code,
+	Tclish_literal,
+	Tclish_variable,
+	Tclish_local,
+	Tclish_substitution,
+	Tclish_interpolation,
+	Tclish_splat,
+	compile_program,
+	resolve_locals,
+	fold_code,
+	split_modifier)
 from enum import Enum
-import heapq
+import asyncio
 import time
+import types
+import weakref
+
+# marks a name that had no binding before a frame bound it
+unbound=object()
+
+class Tclish_cell():
+	"""a binding of a name, frames and compiled definition bodies share it"""
+	__slots__=("value",)
+	def __init__(self,value):
+		self.value=value
+
+class Tclish_frame():
+	"""
+	one level of the stack of a task.
+	shadowed holds, for every name the frame binds, the cell it hides,
+	so popping the frame can put it back.
+	once a tail call reused the frame, outer holds the cells hidden by the
+	definitions that ran in it before, see Tclish_task.retarget.
+	frames running a definition body have its layout, and keep the cells of
+	the body's parameters and locals in slots, see compiler.resolve_locals.
+	"""
+	__slots__=("args","label","shadowed","outer","layout","slots")
+	def __init__(self):
+		self.args=None
+		self.label=""
+		self.shadowed={}
+		self.outer=None
+		self.layout=None
+		self.slots=None
 
 class Tclish_task():
-	"""docstring for tclish_task"""
+	"""
+	a program being evaluated, with its stack of frames.
+	variables are shallow bound: vars holds the innermost binding of every name,
+	so looking one up costs the same at any depth.
+	"""
+	# the most frames a task can have. definitions called by definitions
+	# nest on this stack and not on python's, see Tclish_interpreter.run_steps
+	stack_limit=10000
+	# the most evaluations nesting on the python stack: async commands like foreach
+	# or try evaluate the code they are given on their own, and so do translated definitions
+	nesting_limit=48
+
 	def __init__(self, code,args=None):
 		self.states=[]
-		self.stack_limit=64
+		# name -> Tclish_cell of the innermost binding
+		self.vars={}
+		# popped frames, reused by push
+		self.free_frames=[]
+		# evaluations running on the python stack, see Tclish_interpreter.run_steps
+		self.nesting=0
 		self.prog=code
 		self.initial_args=args if args is not None else []
+		# name -> handle bound for this task only, see add_handle
+		self.handles={}
 		self.state="ready"
 		# ready | running | done
 		self.push(self.initial_args)
@@ -25,47 +92,144 @@ class Tclish_task():
 	def args(self):
 		if len(self.states)<1:
 			return []
-		return self.states[len(self.states)-1]["args"]
+		return self.states[-1].args
 
-	def push(self,args=None,label=""):
-		if len(self.states)>self.stack_limit:
+	def push(self,args=None,label="",layout=None):
+		states=self.states
+		if len(states)>self.stack_limit:
 			return False
-		self.states.append({
-			"args": args if args is not None else [],
-			"values":{},
-			"label":label,
-		})
+		free_frames=self.free_frames
+		frame=free_frames.pop() if free_frames else Tclish_frame()
+		frame.args=args if args is not None else []
+		frame.label=label
+		if layout is not None:
+			frame.layout=layout
+			frame.slots=[None]*len(layout)
+		states.append(frame)
 		return True
 
 	def pop(self):
 		if len(self.states)>0:
-			self.states.pop()
+			frame=self.states.pop()
+			shadowed=frame.shadowed
+			if shadowed:
+				variables=self.vars
+				# popitem keeps the dict's table, so the recycled frame doesn't allocate a new one
+				while shadowed:
+					key,value=shadowed.popitem()
+					if value is unbound:
+						del variables[key]
+					else:
+						variables[key]=value
+			outer=frame.outer
+			if outer is not None:
+				variables=self.vars
+				for key,value in outer.items():
+					if value is unbound:
+						variables.pop(key,None)
+					else:
+						variables[key]=value
+				frame.outer=None
+			frame.args=None
+			frame.label=""
+			frame.layout=None
+			frame.slots=None
+			self.free_frames.append(frame)
 			return True
 		return False
 
+	def retarget(self,args,label,layout):
+		"""
+		reuse the top frame for a tail call.
+		the callee starts from the scope a nested call would give it: it sees the bindings
+		of the caller, and the names it binds hide them instead of updating them.
+		outer keeps the oldest cell hidden for every name, what popping the frame puts back,
+		so a chain of tail calls holds as many bindings as the names it uses.
+		"""
+		frame=self.states[-1]
+		shadowed=frame.shadowed
+		if shadowed:
+			outer=frame.outer
+			if outer is None:
+				frame.outer=shadowed
+				frame.shadowed={}
+			else:
+				for key,value in shadowed.items():
+					if key not in outer:
+						outer[key]=value
+				shadowed.clear()
+		frame.args=args
+		frame.label=label
+		frame.layout=layout
+		frame.slots=[None]*len(layout) if layout is not None else None
+
+	def add_handle(self,name,handle,helps):
+		"""
+		bind name to handle while this task runs, other tasks on the interpreter don't see it.
+		returns the binding it replaces, for remove_handle.
+		"""
+		prev=self.handles.get(name)
+		self.handles[name]={
+			"handle":handle,
+			"help":helps,
+			"entry":Tclish_dispatch_entry(name,"handle",handle),
+		}
+		return prev
+
+	def remove_handle(self,name,prev=None):
+		if prev is None:
+			self.handles.pop(name,None)
+		else:
+			self.handles[name]=prev
+
+	def unwind(self,depth):
+		"""pop frames until depth are left"""
+		while len(self.states)>depth:
+			self.pop()
+
 	def get_value(self,key):
-		for stackframe in reversed(self.states):
-			if key in stackframe["values"]:
-				return stackframe["values"][key]
-		return None
+		cell=self.vars.get(key)
+		if cell is None:
+			return None
+		return cell.value
 
 	def set_value(self,key,value):
-		if len(self.states)>0:
-			self.states[len(self.states)-1]["values"][key]=value
+		states=self.states
+		if states:
+			variables=self.vars
+			frame=states[-1]
+			shadowed=frame.shadowed
+			if key in shadowed:
+				# already bound by this frame
+				variables[key].value=value
+				return True
+			shadowed[key]=variables.get(key,unbound)
+			cell=variables[key]=Tclish_cell(value)
+			if frame.layout is not None:
+				slot=frame.layout.get(key)
+				if slot is not None:
+					frame.slots[slot]=cell
 			return True
 		return False
 
 	def update_value(self,key,value):
-		for stackframe in reversed(self.states):
-			if key in stackframe["values"]:
-				stackframe["values"][key] = value
-				return True
-		return False
+		cell=self.vars.get(key)
+		if cell is None:
+			return False
+		cell.value=value
+		return True
 
 	def unset_value(self,key):
 		if len(self.states)>0:
-			if key in self.states[-1]["values"]:
-				del self.states[-1]["values"][key]
+			shadowed=self.states[-1].shadowed
+			if key in shadowed:
+				# slots still pointing at the cell fall back to looking the name up
+				self.vars[key].value=None
+				cell=shadowed.pop(key)
+				if cell is unbound:
+					del self.vars[key]
+				else:
+					self.vars[key]=cell
 			return
 
 
@@ -80,11 +244,15 @@ Tclish_response_flag = Enum("Tclish_response_flag",[
 	"normal",
 	"comment",
 	"forced_return",
-	"error"
+	"error",
+	"loop_break",
+	"loop_continue",
+	"tail_call"
 ])
 
 
-async def vmif(vm,task,args):
+@types.coroutine
+def vmif(vm,task,args,tail=False):
 	"""
 	Executes an 'if' statement in the tclish interpreter.
 
@@ -113,6 +281,9 @@ async def vmif(vm,task,args):
 	- If the 'if' statement is not properly formatted (e.g., missing conditions or bodies), an error is returned.
 	- If there is an error during the evaluation of a condition or body, the error message is returned.
 
+	tail is set when the if ends a body, a definition called at the end of the chosen body is then a tail call.
+	like the other control directives it is a generator of evaluation steps, see Tclish_interpreter.eval_steps.
+
 	See Also:
 	- The 'if' statement in tclish follows the structure:
 		if {condition_1} {
@@ -137,26 +308,111 @@ async def vmif(vm,task,args):
 
 	cond=consume()
 	body=consume()
-	ok,res=await vm.simple_eval(task,cond)
+	ok,res=yield from vm.simple_eval_steps(task,cond)
 	if is_abort(ok):
 		return ok,res
 	if isTrue(res):
-		return await vm.simple_eval(task,body)
+		return (yield from vm.simple_eval_steps(task,body,tail))
 
 	while not done():
 		match consume().lower():
 			case "else":
-				return await vm.simple_eval(task,consume())
+				return (yield from vm.simple_eval_steps(task,consume(),tail))
 			case "elseif" | "elif":
 				cond=consume()
 				body=consume()
-				ok,res=await vm.simple_eval(task,cond)
+				ok,res=yield from vm.simple_eval_steps(task,cond)
 				if is_abort(ok):
 					return ok,res
 				if isTrue(res):
-					return await vm.simple_eval(task,body)
+					return (yield from vm.simple_eval_steps(task,body,tail))
 	return vm.ok("")
 
+def if_code_args(args):
+	"""the conditions and bodies of an if sentence"""
+	codes=[getl(args,0,""),getl(args,1,"")]
+	pos=2
+	while pos<len(args):
+		keyword=args[pos].lower()
+		pos+=1
+		if keyword=="else":
+			codes.append(getl(args,pos,""))
+			break
+		elif keyword=="elseif" or keyword=="elif":
+			codes.append(getl(args,pos,""))
+			codes.append(getl(args,pos+1,""))
+			pos+=2
+	return codes
+
+@types.coroutine
+def vmand(vm,task,args):
+	"""
+	&& <condition>...
+	the conditions are evaluated in order, stopping at the first false one
+	"""
+	for cond in args:
+		ok,res=yield from vm.simple_eval_steps(task,cond)
+		if is_abort(ok):
+			return ok,res
+		if not isTrue(res):
+			return vm.ok("")
+	return vm.ok("true")
+
+@types.coroutine
+def vmor(vm,task,args):
+	"""
+	|| <condition>...
+	the conditions are evaluated in order, stopping at the first true one
+	"""
+	for cond in args:
+		ok,res=yield from vm.simple_eval_steps(task,cond)
+		if is_abort(ok):
+			return ok,res
+		if isTrue(res):
+			return vm.ok("true")
+	return vm.ok("")
+
+def conditions_code_args(args):
+	"""the conditions of an && or || sentence"""
+	return list(args)
+
+@types.coroutine
+def vmwhile(vm,task,args):
+	"""
+	while <condition> <body>
+	the condition and the body are compiled once and evaluated in the current scope
+	"""
+	if len(args)<2:
+		return vm.error(task,"expected a condition and a body","while")
+	ok,cond=vm.compile(task,args[0])
+	if ok is ERROR:
+		return ok,cond
+	ok,body=vm.compile(task,args[1])
+	if ok is ERROR:
+		return ok,body
+	code_steps=vm.code_steps
+	while True:
+		ok,res=yield from code_steps(task,cond)
+		if ok is not NORMAL:
+			return ok,res
+		if not isTrue(res):
+			return vm.ok("")
+		ok,res=yield from code_steps(task,body)
+		if ok is BREAK:
+			return vm.ok("")
+		if ok is ERROR or ok is FORCED_RETURN:
+			return ok,res
+
+def while_code_args(args):
+	"""the condition and body of a while sentence"""
+	return [getl(args,0,""),getl(args,1,"")]
+
+def vmbreak(vm,task,args):
+	return vm.loop_break()
+
+def vmcontinue(vm,task,args):
+	return vm.loop_continue()
+
 def vmhelp(vm,task,args):
 	if len(args)<1:
 		return vm.ok(directive_helps["help"])
@@ -168,6 +424,7 @@ def vmhelp(vm,task,args):
 					+list(vm.directives.keys() )
 					+list(vm.commands.keys()   )
 					+list(vm.handles.keys()    )
+					+list(task.handles.keys()  )
 					+list(vm.definitions.keys())))
 
 	elif args[0].lower()=="topics":
@@ -175,17 +432,16 @@ def vmhelp(vm,task,args):
 			"general topics:\n  "  +"\n  ".join(list(vm.helps.keys())      ) +
 			"\ndirectives:\n  "    +"\n  ".join(     vm.directives.keys()  ) +
 			"\ncommands:\n  "      +"\n  ".join(     vm.commands.keys()    ) +
-			"\nhandles:\n  "       +"\n  ".join(     vm.handles.keys()     ) +
+			"\nhandles:\n  "       +"\n  ".join(list(vm.handles.keys())+list(task.handles.keys())) +
 			"\ndefinitions:\n  "   +"\n  ".join(list(vm.definitions.keys())))
 
-	elif args[0] in vm.handles:#(handle:=self.handles.get(args[0],None)) is not None:
-		handle = vm.handles[args[0]]
+	elif (handle:=task.handles.get(args[0],vm.handles.get(args[0]))) is not None:
 		if isinstance(handle["help"],str):
 			return vm.ok(handle["help"])
 		elif callable(handle["help"]):
 			return (handle["help"](vm,task,args[1:]))
 		else:
-			return vm.error(task,f"error in help for handle\n"+str(vm.handles[args[0]]["help"]),"help")
+			return vm.error(task,f"error in help for handle\n"+str(handle["help"]),"help")
 
 	elif (helps:=vm.directive_helps.get(args[0])) is not None:
 		return vm.ok(helps)
@@ -220,7 +476,7 @@ def vmget(vm,task,args):
 	#print(val)
 	if val is None:
 		return vm.ok("")
-	return vm.ok(str(val))
+	return vm.ok(val)
 def vmset(vm,task,args):
 	if len(args)<1:
 		return vm.error(task,"set requires a variable name")
@@ -247,7 +503,7 @@ def vmargs(vm,task,args):
 		stopn=to_number(stop)
 		if stopn is None:
 			return vm.error(task,f"{stop} is not a valid index")
-		return vm.ok(pack_strings(vm,sargs[(startn-1):(stopn-1)]))
+		return vm.ok(Tclish_list(sargs[(startn-1):(stopn-1)]))
 
 	elif args[0].lower()=="map":
 		succ=True
@@ -273,6 +529,140 @@ def vmdefproc(vm,task,args):
 	else:
 		return vm.error(task,res)
 
+def vmparse_cache(vm,task,args):
+	directive=getl(args,0,"stats").lower()
+	if directive=="stats":
+		stats=vm.parse_cache.stats()
+		return vm.ok(pack_strings(vm,[str(x) for pair in stats.items() for x in pair]))
+	elif directive=="clear":
+		vm.parse_cache.clear()
+		vm.parse_cache.reset_stats()
+		return vm.ok("")
+	elif directive=="size":
+		if len(args)<2:
+			return vm.ok(str(vm.parse_cache.maxsize))
+		size=to_integer(args[1])
+		if size is None or size<0:
+			return vm.error(task,f"{args[1]} is not a valid cache size","parse-cache size")
+		vm.parse_cache.resize(size)
+		return vm.ok(str(size))
+	return vm.error(task,f"unknown directive {args[0]}","parse-cache")
+
+class Tclish_memo():
+	"""
+	results of a definition kept by its arguments, see memoize.
+	only plain successes are kept, errors and returns of other flags are evaluated every time.
+	"""
+	def __init__(self,name,maxsize):
+		self.name=name
+		self.cache=Tclish_lru_cache(maxsize)
+
+	@types.coroutine
+	def call(self,vm,task,args):
+		"""awaited like any command, a definition waiting for a timer or a channel can be memoized too"""
+		key=tuple(arg if arg.__class__ is str else str(arg) for arg in args)
+		cache=self.cache
+		res=cache.get(key,cache)
+		if res is not cache:
+			return vm.ok(res)
+		code=vm.definition_code.get(self.name)
+		if code is None:
+			# didn't compile, eval reports the error
+			code=vm.definitions[self.name]["function"]
+		ok,res=yield vm.eval_steps(task,code,args)
+		if ok is Tclish_response_flag.normal:
+			cache.put(key,res)
+		return ok,res
+
+def vmmemoize(vm,task,args):
+	if len(args)<1:
+		return vm.error(task,"a definition name is needed","memoize")
+	name=args[0]
+	if name not in vm.definitions:
+		return vm.error(task,f"{name} is not a definition","memoize")
+	size=256
+	if len(args)>1:
+		size=to_integer(args[1])
+		if size is None or size<1:
+			return vm.error(task,f"{args[1]} is not a valid cache size","memoize")
+	memo=vm.memos.get(name)
+	if memo is None:
+		vm.memos[name]=Tclish_memo(name,size)
+		vm.invalidate_dispatch(name)
+	else:
+		memo.cache.resize(size)
+	return vm.ok("")
+
+def vmmemo_cache(vm,task,args):
+	if len(args)<1:
+		return vm.error(task,"a definition name is needed","memo-cache")
+	memo=vm.memos.get(args[0])
+	if memo is None:
+		return vm.error(task,f"{args[0]} is not memoized","memo-cache")
+	directive=getl(args,1,"stats").lower()
+	if directive=="stats":
+		stats=memo.cache.stats()
+		return vm.ok(pack_strings(vm,[str(x) for pair in stats.items() for x in pair]))
+	elif directive=="clear":
+		if len(args)<3:
+			memo.cache.clear()
+			memo.cache.reset_stats()
+		else:
+			# forget the result for one list of arguments
+			ok,items=unpack_strings(vm,args[2])
+			memo.cache.remove(tuple(items))
+		return vm.ok("")
+	elif directive=="off":
+		del vm.memos[args[0]]
+		vm.invalidate_dispatch(args[0])
+		return vm.ok("")
+	return vm.error(task,f"unknown directive {args[1]}","memo-cache")
+
+memoize_helpstring="""usage:
+  memoize <name> [<maxsize>]
+
+keep the results of the definition <name> by its arguments, calling it again with the same arguments returns the kept result without evaluating the body.
+at most <maxsize> results are kept, 256 by default, the least recently used are dropped first.
+memoizing a memoized definition sets a new <maxsize>.
+redefining <name> drops the kept results.
+
+only for definitions whose result depends on nothing but their arguments.
+a memoized definition can still suspend, calls that don't find a kept result wait for it like an unmemoized call.
+see memo-cache for statistics and invalidation.
+
+example:
+  proc fib {n} {
+    if {< $n 2} {return $n}
+    + [fib [- $n 1]] [fib [- $n 2]]
+  }
+  memoize fib 1000
+  fib 60
+"""
+
+memo_cache_helpstring="""usage:
+(1) memo-cache <name> [stats]
+(2) memo-cache <name> clear [<args>]
+(3) memo-cache <name> off
+
+the results kept for a definition by memoize.
+
+(1) returns a list of name/value pairs: size maxsize hits misses evictions
+(2) drops every kept result and resets the counters, or only the result for the list <args>
+(3) stops memoizing <name>
+"""
+
+parse_cache_helpstring="""usage:
+(1) parse-cache [stats]
+(2) parse-cache clear
+(3) parse-cache size [<n>]
+
+the interpreter keeps the compiled form of recently evaluated programs, so loop bodies and branches are only parsed once.
+
+(1) returns a list of name/value pairs: size maxsize hits misses evictions
+(2) empties the cache and resets the counters
+(3) returns the maximum number of cached programs, or sets it to <n>
+"""
+
 def vmtrue(vm,task,args):
 	return vm.ok("true")
 def vmfalse(vm,task,args):
@@ -280,6 +670,34 @@ def vmfalse(vm,task,args):
 
 directive_helps={
 
+"while":"""usage:
+  while <condition> <body>
+
+evaluates the body for as long as the condition evaluates to true.
+both are evaluated in the current scope, and only parsed once.
+returns an empty string.
+
+Example:
+  set i 0
+  while {< $i 10} {
+	+= i 1
+	if {= $i 5} {continue}
+	print $i
+  }
+""",
+
+"break":"""usage:
+  break
+
+leaves the innermost while, for or foreach loop.
+""",
+
+"continue":"""usage:
+  continue
+
+skips the rest of the body of the innermost while, for or foreach loop.
+""",
+
 "true":"""usage:
   true
 return a value that is considered true in a boolean context.
@@ -309,6 +727,31 @@ Example:
 
 """,
 
+"&&":"""usage:
+  && <condition>...
+
+evaluates the conditions in order and returns true if all of them are true.
+stops at the first false condition, the ones after it are not evaluated.
+the conditions are bodies like the ones of if, unlike the arguments of and, which are all evaluated before and is called.
+
+Example:
+  if {&& {!= $key ""} {db has $key}} {
+	print "found $key"
+  }
+""",
+
+"||":"""usage:
+  || <condition>...
+
+evaluates the conditions in order and returns true if one of them is true.
+stops at the first true condition, the ones after it are not evaluated.
+
+Example:
+  if {|| {< $x 0} {slow-check $x}} {
+	print "rejected"
+  }
+""",
+
 "defproc":"""usage:
   defproc <name> <body> [<helpstring>]
 
@@ -397,7 +840,9 @@ Example:
 "return":"""usage:
   return [<value>]
 
-returns a value, ending the execution in scope early.""",
+returns a value, ending the execution in scope early.
+return [<call>] as the last sentence of a body, or a call ending it, is a tail call:
+the called definition runs in the frame of the caller, so tail recursion has no depth limit.""",
 
 "set":"""usage:
   set <name> <value>
@@ -420,9 +865,22 @@ returns the helpstring for the specified topic
 }
 
 
+# the flags as plain globals, enum attribute access is slow on hot paths
+NORMAL=Tclish_response_flag.normal
+COMMENT=Tclish_response_flag.comment
+FORCED_RETURN=Tclish_response_flag.forced_return
+ERROR=Tclish_response_flag.error
+BREAK=Tclish_response_flag.loop_break
+CONTINUE=Tclish_response_flag.loop_continue
+# only passed from the last sentence of a body up to the eval running it, never seen by commands
+TAIL_CALL=Tclish_response_flag.tail_call
+
 def is_abort(flag):
+	"""flags that stop the code being evaluated and are passed up to the caller"""
 	return (flag is Tclish_response_flag.error or
-		flag is Tclish_response_flag.forced_return)
+		flag is Tclish_response_flag.forced_return or
+		flag is Tclish_response_flag.loop_break or
+		flag is Tclish_response_flag.loop_continue)
 
 
 
@@ -437,14 +895,71 @@ class Tclish_interpreter:
 		"defproc": vmdefproc,
 		"true": vmtrue,
 		"false": vmfalse,
+		"while": vmwhile,
+		"&&": vmand,
+		"||": vmor,
+		"break": vmbreak,
+		"continue": vmcontinue,
+	}
+	# directives running code given as arguments, with a function listing that code
+	control_directives={
+		"if": if_code_args,
+		"while": while_code_args,
+		"&&": conditions_code_args,
+		"||": conditions_code_args,
 	}
+	# commands that change what names resolve to are never sync,
+	# so a synchronous body can't redefine what it is about to call
+	sync_barriers={"defproc","proc"}
+	# directives that pass value objects through instead of needing their text
+	value_directives={"get","set","return"}
 	directive_helps=directive_helps
-	def __init__(self,/,*,db_filename=None):
-		self.event_queue=[]#priority queue
+	def __init__(self,/,*,db_filename=None,parse_cache_size=1024,expr_cache_size=1024,jit_threshold=None):
+		# scheduled events, see push_event
+		self.event_queue=Tclish_timer_queue()
+		# set by push_event when run_events has to look at the queue again
+		self.event_wakeup=None
+		# the time run_events sleeps until, None while it waits for any event
+		self.event_deadline=None
+		self.events_running=False
+		# program text -> Tclish_code
+		self.parse_cache=Tclish_lru_cache(parse_cache_size)
+		# expression text -> compiled closure, see stdlib_expr.py
+		self.expr_cache=Tclish_lru_cache(expr_cache_size)
+		# name -> Tclish_dispatch_entry, filled on first use, see resolve_command
+		self.dispatch={}
+		self.dispatch_version=0
+		# the number of assumptions made on codes still being classified, and the
+		# count when every running classification started, see code_is_sync
+		self.sync_assumed=0
+		self.sync_checks=[]
+		# codes and sentences found sync by leaning on such assumptions
+		self.sync_provisional=[]
+		# definitions called this many times are translated to python, None turns it off
+		self.jit_threshold=jit_threshold
+		# command name -> definition codes whose translation depends on it
+		self.jit_dependents={}
+		# fold calls of pure commands with literal arguments when compiling, see compiler.fold_code
+		self.fold_constants=True
+		# command name -> {sentence: its words before folding}, for the sentences it was folded into
+		self.folds={}
 		self.commands=tclish_command_registry()
+		self.commands.on_change=self.invalidate_dispatch
 		self.handles={}
 		self.helps={}
 		self.definitions={}
+		# name -> Tclish_code of the definition body
+		self.definition_code={}
+		# definition name -> Tclish_memo, see memoize
+		self.memos={}
+		# handle -> asyncio task of a spawned Tclish_task, see stdlib_concurrency.py
+		self.spawned={}
+		# handle -> (task,body,args) of the spawned tasks that finished and weren't collected yet, oldest first
+		self.unclaimed={}
+		self.spawn_count=0
+		# handle -> Tclish_channel, see chan
+		self.channels={}
+		self.channel_count=0
 		if db_filename:
 			self.db=Tclish_DB_disk(db_filename)
 			self.db.load()
@@ -461,71 +976,131 @@ class Tclish_interpreter:
 			time=to_number(args[0])
 			if time is None:
 				return vm.error(task,"time must be a valid number of seconds")
-			vm.push_event(task,time,args[1],args=args[2:])
-			return vm.ok()
+			return vm.ok(str(vm.push_event(task,time,args[1],args=args[2:])))
 		def local_push_event(vm,task,args):
 			if len(args)<1:
 				return vm.error(task,"event needed")
-			vm.push_event(task,0,args[0],args=args[1:])
-			return vm.ok()
+			return vm.ok(str(vm.push_event(task,0,args[0],args=args[1:])))
+
+		def local_cancel_event(vm,task,args):
+			if len(args)<1:
+				return vm.error(task,"event id needed","cancel-event")
+			event_id=to_integer(args[0])
+			if event_id is None or not vm.cancel_event(event_id):
+				return vm.ok("")
+			return vm.ok("true")
 
 		self.add_command("schedule-event",local_schedule_event,"""Usage:
   schedule-event <timeout> <command> <args>...
 
 Schedule an event to happen <timeout> seconds in the future.
+Returns the id of the event, for cancel-event.
 """)
 
 		self.add_command("push-event",local_push_event,"""Usage:
   push-event <command> <args>...
 
 equivalent to schedule-event 0 <command> {*} <args>
+""")
+		self.add_command("cancel-event",local_cancel_event,"""Usage:
+  cancel-event <id>
+
+Cancel the event with the id returned by schedule-event or push-event.
+Returns true if it was still pending.
 """)
 		def list_events(vm,task,args):
 			events=[]
-			for (event_time, task, command, args, handles) in self.event_queue:
-				events.append(command)
-				events.append(str(event_time))
+			for timer in self.event_queue.pending():
+				events.append(timer.payload[1])
+				events.append(str(timer.time))
 			return vm.ok(vm.pack_strings(events))
 		self.add_command("list-events",list_events,"list-events ")
 		def vmtime_time(vm,task,args):
 			return vm.ok(str(time.time()))
 		self.add_command("time",vmtime_time,"""usage: time ; returns current time in seconds since 1970""")
+		self.add_command("parse-cache",vmparse_cache,parse_cache_helpstring)
+		self.add_command("memoize",vmmemoize,memoize_helpstring)
+		self.add_command("memo-cache",vmmemo_cache,memo_cache_helpstring)
 
 	def push_event(self,task,timeout,command,args=None,handles=None):
-		"""add the event to the event queue at the current time plus timeout"""
+		"""
+		add the event to the event queue at the current time plus timeout.
+		returns its id, for cancel_event.
+		"""
 		event_time = time.time() + timeout
-		event = (event_time, task, command, args, handles)
-		heapq.heappush(self.event_queue, event)
+		event_id = self.event_queue.add(event_time, (task, command, args, handles))
+		if self.event_wakeup is not None and (self.event_deadline is None or event_time < self.event_deadline):
+			# earlier than what run_events sleeps for
+			self.event_wakeup.set()
+		return event_id
+
+	def cancel_event(self,event_id):
+		"""drop a pending event, False if it already ran or doesn't exist"""
+		return self.event_queue.cancel(event_id)
 
 	async def process_events(self,count=1):
 		"""process up to count events from the event queue"""
 		current_time = time.time()
 
-		# Process events until count is reached or the queue is empty
-		while self.event_queue and count > 0:
-			# Get the next event
-			event_time, task, command, args, handles = heapq.heappop(self.event_queue)
-
-			# Check if the event time has passed
-			if event_time > current_time:
-				# Push the event back to the queue (it's not time to process it yet)
-				heapq.heappush(self.event_queue, (event_time, task, command, args, handles))
+		# Process events until count is reached or no event is due
+		while count > 0:
+			# Get the next event that is due
+			event = self.event_queue.pop(current_time)
+			if event is None:
 				break
+			task, command, args, handles = event
 			prev_handles={}
 			if handles is not None:
 				for name,func,helps in handles:
-					prev_handles[name]=self.add_handle(name,func,helps)
+					prev_handles[name]=task.add_handle(name,func,helps)
 			# Execute the event
 			ok,result = await self.do_codebody(task, command, args)
 			
 			for name,prev in prev_handles.items():
-				self.remove_handle(name,prev)
+				task.remove_handle(name,prev)
 
 			if self.is_error(ok) and command != "on-event-error":
 				self.push_event(task,0,"on-event-error",args=[command,result]+args,handles=handles)
 
 			count -= 1
 
+	async def run_events(self):
+		"""
+		process events as they come due, until stop_events is called.
+		sleeps until the earliest event, or until push_event adds an earlier one,
+		and processes every event that is due when it wakes up.
+		"""
+		wakeup=self.event_wakeup=asyncio.Event()
+		self.events_running=True
+		try:
+			while self.events_running:
+				queue=self.event_queue
+				deadline=queue.next_time()
+				timeout=None
+				if deadline is not None:
+					timeout=deadline-time.time()
+					if timeout<=0:
+						# events are due
+						await self.process_events(len(queue))
+						continue
+				self.event_deadline=deadline
+				wakeup.clear()
+				try:
+					await asyncio.wait_for(wakeup.wait(),timeout)
+				except asyncio.TimeoutError:
+					pass
+		finally:
+			self.events_running=False
+			self.event_deadline=None
+			if self.event_wakeup is wakeup:
+				self.event_wakeup=None
+
+	def stop_events(self):
+		"""make run_events return once the event it is processing, if any, is done"""
+		self.events_running=False
+		if self.event_wakeup is not None:
+			self.event_wakeup.set()
+
 	def tojson(self):
 		return {
 			"helps":self.helps,
@@ -540,6 +1115,7 @@ equivalent to schedule-event 0 <command> {*} <args>
 		if "definitions" in data:
 			for k,v in data["definitions"].items():
 				self.definitions[k]=v
+				self.definition_code.pop(k,None)
 		if "db" in data:
 			if isinstance(self.db,Tclish_DB):
 				self.db.fromjson(data["db"])
@@ -547,6 +1123,7 @@ equivalent to schedule-event 0 <command> {*} <args>
 				self.db.fromjson({"db":data["db"]})
 		if "objects" in data:
 			self.objects.fromjson(data["objects"])
+		self.invalidate_dispatch()
 
 	def get_method_names(self):
 		l=set(self.commands.keys())
@@ -574,6 +1151,15 @@ equivalent to schedule-event 0 <command> {*} <args>
 			"function" : func,
 			"help" : helps,
 		}
+		# bodies are compiled once, syntax errors are reported when the definition is called
+		ok,code=self.compile_definition(None,func)
+		if ok is Tclish_response_flag.error:
+			self.definition_code.pop(name,None)
+		else:
+			self.definition_code[name]=code
+		if name in self.memos:
+			self.memos[name].cache.clear()
+		self.invalidate_dispatch(name)
 		return True,""
 
 	def add_handle(self,name,handle,helps):
@@ -582,6 +1168,7 @@ equivalent to schedule-event 0 <command> {*} <args>
 			"handle":handle,
 			"help":helps,
 		}
+		self.invalidate_dispatch(name)
 		return prev
 
 	def remove_handle(self,name,prev=None):
@@ -589,7 +1176,117 @@ equivalent to schedule-event 0 <command> {*} <args>
 			del self.handles[name]
 		if prev is not None:
 			self.handles[name]=prev
-
+		self.invalidate_dispatch(name)
+
+	def invalidate_dispatch(self,name=None):
+		"""forget how name resolves, or every name if none is given"""
+		if name is None:
+			self.dispatch.clear()
+			self.dispatch_version+=1
+		elif self.dispatch.pop(name,None) is not None:
+			self.dispatch_version+=1
+		if self.folds:
+			self.unfold(name)
+		if self.jit_dependents:
+			self.deoptimize(name)
+
+	def record_fold(self,names,sentence,words):
+		"""remember the words of sentence before calls to names were folded into it"""
+		for name in names:
+			folded=self.folds.get(name)
+			if folded is None:
+				# compiled code dropped from the parse cache takes its entries with it
+				folded=self.folds[name]=weakref.WeakKeyDictionary()
+			folded[sentence]=words
+
+	def unfold(self,name=None):
+		"""put back the words of the sentences calls to name were folded into, or of all of them"""
+		if name is None:
+			folds=list(self.folds.values())
+			self.folds.clear()
+		else:
+			folded=self.folds.pop(name,None)
+			folds=[folded] if folded is not None else []
+		restored=False
+		for folded in folds:
+			for sentence,words in list(folded.items()):
+				sentence.args=words
+				restored=True
+		if restored:
+			# sync flags and translations were worked out from the folded words
+			self.dispatch_version+=1
+			if self.jit_dependents:
+				self.deoptimize()
+
+	def deoptimize(self,name=None):
+		"""drop the translations that depend on name, or all of them"""
+		if name is None:
+			codes=[code for dependents in self.jit_dependents.values() for code in dependents]
+			self.jit_dependents.clear()
+		else:
+			codes=self.jit_dependents.pop(name,())
+		for code in codes:
+			if code.jit is not None or code.calls is None:
+				# translated again, or tried again, once it is hot
+				code.jit=None
+				code.calls=0
+
+	def jit_count(self,code):
+		"""count a call of a definition body, translate it once it is hot. returns the translation if there is one"""
+		if code.calls is None:
+			return None
+		code.calls+=1
+		if code.calls<self.jit_threshold:
+			return None
+		jit,names=jit_definition(self,code)
+		for name in names:
+			self.jit_dependents.setdefault(name,set()).add(code)
+		if jit is None:
+			# stays interpreted until the definition or one of the names is replaced
+			code.calls=None
+			return None
+		code.jit=jit
+		return jit
+
+	def resolve_command(self,name):
+		"""
+		look name up in directives, commands, objects, handles and definitions, in that order.
+		the result is kept in the dispatch table until one of those changes.
+		handles bound to a task are not in the table, see task_handle.
+		"""
+		if (func := self.directives.get(name)) is not None:
+			entry=Tclish_dispatch_entry(name,"directive",func,takes_values=name in self.value_directives)
+			entry.code_args=self.control_directives.get(name)
+		elif (command := self.commands.lookup(name)) is not None:
+			entry=Tclish_dispatch_entry(name,"command",command["function"],takes_values=command.get("values",False),pure=command.get("pure",False))
+		elif self.objects.is_object(name):
+			entry=Tclish_dispatch_entry(name,"object",self.objects.get_handle(self.objects.get_instance(name)))
+		elif name in self.handles:
+			entry=Tclish_dispatch_entry(name,"handle",self.handles[name]["handle"])
+		elif name in self.memos and name in self.definitions:
+			entry=Tclish_dispatch_entry(name,"definition",self.memos[name].call,takes_values=True)
+		elif name in self.definitions:
+			code=self.definition_code.get(name)
+			if code is None:
+				# didn't compile, eval reports the error on every call
+				code=self.definitions[name]["function"]
+			entry=Tclish_dispatch_entry(name,"definition",code=code,takes_values=True)
+		else:
+			return None
+		self.dispatch[name]=entry
+		return entry
+
+
+	def task_handle(self,task,name,entry):
+		"""
+		entry, unless the task bound a handle to name that comes first.
+		task handles come after directives, commands and objects, and before interpreter wide handles and definitions.
+		"""
+		if entry is None or entry.kind=="handle" or entry.kind=="definition":
+			handle=task.handles.get(name)
+			if handle is not None:
+				return handle["entry"]
+		return entry
 
 	def add_command(self,name,func,helps):
 		return self.commands.add(name,func,helps)
@@ -601,6 +1298,9 @@ equivalent to schedule-event 0 <command> {*} <args>
 		add_stdmath(self.commands)
 		add_stdcommon(self.commands)
 		add_stdstring(self.commands)
+		add_stdexpr(self.commands)
+		add_stdstream(self.commands)
+		add_stdconcurrency(self.commands)
 	def is_true(self,thing):
 		if thing=="":
 			return False
@@ -615,6 +1315,33 @@ equivalent to schedule-event 0 <command> {*} <args>
 		return flag is Tclish_response_flag.comment
 	def is_ok(self,flag):
 		return flag is Tclish_response_flag.normal
+	def is_break(self,flag):
+		return flag is Tclish_response_flag.loop_break
+	def is_continue(self,flag):
+		return flag is Tclish_response_flag.loop_continue
+
+	def bind_params(self,task,params):
+		"""what the leading args map of a definition body does, without evaluating it"""
+		args=task.states[-1].args
+		if len(args)<len(params):
+			name=params[len(args)]
+			return self.error(task,f"argument <{name}> at pos {len(args)+1} is missing","args map")
+		set_value=task.set_value
+		for name,value in zip(params,args):
+			set_value(name,value)
+		return self.ok("")
+
+	def get_local(self,task,word):
+		"""the value of a Tclish_local, from its slot when the frame has it bound, by name otherwise"""
+		frame=task.states[-1]
+		if frame.layout is word.layout:
+			cell=frame.slots[word.slot]
+			if cell is not None and cell.value is not None:
+				return cell.value
+		val=self.get_value(word.name,task=task)
+		if val is None:
+			return ""
+		return val
 
 	def get_value(self,key,task=None):
 		#for later, when I reintroduce global state.
@@ -629,16 +1356,16 @@ equivalent to schedule-event 0 <command> {*} <args>
 	def ok(self,text=""):
 		return (Tclish_response_flag.normal,text)
 
-	def error(self,task=None,message="undefined error",label="unspecified"):
-		msg=[f"<{label}> {message}"]
-		if task is not None:
-			if len(task.states)>0:
-				msg.append("while evaluating:{"+str(task.states[-1]["label"])+"}")
-				msg.append("stack:")
-				for i,v in enumerate(reversed(task.states)):
-					msg.append(str(i).rjust(4)+": {"+str(v["label"])+"}")
-
-		return (Tclish_response_flag.error,"\n".join(msg))
+	def error(self,task=None,message="undefined error",label="unspecified",cause=None):
+		"""
+		an error result, see Tclish_error.
+		cause is an error this one wraps, its text goes between the message and the stack.
+		"""
+		labels=()
+		if task is not None and task.states:
+			# frames are reused once popped, keep only their labels
+			labels=tuple([frame.label for frame in reversed(task.states)])
+		return (Tclish_response_flag.error,Tclish_error(label,message,labels,cause))
 
 	def forced_return(self,value=""):
 		return (Tclish_response_flag.forced_return,value)
@@ -646,6 +1373,17 @@ equivalent to schedule-event 0 <command> {*} <args>
 	def comment(self,value=""):
 		return (Tclish_response_flag.comment,value)
 
+	def loop_break(self):
+		return (Tclish_response_flag.loop_break,"")
+
+	def loop_continue(self):
+		return (Tclish_response_flag.loop_continue,"")
+
+	def loop_escape(self,task,flag):
+		"""the error for a break or continue that reached the end of a body without meeting a loop"""
+		name="break" if flag is BREAK else "continue"
+		return self.error(task,f"{name} used outside of a loop",name)
+
 	def extract_header(self,s):
 		return extract_header(self,None,s)
 
@@ -700,174 +1438,552 @@ equivalent to schedule-event 0 <command> {*} <args>
 					#skip comments
 					pass
 				else:
-					sentences.append(sentence)
-
-		return self.ok(sentences)
+					sentences.append(tuple(sentence))
+
+		return self.ok(tuple(sentences))
+
+	def compile(self,task,prog):
+		"""
+		compile prog into a Tclish_code.
+		compiled programs are kept in the parse cache, so loop bodies and branches are only parsed once.
+		"""
+		if type(prog) is Tclish_code:
+			return self.ok(prog)
+		if type(prog) is not str:
+			prog=str(prog)
+		code=self.parse_cache.get(prog)
+		if code is not None:
+			return self.ok(code)
+		ok,code=compile_program(self,task,prog)
+		if ok is Tclish_response_flag.error:
+			return ok,code
+		if self.fold_constants:
+			fold_code(self,code)
+		self.parse_cache.put(prog,code)
+		return self.ok(code)
+
+	def compile_definition(self,task,prog):
+		"""
+		compile the body of a definition or method.
+		the code is not shared through the parse cache, its parameters and locals get slots in the frame.
+		"""
+		ok,code=compile_program(self,task,prog)
+		if ok is Tclish_response_flag.error:
+			return ok,code
+		code=resolve_locals(code)
+		if self.fold_constants:
+			fold_code(self,code)
+		code.calls=0
+		return self.ok(code)
 
 	async def do_string(self,prog):
 		return await self.do_task(Tclish_task(prog))
 
 	async def do_task(self,task):
 		ok,res=await self.eval(task,task.prog)
-		return ok ,res
+		return ok ,to_text(res)
 
 	async def do_codebody(self,task,code_body,args=None,label=None):
-		if is_command_name(code_body):
-			code_body=code_body+" {*} [args list]"
+		"""evaluate a script with args, a script that is just a command name calls it with args"""
+		if code_body and is_command_name(code_body):
+			return await self.call_command(task,to_text(code_body),list(args) if args is not None else [],label)
 		return await self.eval(task,code_body,args,label)
 
+	async def call_command(self,task,name,args,label=None):
+		"""call what name resolves to with args as its words, the way a sentence would"""
+		entry=self.dispatch.get(name)
+		if entry is None:
+			entry=self.resolve_command(name)
+		if task.handles:
+			entry=self.task_handle(task,name,entry)
+		if entry is None:
+			return self.error(task,"unknown command",name)
+		if entry.code is not None:
+			return await self.eval(task,entry.code,args=args,label=label)
+		if not entry.takes_values:
+			text_args(args)
+		if entry.is_async:
+			ok,result=await entry.function(self,task,args)
+		else:
+			ok,result=entry.function(self,task,args)
+		if ok.__class__ is not Tclish_response_flag:
+			return self.bad_response(task,name,ok,result)
+		if result is None:
+			return self.error(task,"something went horribly wrong","evalSentence")
+		# what eval would make of the flag ending its body
+		if ok is FORCED_RETURN:
+			return self.ok(result)
+		if ok is COMMENT:
+			return self.ok("")
+		if ok is BREAK or ok is CONTINUE:
+			return self.loop_escape(task,ok)
+		return ok,result
+
+	##=============================================================##
+	##  EVALUATION                                                 ##
+	##=============================================================##
+	# programs are evaluated by the generators named *_steps below.
+	# they call plain functions directly and yield from coroutines and from
+	# each other, so a sentence only reaching plain functions costs no coroutine.
+	# they are marked with types.coroutine: a coroutine can await them, and what
+	# an async command waits on is passed straight through to the event loop.
+	# a call to a definition yields the eval_steps of its body instead, and
+	# run_steps keeps the steps of the callers on a list while it runs, so deep
+	# recursion doesn't grow the python stack.
+	# run_inline drives the same generators from plain functions, for code
+	# classified sync, see code_is_sync.
+
+	@types.coroutine
+	def run_steps(self,task,steps):
+		"""
+		drive evaluation steps, the definitions they call run on an explicit stack.
+		anything else they yield is what an async command waits on, for the event loop.
+		"""
+		if task.nesting>=task.nesting_limit:
+			steps.close()
+			return self.error(task,"stack limit exceeded, too many nested evaluations","eval")
+		task.nesting+=1
+		callers=[]
+		value=None
+		error=None
+		try:
+			while True:
+				try:
+					if error is None:
+						yielded=steps.send(value)
+					else:
+						yielded,error=steps.throw(error),None
+				except StopIteration as done:
+					if not callers:
+						return done.value
+					steps=callers.pop()
+					value=done.value
+					continue
+				except BaseException as e:
+					if not callers:
+						raise
+					steps=callers.pop()
+					error=e
+					continue
+				if yielded.__class__ is types.GeneratorType:
+					# a definition call, its steps run before the caller's go on
+					callers.append(steps)
+					steps=yielded
+					value=None
+					continue
+				try:
+					value=yield yielded
+				except BaseException as e:
+					# cancelled or closed while waiting, the innermost steps hear of it first
+					error=e
+		finally:
+			task.nesting-=1
+
 	async def eval(self,task,prog,args=None,label=None):
-		# if (args is not None) or (label is not None):
-		# 	if not task.push(
-		# 		args=args if args is not None else [],
-		# 		label=label if label is not None else prog):
+		return await self.run_steps(task,self.eval_steps(task,prog,args,label))
+
+	@types.coroutine
+	def eval_steps(self,task,prog,args=None,label=None):
+		"""
+		evaluate prog in a frame of its own.
+		a definition called by the last sentence of the body reuses the frame
+		instead of nesting another eval, so tail recursion runs in constant stack.
+		"""
+		ok,code=self.compile(task,prog)
+		if ok is Tclish_response_flag.error:
+			return ok,code
 		if not task.push(
 			args=args if args is not None else [],
-			label=label if label is not None else prog):
+			label=label if label is not None else code.source,
+			layout=code.layout):
 			return self.error(task,"stack limit exceeded","eval")
-		ok,result=await self.simple_eval(task,prog)
-		# if (args is not None) or (label is not None):
-		# 	task.pop()
+		while True:
+			jit=code.jit
+			if jit is None and self.jit_threshold is not None:
+				jit=self.jit_count(code)
+			if jit is not None and task.handles and not jit.names.isdisjoint(task.handles):
+				# the translation resolved its names for every task, a handle bound
+				# to this one may stand for one of them and suspend
+				jit=None
+			if jit is not None and task.nesting*2>=task.nesting_limit:
+				# translations call each other on the python stack, past half of
+				# the nesting limit the calls are interpreted on the explicit one
+				jit=None
+			if jit is not None:
+				ok,result=jit(self,task)
+			elif code.params is not None:
+				ok,result=self.bind_params(task,code.params)
+				if ok is NORMAL:
+					ok,result=yield from self.code_steps(task,code.body,True)
+			else:
+				ok,result=yield from self.code_steps(task,code,True)
+			if ok is not TAIL_CALL:
+				break
+			code,args=result
+			task.retarget(args,code.source,code.layout)
 		task.pop()
 		if ok is Tclish_response_flag.forced_return:
 			ok=Tclish_response_flag.normal
+		elif ok is BREAK or ok is CONTINUE:
+			return self.loop_escape(task,ok)
 		return ok,result
 
-	async def simple_eval(self,task,prog):
-		ok,sentences=self.split_sentences(task,prog)
-		if ok is Tclish_response_flag.error:
-			return ok,sentences
+	def eval_sync(self,task,code,args=None,label=None):
+		"""eval from a plain function, for code classified sync"""
+		return self.run_inline(task,self.run_steps(task,self.eval_steps(task,code,args,label)),"eval")
+
+	async def simple_eval(self,task,prog,tail=False):
+		return await self.run_steps(task,self.simple_eval_steps(task,prog,tail))
 
+	@types.coroutine
+	def simple_eval_steps(self,task,prog,tail=False):
+		"""evaluate prog in the current frame"""
+		ok,code=self.compile(task,prog)
+		if ok is Tclish_response_flag.error:
+			return ok,code
+		return (yield from self.code_steps(task,code,tail))
+
+	async def eval_code(self,task,code,tail=False):
+		return await self.run_steps(task,self.code_steps(task,code,tail))
+
+	@types.coroutine
+	def code_steps(self,task,code,tail=False):
+		"""
+		evaluate the sentences of code in the current frame.
+		with tail set, a last sentence calling a definition isn't run, it is returned
+		as TAIL_CALL with the code and args, for eval to run in the same frame.
+		"""
 		result=""
+		sentences=code.sentences
+		last=sentences[-1] if tail and sentences else None
+		sentence_steps=self.sentence_steps
 		for sentence in sentences:
-			tsuccess,tresult=await self.eval_sentence(task,sentence)
-			match tsuccess:
-				case Tclish_response_flag.normal:
-					#normal behaviour
-					result=tresult
-				case Tclish_response_flag.error:
-					#propagate error
-					return tsuccess,tresult
-				case Tclish_response_flag.comment:
-					#do nothing
-					pass
-				case Tclish_response_flag.forced_return:
-					#return early
-					return tsuccess,tresult
-				case X:
-					return self.error(task,f"unknown directive {X}","simple_eval")
+			tsuccess,tresult=yield from sentence_steps(task,sentence,sentence is last)
+			if tsuccess is NORMAL:
+				result=tresult
+			elif tsuccess is ERROR or tsuccess is FORCED_RETURN or tsuccess is BREAK or tsuccess is CONTINUE or tsuccess is TAIL_CALL:
+				# return early, loops handle break and continue
+				return tsuccess,tresult
+			elif tsuccess is not COMMENT:
+				return self.error(task,f"unknown directive {tsuccess}","simple_eval")
 		return self.ok(result)
+
 	def is_modifier(self,command):
 		if len(command)<2:
 			return False
 		return command[-1]=="=" and command[-2]!="="
-	async def eval_sentence(self,task,sentence):
-		if len(sentence)<=0:
-			return self.comment("")
-		if len(sentence[0])<=0 or sentence[0][0]=="#":
-			return self.comment("")
-
-		success=True
-		command=None
 
-		success,command=await clean_strings(self,task,sentence[0])
-
-		# end with a single "="
-		modifier=len(command)>=2 and command[-1]=="=" and command[-2]!="="
+	async def eval_word(self,task,word):
+		return await self.run_steps(task,self.word_steps(task,word))
+
+	@types.coroutine
+	def word_steps(self,task,word):
+		"""evaluate a single compiled word"""
+		kind=type(word)
+		if kind is Tclish_literal:
+			return self.ok(word.value)
+		if kind is Tclish_variable:
+			val=self.get_value(word.name,task=task)
+			if val is None:
+				val=""
+			return self.ok(val)
+		if kind is Tclish_local:
+			return self.ok(self.get_local(task,word))
+		if kind is Tclish_substitution:
+			return (yield from self.code_steps(task,word.code))
+		if kind is Tclish_interpolation:
+			parts=[]
+			for part in word.parts:
+				if type(part) is Tclish_literal:
+					parts.append(to_text(part.value))
+					continue
+				ok,value=yield from self.word_steps(task,part)
+				if is_abort(ok):
+					return ok,value
+				parts.append(to_text(value))
+			return self.ok("".join(parts))
+		return self.error(task,f"cannot evaluate {word}","eval_word")
+
+	async def eval_sentence(self,task,sentence,tail=False):
+		return await self.run_steps(task,self.sentence_steps(task,sentence,tail))
+
+	@types.coroutine
+	def sentence_steps(self,task,sentence,tail=False):
+		"""
+		evaluate a compiled sentence.
+		tail is set for the last sentence of a body run by eval: a call to a definition,
+		also through return [...] or the chosen body of an if, is returned as TAIL_CALL instead.
+		"""
+		command=sentence.name
+		modifier=sentence.modifier
+		if command is None:
+			success,command=yield from self.word_steps(task,sentence.command)
+			if is_abort(success):
+				return success,command
+			command,modifier=split_modifier(command)
+		tail_return=tail and not modifier and command=="return" and len(sentence.args)==1
 
 		args=[]
-		result=""
-		outpos=0
-		inpos=1
-		unpack_next=False
-		unpack_command="{*}"
-
-		while inpos<len(sentence) and not is_abort(success):
-			if sentence[inpos]==unpack_command:
-				if command=="help" and inpos==1:
-					sentence[inpos]="{"+sentence[inpos]+"}"
+		for word in sentence.args:
+			kind=type(word)
+			if kind is Tclish_literal:
+				args.append(word.value)
+			elif kind is Tclish_variable:
+				val=self.get_value(word.name,task=task)
+				args.append("" if val is None else val)
+			elif kind is Tclish_local:
+				frame=task.states[-1]
+				cell=frame.slots[word.slot] if frame.layout is word.layout else None
+				if cell is None or cell.value is None:
+					args.append(self.get_local(task,word))
 				else:
-					unpack_next=True
-					inpos+=1
-					if inpos>=len(sentence):
-						inpos=len(sentence)-1
-					# do helpcheck here
-
-			tempresult=None
-			success,tempresult=await clean_strings(self,task,sentence[inpos])
-			if is_abort(success):
-				return success,tempresult
-
-			if unpack_next:
-				valid,subsentence=unpack_strings(self,tempresult)
-				if is_abort(valid):
-					subsentence=[tempresult]
-
-				for word in subsentence:
-					args.append(word)
-					outpos+=1
-				inpos+=1
-				unpack_next=False
+					args.append(cell.value)
+			elif kind is Tclish_substitution:
+				success,tempresult=yield from self.code_steps(task,word.code,tail_return)
+				if success is not NORMAL:
+					return success,tempresult
+				args.append(tempresult)
+			elif kind is Tclish_splat:
+				success,tempresult=yield from self.word_steps(task,word.word)
+				if is_abort(success):
+					return success,tempresult
+				if tempresult.__class__ is str:
+					valid,subsentence=unpack_strings(self,tempresult)
+					args.extend(subsentence)
+				else:
+					# already parsed, spliced without going through the text
+					args.extend(tempresult.elements())
 			else:
+				success,tempresult=yield from self.word_steps(task,word)
+				if is_abort(success):
+					return success,tempresult
 				args.append(tempresult)
-				inpos+=1
-				outpos+=1
-
-
-		if is_abort(success) or (success is Tclish_response_flag.comment):
-			return success,result
 
 		field=None
 		if modifier:
 			if len(args)<1:
 				return self.error(task,"Modifiers requires a field name",command)
-			field=args[0]
-			val=task.get_value(field)
-			if val is None:
-				args[0]=""
-			else:
-				args[0]=val
-			command=command[:-1]
-
-		if (func := self.directives.get(command)) is not None:
-			success,result = await call_async(func,self,task,args)
+			field=self.load_modifier_field(task,args)
 
-		elif (func := self.commands.get(command)) is not None:
+		# looked up after the words, they may have redefined it
+		entry=self.dispatch.get(command)
+		if entry is None:
+			entry=self.resolve_command(command)
+		if task.handles:
+			entry=self.task_handle(task,command,entry)
 
-			success,result = await call_async(func,self,task,args)
-			if isinstance(success,bool):
-				raise ValueError(f"Error in {command}.\nsuccess flag from command has been changed to Tclish_response_flag enum. use vm.ok(value), vm.error(task,value), vm.comment(value) or vm.forced_return(value)")
-				if success:
-					success=Tclish_response_flag.normal
-				else:
-					success=Tclish_response_flag.error
-			elif not isinstance(success,Tclish_response_flag):
-				return self.error(task,f"{command} returned {str(success)} <{type(success)}> with the result: {str(result)}",command)
+		if entry is None:
+			success,result = self.error(task,"unknown command",command)
 
-		elif self.objects.is_object(command):
-			instance=self.objects.get_instance(command)
-			success,result = await self.objects.instance_command(instance,self,task,args)
+		elif entry.code is not None:
+			if tail and field is None and type(entry.code) is Tclish_code:
+				return TAIL_CALL,(entry.code,args)
+			# run by run_steps, see EVALUATION
+			success,result = yield self.eval_steps(task,entry.code,args)
 
+		else:
+			if not entry.takes_values:
+				text_args(args)
+			if not entry.is_async:
+				success,result = entry.function(self,task,args)
+			elif tail and field is None and entry.function is vmif:
+				success,result = yield from vmif(self,task,args,True)
+			else:
+				success,result = yield from entry.function(self,task,args)
+			if success.__class__ is not Tclish_response_flag:
+				return self.bad_response(task,command,success,result)
 
-		elif command in self.handles:
-			success,result = await call_async(self.handles[command]["handle"],self,task,args)
+		if field is None and result is not None:
+			return success,result
+		return self.finish_sentence(task,success,result,field)
 
-		elif (func := self.definitions.get(command,None)) is not None:
-			success,result = await self.eval(task,func["function"],args=args)
+	def load_modifier_field(self,task,args):
+		"""replace the field name in args[0] with its current value, returns the field name"""
+		field=args[0]
+		val=task.get_value(field)
+		if val is None:
+			args[0]=""
 		else:
-			success,result = self.error(task,"unknown command",command)
+			args[0]=val
+		return field
+
+	def bad_response(self,task,command,success,result):
+		if isinstance(success,bool):
+			raise ValueError(f"Error in {command}.\nsuccess flag from command has been changed to Tclish_response_flag enum. use vm.ok(value), vm.error(task,value), vm.comment(value) or vm.forced_return(value)")
+		return self.error(task,f"{command} returned {str(success)} <{type(success)}> with the result: {str(result)}",command)
 
+	def finish_sentence(self,task,success,result,field):
 		if result is None:
 			success,result = self.error(task,"something went horribly wrong","evalSentence")
 		if is_abort(success):
 			return success,result
 
-		if modifier:
+		if field is not None:
 			if not task.update_value(field,result):
 				task.set_value(field,result)
 
 		return success,result
 
+	##=============================================================##
+	##  SYNC CLASSIFICATION                                        ##
+	##=============================================================##
+	# code that only reaches plain functions never suspends, plain functions
+	# like translated definitions can run it with run_inline.
+	# whether code qualifies is decided from the dispatch table and cached
+	# on it until dispatch_version changes.
+
+	def code_is_sync(self,code):
+		"""
+		whether code only reaches plain functions.
+		a code reached again while it is being classified, through recursion,
+		counts as sync for now: the cycle is sync unless something else on it isn't.
+		results that leaned on that are only kept once the outermost classification
+		is done and tells whether the assumption held.
+		"""
+		if code.sync_version==self.dispatch_version:
+			return self.cached_sync(code)
+		self.start_sync_check(code)
+		sync=True
+		for sentence in code.sentences:
+			if not (self.cached_sync(sentence) if sentence.sync_version==self.dispatch_version else self.sentence_is_sync(sentence)):
+				sync=False
+				break
+		return self.end_sync_check(code,sync)
+
+	def cached_sync(self,item):
+		sync=item.sync
+		if sync is None:
+			# still being classified further up
+			self.sync_assumed+=1
+			return True
+		return sync
+
+	def start_sync_check(self,item):
+		item.sync=None
+		item.sync_version=self.dispatch_version
+		self.sync_checks.append(self.sync_assumed)
+
+	def end_sync_check(self,item,sync):
+		assumed=self.sync_checks.pop()
+		if not sync:
+			# the assumptions only ever make things look sync, a no stands
+			item.sync=False
+		elif self.sync_assumed==assumed:
+			item.sync=True
+		else:
+			self.sync_provisional.append(item)
+		if not self.sync_checks:
+			provisional=self.sync_provisional
+			# the codes assumed sync are all on the way to this one,
+			# they are sync if it is, and undecided if it isn't
+			for other in provisional:
+				if sync:
+					other.sync=True
+				else:
+					other.sync=False
+					other.sync_version=-1
+			provisional.clear()
+			self.sync_assumed=0
+		return sync
+
+	def word_is_sync(self,word):
+		kind=type(word)
+		if kind is Tclish_literal or kind is Tclish_variable or kind is Tclish_local:
+			return True
+		if kind is Tclish_substitution:
+			return self.code_is_sync(word.code)
+		if kind is Tclish_interpolation:
+			return all(self.word_is_sync(part) for part in word.parts)
+		if kind is Tclish_splat:
+			return self.word_is_sync(word.word)
+		return False
+
+	def sentence_is_sync(self,sentence):
+		self.start_sync_check(sentence)
+		return self.end_sync_check(sentence,self.check_sentence_sync(sentence))
+
+	def check_sentence_sync(self,sentence):
+		if sentence.name is None or sentence.name in self.sync_barriers:
+			return False
+		entry=self.dispatch.get(sentence.name)
+		if entry is None:
+			entry=self.resolve_command(sentence.name)
+		if entry is None:
+			return False
+		for word in sentence.args:
+			if not self.word_is_sync(word):
+				return False
+
+		if entry.code is not None:
+			return type(entry.code) is Tclish_code and self.code_is_sync(entry.code)
+		if entry.code_args is not None:
+			# control commands are only sync when the code they run is known up front
+			values=[]
+			for word in sentence.args:
+				if type(word) is not Tclish_literal:
+					return False
+				values.append(word.value)
+			for body in entry.code_args(values):
+				ok,code=self.compile(None,body)
+				if ok is Tclish_response_flag.error or not self.code_is_sync(code):
+					return False
+			return True
+		return not entry.is_async
+
+	def sync_names(self,code,names,seen=None):
+		"""
+		add to names the command names code reaches, through the definitions it calls
+		and the code its control commands run: the names whose change can make it async.
+		"""
+		if seen is None:
+			seen=set()
+		if code in seen:
+			return
+		seen.add(code)
+		for sentence in code.sentences:
+			name=sentence.name
+			if name is None:
+				continue
+			names.add(name)
+			for word in sentence.args:
+				self.word_names(word,names,seen)
+			entry=self.dispatch.get(name)
+			if entry is None:
+				entry=self.resolve_command(name)
+			if entry is None:
+				continue
+			if type(entry.code) is Tclish_code:
+				self.sync_names(entry.code,names,seen)
+			elif entry.code_args is not None and all(type(word) is Tclish_literal for word in sentence.args):
+				for body in entry.code_args([word.value for word in sentence.args]):
+					ok,body_code=self.compile(None,body)
+					if ok is not Tclish_response_flag.error:
+						self.sync_names(body_code,names,seen)
+
+	def word_names(self,word,names,seen):
+		kind=type(word)
+		if kind is Tclish_substitution:
+			self.sync_names(word.code,names,seen)
+		elif kind is Tclish_interpolation:
+			for part in word.parts:
+				self.word_names(part,names,seen)
+		elif kind is Tclish_splat:
+			self.word_names(word.word,names,seen)
+
+	def run_inline(self,task,coroutine,label):
+		"""
+		finish a coroutine or evaluation steps from a plain function.
+		it works as long as they don't actually suspend, which code classified sync doesn't.
+		"""
+		depth=len(task.states)
+		try:
+			coroutine.send(None)
+		except StopIteration as done:
+			return done.value
+		coroutine.close()
+		task.unwind(depth)
+		return self.error(task,"async command reached from a synchronous context",label)
+
 	def with_handle(self,name,handle,helps):
 		return Tclish_handle(self,name,handle,helps)
 
@@ -0,0 +1,86 @@
+import heapq
+
+class Tclish_timer():
+	"""a scheduled event and what to run, payload is None once it is cancelled"""
+	__slots__=("id","time","payload")
+	def __init__(self,id,time,payload):
+		self.id=id
+		self.time=time
+		self.payload=payload
+
+class Tclish_timer_queue():
+	"""
+	Timers kept in a heap of (time,id,timer), the interpreter's event queue.
+
+	Timers are numbered in the order they are added, the number breaks ties
+	between timers due at the same time, so they come out in that order
+	and the payloads are never compared.
+	Cancelling a timer only marks it, pop and next_time skip marked timers when
+	they reach the top of the heap. Once more than half of the heap is marked
+	it is rebuilt without them, so cancelled timers don't pile up.
+
+	Adding and popping a timer is O(log n), not the O(1) of the timing wheel
+	the queue was first written as: benchmarks/bench_timers.py measures a few
+	microseconds per timer with a million pending, and the heap runs timers
+	at their exact time, where the wheel rounded them to its ticks.
+	Cancelling is O(1), the rebuilds cost O(n) once every n/2 cancellations.
+	"""
+	def __init__(self):
+		self.heap=[]
+		# id -> pending Tclish_timer, for cancel
+		self.timers={}
+		self.sequence=0
+		# marked timers still in the heap
+		self.cancelled=0
+
+	def __len__(self):
+		return len(self.timers)
+
+	def add(self,time,payload):
+		"""schedule payload for time, returns the id that cancels it"""
+		self.sequence+=1
+		timer=Tclish_timer(self.sequence,time,payload)
+		self.timers[timer.id]=timer
+		heapq.heappush(self.heap,(time,timer.id,timer))
+		return timer.id
+
+	def cancel(self,id):
+		"""remove the timer, False if it isn't pending"""
+		timer=self.timers.pop(id,None)
+		if timer is None:
+			return False
+		timer.payload=None
+		self.cancelled+=1
+		if self.cancelled*2>len(self.heap):
+			self.heap=[entry for entry in self.heap if entry[2].payload is not None]
+			heapq.heapify(self.heap)
+			self.cancelled=0
+		return True
+
+	def drop_cancelled(self):
+		"""pop the marked timers off the top of the heap"""
+		heap=self.heap
+		while heap and heap[0][2].payload is None:
+			heapq.heappop(heap)
+			self.cancelled-=1
+
+	def pop(self,now):
+		"""the payload of the next timer due at now, None if there is none"""
+		self.drop_cancelled()
+		heap=self.heap
+		if not heap or heap[0][0]>now:
+			return None
+		time,id,timer=heapq.heappop(heap)
+		del self.timers[id]
+		return timer.payload
+
+	def next_time(self):
+		"""when the next timer is due, None if nothing is pending"""
+		self.drop_cancelled()
+		if self.heap:
+			return self.heap[0][0]
+		return None
+
+	def pending(self):
+		"""the pending timers, in the order they are due"""
+		return sorted(self.timers.values(),key=lambda timer:(timer.time,timer.id))
@@ -0,0 +1,232 @@
+##=================================================================##
+##  VALUES                                                         ##
+##=================================================================##
+# values that keep a native form next to their text, like a Tcl_Obj.
+# the text is only built when something asks for it.
+# commands registered with values=True receive these as they are,
+# every other command gets str() of them.
+import itertools
+
+from .std_utils import pack_strings,unpack_strings,to_number,to_string
+
+
+class Tclish_value():
+	"""
+	base class, subclasses implement render() to produce the text.
+	behaves like the string it renders to.
+	"""
+	__slots__=("text",)
+
+	def render(self):
+		raise NotImplementedError
+
+	def elements(self):
+		"""the value read as a list, must not be modified"""
+		ok,items=unpack_strings(None,str(self))
+		return items
+
+	def as_number(self):
+		"""the value read as a number, None if it isn't one"""
+		return to_number(str(self))
+
+	def iter_items(self):
+		"""iterate over the value read as a list"""
+		return iter(self.elements())
+
+	def __str__(self):
+		text=self.text
+		if text is None:
+			text=self.text=self.render()
+		return text
+
+	def __repr__(self):
+		return f"{type(self).__name__}({str(self)!r})"
+
+	def __format__(self,spec):
+		return format(str(self),spec)
+
+	def __eq__(self,other):
+		if isinstance(other,(str,Tclish_value)):
+			return str(self)==str(other)
+		return NotImplemented
+
+	def __ne__(self,other):
+		if isinstance(other,(str,Tclish_value)):
+			return str(self)!=str(other)
+		return NotImplemented
+
+	def __hash__(self):
+		return hash(str(self))
+
+	def __len__(self):
+		return len(str(self))
+
+	def __iter__(self):
+		return iter(str(self))
+
+	def __getitem__(self,key):
+		return str(self)[key]
+
+	def __contains__(self,item):
+		return str(item) in str(self)
+
+	def __add__(self,other):
+		return str(self)+str(other)
+
+	def __radd__(self,other):
+		return str(other)+str(self)
+
+	def __getattr__(self,name):
+		# string methods, lower(), startswith() and friends
+		return getattr(str(self),name)
+
+
+class Tclish_list(Tclish_value):
+	"""
+	a list with its parsed items.
+	values appended to each other share one python list as long as
+	nobody else appended to it in the meantime, making lappend amortized O(1).
+	"""
+	__slots__=("items","length")
+
+	def __init__(self,items,text=None,length=None):
+		self.items=items
+		self.length=len(items) if length is None else length
+		self.text=text
+
+	def render(self):
+		return pack_strings(None,self.elements())
+
+	def elements(self):
+		"""the shared items when nothing was appended to them, read them right away"""
+		items=self.items
+		if len(items)==self.length:
+			return items
+		return items[:self.length]
+
+	def iter_items(self):
+		# a loop appending to the list it iterates over extends the shared items,
+		# it only sees the ones that were there when it started
+		return itertools.islice(self.items,self.length)
+
+	def index(self,i,default=""):
+		"""the item at 0 based index i"""
+		if i<0 or i>=self.length:
+			return default
+		return self.items[i]
+
+	def append(self,new_items):
+		"""a new list with new_items appended, self is left as it was"""
+		items=self.items
+		if len(items)!=self.length:
+			# someone else already appended to the shared items
+			items=items[:self.length]
+		items.extend(new_items)
+		return Tclish_list(items,length=len(items))
+
+
+class Tclish_number(Tclish_value):
+	"""
+	a number returned by a math command.
+	the next math command reads number directly instead of parsing the text.
+	"""
+	__slots__=("number",)
+
+	def __init__(self,number,text=None):
+		if number.__class__ is float and number.is_integer():
+			# same number the text would parse back to
+			number=int(number)
+		self.number=number
+		self.text=text
+
+	def render(self):
+		return to_string(self.number)
+
+	def as_number(self):
+		return self.number
+
+
+class Tclish_range(Tclish_value):
+	"""
+	the numbers of a python range, items are only made when they are asked for.
+	iterating, counting and indexing don't build the list.
+	"""
+	__slots__=("numbers","length")
+
+	def __init__(self,numbers,text=None):
+		self.numbers=numbers
+		self.length=len(numbers)
+		self.text=text
+
+	def render(self):
+		return pack_strings(None,map(str,self.numbers))
+
+	def elements(self):
+		"""a new list on every call"""
+		return [Tclish_number(n) for n in self.numbers]
+
+	def iter_items(self):
+		return map(Tclish_number,self.numbers)
+
+	def index(self,i,default=""):
+		if i<0 or i>=self.length:
+			return default
+		return Tclish_number(self.numbers[i])
+
+	def append(self,new_items):
+		items=self.elements()
+		items.extend(new_items)
+		return Tclish_list(items)
+
+
+class Tclish_error(Tclish_value):
+	"""
+	the result of an error.
+	keeps the label and message, the error it wraps if any, and the labels of the frames
+	that were on the stack, innermost first. the text is only formatted when it is read.
+	"""
+	__slots__=("label","message","cause","labels")
+
+	def __init__(self,label,message,labels=(),cause=None):
+		self.label=label
+		self.message=message
+		self.cause=cause
+		self.labels=labels
+		self.text=None
+
+	def render(self):
+		msg=[f"<{self.label}> {self.message}"]
+		if self.cause is not None:
+			msg.append(str(self.cause))
+		if self.labels:
+			msg.append("while evaluating:{"+str(self.labels[0])+"}")
+			msg.append("stack:")
+			for i,label in enumerate(self.labels):
+				msg.append(str(i).rjust(4)+": {"+str(label)+"}")
+		return "\n".join(msg)
+
+
+def text_args(args):
+	"""replace value objects in args by their text, in place"""
+	for i,arg in enumerate(args):
+		if arg.__class__ is not str:
+			args[i]=str(arg)
+
+def list_value(value):
+	"""value as a Tclish_list or Tclish_range, plain strings are parsed"""
+	if type(value) is Tclish_list or type(value) is Tclish_range:
+		return value
+	if type(value) is str:
+		ok,items=unpack_strings(None,value)
+		return Tclish_list(items,text=value)
+	return Tclish_list(value.elements())
+
+def list_items(value):
+	"""
+	iterate over the items a list has now, ranges are not expanded.
+	items appended while the loop runs are not part of it.
+	"""
+	if type(value) is str:
+		ok,items=unpack_strings(None,value)
+		return iter(items)
+	return value.iter_items()
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from tclish import Tclish_interpreter, Tclish_task
+from tclish.std_utils import to_text
+
+
+def make_vm(**options):
+	vm=Tclish_interpreter(**options)
+	vm.add_stdlibs()
+	return vm
+
+@pytest.fixture
+def vm():
+	return make_vm()
+
+@pytest.fixture
+def evaluate(vm):
+	"""evaluate a program on vm in a task of its own, returns the flag and the text of the result"""
+	def evaluate(program,task=None):
+		task=task if task is not None else Tclish_task(program)
+		ok,res=asyncio.run(vm.eval(task,program))
+		return ok,to_text(res)
+	return evaluate
+
+@pytest.fixture
+def result(vm,evaluate):
+	"""the text of the result of a program that has to succeed"""
+	def result(program,task=None):
+		ok,res=evaluate(program,task)
+		assert vm.is_ok(ok),res
+		return res
+	return result
@@ -0,0 +1,54 @@
+def test_values_come_out_in_order(vm,result):
+	program="""set c [chan create 2]
+set producer [spawn {
+	args map c
+	for n [range 10] {chan put $c $n}
+	chan close $c
+} $c]
+set total {}
+foreach n $c {set total [+ $total $n]}
+await $producer
+get total"""
+	assert result(program)=="55"
+	assert not vm.channels
+
+def test_get_fails_once_closed_and_drained(vm,result,evaluate):
+	program="""set c [chan create]
+chan put $c a b
+chan close $c
+chan get $c
+chan get $c
+chan get $c"""
+	ok,res=evaluate(program)
+	assert vm.is_error(ok)
+	assert "is closed" in res
+	# drained, the handle doesn't name it anymore
+	assert not vm.channels
+
+def test_a_closed_channel_is_kept_until_drained(vm,result):
+	assert result("set c [chan create]\nchan put $c a b\nchan close $c\nchan get $c")=="a"
+	assert list(vm.channels)==["chan1"]
+	assert result("chan get chan1")=="b"
+	assert not vm.channels
+
+def test_closing_an_empty_channel_forgets_it(vm,result):
+	result("chan close [chan create]")
+	assert not vm.channels
+
+def test_put_on_a_closed_channel_fails(vm,evaluate):
+	ok,res=evaluate("set c [chan create]\nchan close $c\nchan put $c a")
+	assert vm.is_error(ok)
+
+def test_put_fails_when_closed_while_waiting(vm,evaluate):
+	program="""set c [chan create 1]
+set producer [spawn {
+	args map c
+	chan put $c a b c d
+} $c]
+sleep 0.01
+chan close $c
+chan get $c
+await $producer"""
+	ok,res=evaluate(program)
+	assert vm.is_error(ok)
+	assert "was closed while putting" in res
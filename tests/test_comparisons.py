@@ -0,0 +1,35 @@
+import pytest
+
+from tclish import Tclish_task
+
+
+@pytest.mark.parametrize("program,expected",[
+	("< 1 2","true"),
+	("< 1 2 3","true"),
+	("< 1 1",""),
+	("< 2 1",""),
+	("> 2 1","true"),
+	("> 1 1",""),
+])
+def test_strict_comparisons(result,program,expected):
+	assert result(program)==expected
+
+@pytest.mark.parametrize("name,args,expected",[
+	("<=",["1","1"],"true"),
+	("<=",["1","2","2"],"true"),
+	("<=",["2","1"],""),
+	(">=",["2","2"],"true"),
+	(">=",["1","2"],""),
+])
+def test_comparisons_or_equal(vm,name,args,expected):
+	# called directly, the parser reads <= and >= as < and > followed by a word starting with =
+	ok,res=vm.commands.lookup(name)["function"](vm,Tclish_task(""),args)
+	assert vm.is_ok(ok)
+	assert res==expected
+
+def test_comparisons_need_numbers(vm,evaluate):
+	ok,res=evaluate("< 1 a")
+	assert vm.is_error(ok)
+
+def test_a_counting_loop_stops_at_its_bound(result):
+	assert result("set i 0\nwhile {< $i 5} {set i [+ $i 1]}\nget i")=="5"
@@ -0,0 +1,56 @@
+from tclish.compiler import Tclish_literal
+
+
+def test_pure_calls_with_literals_are_folded(vm,result):
+	ok,code=vm.compile(None,"set a [+ 1 [* 2 3]]")
+	word=code.sentences[0].args[1]
+	assert type(word) is Tclish_literal
+	assert str(word.value)=="7"
+	assert result("set a [+ 1 [* 2 3]]\nget a")=="7"
+
+def test_variables_are_not_folded(vm):
+	ok,code=vm.compile(None,"set a [+ 1 $b]")
+	assert type(code.sentences[0].args[1]) is not Tclish_literal
+
+def test_failing_calls_are_not_folded(vm,evaluate):
+	ok,code=vm.compile(None,"set x [sub abc x 2]")
+	assert type(code.sentences[0].args[1]) is not Tclish_literal
+	ok,res=evaluate("set x [sub abc x 2]")
+	assert vm.is_error(ok)
+
+def test_replacing_a_command_unfolds(vm,result):
+	assert result("proc f {} {return [lower ABC]}\nf")=="abc"
+	assert result('set b "x [lower FOO]"\nget b')=="x foo"
+	vm.commands.remove("lower")
+	vm.add_command("lower",lambda vm,task,args:vm.ok("new"),"")
+	assert result("f")=="new"
+	assert result('set b "x [lower FOO]"\nget b')=="x new"
+	assert "lower" not in vm.folds
+
+def test_folds_go_with_the_parse_cache(vm,result):
+	import gc
+	result("set a [lower ABC]")
+	assert len(vm.folds["lower"])>0
+	vm.parse_cache.clear()
+	gc.collect()
+	assert len(vm.folds["lower"])==0
+
+def test_only_commands_registered_as_pure_are_folded(vm):
+	calls=[]
+	def counted(vm,task,args):
+		calls.append(args)
+		return vm.ok("x")
+	vm.add_command("counted",counted,"")
+	vm.commands.add("twice",lambda vm,task,args:vm.ok(args[0]*2),"",pure=True)
+	ok,code=vm.compile(None,"list [counted 1] [twice ab]")
+	counted_word,twice_word=code.sentences[0].args
+	assert type(counted_word) is not Tclish_literal
+	assert type(twice_word) is Tclish_literal
+	assert twice_word.value=="abab"
+	assert calls==[]
+
+def test_pure_calls_are_folded_in_definition_bodies(vm,result):
+	result("proc area {} {* 6 [+ 3 4]}")
+	word=vm.definition_code["area"].sentences[-1].args[1]
+	assert type(word) is Tclish_literal
+	assert result("area")=="42"
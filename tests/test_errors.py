@@ -0,0 +1,46 @@
+import asyncio
+
+from tclish import Tclish_task
+from tclish.values import Tclish_error
+
+
+def test_errors_are_formatted_when_read(vm):
+	task=Tclish_task("")
+	task.push(label="inner")
+	ok,err=vm.error(task,"went wrong","here")
+	assert vm.is_error(ok)
+	assert type(err) is Tclish_error
+	assert err.text is None
+	assert (err.label,err.message)==("here","went wrong")
+	assert str(err)=="<here> went wrong\nwhile evaluating:{inner}\nstack:\n   0: {inner}\n   1: {}"
+
+def test_errors_keep_the_labels_of_the_stack_they_were_made_on(vm):
+	task=Tclish_task("")
+	task.push(label="first")
+	ok,err=vm.error(task,"message","label")
+	# the frame is reused by the next push
+	task.pop()
+	task.push(label="second")
+	assert err.labels==("first","")
+	assert "second" not in str(err)
+
+def test_a_wrapped_error_goes_between_the_message_and_the_stack(vm):
+	ok,cause=vm.error(None,"inner problem","inner")
+	ok,err=vm.error(None,"outer problem","outer",cause=cause)
+	assert str(err)=="<outer> outer problem\n<inner> inner problem"
+
+def test_script_errors_render_like_the_text_they_replace(vm):
+	task=Tclish_task("sub abc x 2")
+	ok,err=asyncio.run(vm.eval(task,"sub abc x 2"))
+	assert vm.is_error(ok)
+	assert str(err).startswith("<substring> start index must be a valid integer\nwhile evaluating:{sub abc x 2}")
+
+def test_try_hands_the_error_to_catch(result):
+	assert result("try {sub abc x 2} catch {list caught}")=="{'caught'}"
+	assert result("try {sub abc x 2} catch {args map e\nget e}").startswith("<substring>")
+
+def test_errors_behave_like_their_text(vm):
+	ok,err=vm.error(None,"oops","label")
+	assert err=="<label> oops"
+	assert "oops" in err
+	assert err.startswith("<label>")
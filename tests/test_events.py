@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from tclish import Tclish_task
+
+
+@pytest.fixture
+def ran(vm):
+	"""names of the events that ran, the event stop also ends run_events"""
+	ran=[]
+	def note(vm,task,args):
+		ran.append(args[0])
+		return vm.ok("")
+	def stop(vm,task,args):
+		ran.append("stop")
+		vm.stop_events()
+		return vm.ok("")
+	vm.add_command("note",note,"")
+	vm.add_command("stop",stop,"")
+	return ran
+
+def run(vm,*coroutines,timeout=2):
+	async def main():
+		await asyncio.wait_for(asyncio.gather(vm.run_events(),*coroutines),timeout)
+	asyncio.run(main())
+
+def test_events_run_in_the_order_they_come_due(vm,ran):
+	task=Tclish_task("")
+	vm.push_event(task,0.03,"stop")
+	vm.push_event(task,0.02,"note",args=["second"])
+	vm.push_event(task,0.01,"note",args=["first"])
+	run(vm)
+	assert ran==["first","second","stop"]
+	assert vm.event_wakeup is None
+
+def test_push_event_wakes_an_idle_loop(vm,ran):
+	async def later():
+		await asyncio.sleep(0.01)
+		vm.push_event(Tclish_task(""),0,"stop")
+	start=time.perf_counter()
+	run(vm,later())
+	assert ran==["stop"]
+	assert time.perf_counter()-start<1
+
+def test_an_earlier_event_wakes_a_loop_waiting_for_a_later_one(vm,ran):
+	task=Tclish_task("")
+	vm.push_event(task,60,"note",args=["late"])
+	async def later():
+		await asyncio.sleep(0.01)
+		vm.push_event(task,0,"stop")
+	run(vm,later())
+	assert ran==["stop"]
+	assert len(vm.event_queue)==1
+
+def test_stop_events_from_outside_the_loop(vm,ran):
+	async def later():
+		await asyncio.sleep(0.01)
+		vm.stop_events()
+	run(vm,later())
+	assert ran==[]
+	assert not vm.events_running
+
+def test_failed_events_are_reported(vm,ran):
+	reported=[]
+	def on_error(vm,task,args):
+		reported.append(args[0])
+		vm.stop_events()
+		return vm.ok("")
+	vm.add_command("on-event-error",on_error,"")
+	vm.push_event(Tclish_task(""),0,"error",args=["broken"])
+	run(vm)
+	assert reported==["error"]
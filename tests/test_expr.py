@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.mark.parametrize("expression,expected",[
+	("1 + 2 * 3","7"),
+	("(1 + 2) * 3","9"),
+	("7 / 2","3.5"),
+	("7 % 3","1"),
+	("-3 + 1","-2"),
+	("2 ** 3","8"),
+	("2 ** 3 ** 2","512"),
+	("1 < 2 && 3 > 4",""),
+	("1 < 2 || 3 > 4","true"),
+	("2 == 2","true"),
+	("!0","true"),
+	("1 <= 1","true"),
+	('"abc" == "abc"',"true"),
+	("1 ? 2 : 3","2"),
+	("max(1, 5, 3) + abs(-2)","7"),
+	("sqrt(16)","4"),
+])
+def test_expressions(result,expression,expected):
+	assert result(f"expr {{{expression}}}")==expected
+
+def test_variables_are_read_when_it_runs(result):
+	assert result("set a 4\nexpr {$a * $a - 1}")=="15"
+	assert result("set a 5\nexpr {$a * $a - 1}")=="24"
+
+def test_unbraced_arguments_are_joined(result):
+	assert result("expr 1 + 2")=="3"
+
+def test_expressions_are_compiled_once(vm,result):
+	result("set i 0\nwhile {< $i 10} {set i [expr {$i + 1}]}")
+	assert vm.expr_cache.get("$i + 1") is not None
+
+@pytest.mark.parametrize("expression",["1 +","$nope + 1","1 || [sub abc x 2]","sqrt(-1)","foo(1)"])
+def test_bad_expressions_fail(vm,evaluate,expression):
+	ok,res=evaluate(f"expr {{{expression}}}")
+	assert vm.is_error(ok)
+	assert res.startswith("<expr>")
@@ -0,0 +1,70 @@
+from tclish import Tclish_task
+
+
+def test_inner_bindings_hide_outer_ones_until_popped():
+	task=Tclish_task("")
+	task.set_value("a","outer")
+	task.push()
+	assert task.get_value("a")=="outer"
+	task.set_value("a","inner")
+	assert task.get_value("a")=="inner"
+	task.pop()
+	assert task.get_value("a")=="outer"
+
+def test_names_bound_by_a_frame_go_away_with_it():
+	task=Tclish_task("")
+	task.push()
+	task.set_value("b","x")
+	task.pop()
+	assert task.get_value("b") is None
+	assert "b" not in task.vars
+
+def test_unset_brings_back_the_outer_binding():
+	task=Tclish_task("")
+	task.set_value("a",1)
+	task.push()
+	task.set_value("a",2)
+	task.unset_value("a")
+	assert task.get_value("a")==1
+
+def test_update_changes_the_innermost_binding():
+	task=Tclish_task("")
+	task.set_value("a",1)
+	task.push()
+	assert task.update_value("a",5)
+	task.pop()
+	assert task.get_value("a")==5
+	assert not task.update_value("missing",1)
+
+def test_lookups_at_depth_read_one_table():
+	task=Tclish_task("")
+	task.set_value("top","value")
+	for depth in range(60):
+		task.push(label=f"frame {depth}")
+		task.set_value(f"local{depth}",depth)
+	assert task.get_value("top")=="value"
+	assert task.get_value("local59")==59
+	task.unwind(1)
+	assert set(task.vars)=={"top"}
+
+def test_popped_frames_are_reused():
+	task=Tclish_task("")
+	task.push(label="first")
+	frame=task.states[-1]
+	task.pop()
+	task.push(label="second")
+	assert task.states[-1] is frame
+	assert frame.label=="second" and not frame.shadowed
+
+def test_push_fails_past_the_stack_limit():
+	task=Tclish_task("")
+	task.stack_limit=10
+	while task.push():
+		pass
+	assert len(task.states)==task.stack_limit+1
+
+def test_definitions_see_the_caller_and_keep_their_own_bindings(result):
+	result("proc show {} {get outer}")
+	result("proc scribble {} {set outer changed}")
+	assert result("set outer caller\nshow")=="caller"
+	assert result("set outer caller\nscribble\nget outer")=="caller"
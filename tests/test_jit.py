@@ -0,0 +1,73 @@
+import pytest
+
+from conftest import make_vm
+
+
+@pytest.fixture
+def vm():
+	return make_vm(jit_threshold=2)
+
+def jitted(vm,name):
+	return vm.definition_code[name].jit is not None
+
+def call(result,sentence,times=4):
+	return [result(sentence) for _ in range(times)]
+
+def test_translations_give_the_interpreted_results(vm,result):
+	program="""proc fib {n} {
+	if {< $n 2} {return $n}
+	+ [fib [- $n 1]] [fib [- $n 2]]
+}"""
+	result(program)
+	assert result("fib 15")=="610"
+	assert jitted(vm,"fib")
+	assert result("fib 15")=="610"
+
+def test_calls_to_async_definitions_stay_interpreted(vm,result):
+	result("proc slow {} {sleep 0\n+ 1 1}")
+	result("proc hot {} {\n\tset a [slow]\n\t+ $a 1\n}")
+	assert call(result,"hot")==["3"]*4
+	assert not jitted(vm,"hot")
+
+def test_tail_calls_to_async_definitions_are_translated(vm,result):
+	result("proc slow {n} {sleep 0\n+ $n 1}")
+	result("proc hot {n} {slow [+ $n 1]}")
+	assert call(result,"hot 1")==["3"]*4
+	assert jitted(vm,"hot")
+
+def test_redefining_a_callee_drops_the_translation(vm,result):
+	result("proc f {} {+ 1 1}")
+	result("proc hot {} {+ [f] 1}")
+	assert call(result,"hot")==["3"]*4
+	assert jitted(vm,"hot")
+	result("proc f {} {+ 2 2}")
+	assert not jitted(vm,"hot")
+	assert call(result,"hot")==["5"]*4
+
+def test_a_callee_becoming_async_further_down_drops_the_translation(vm,result):
+	result("proc inner {} {+ 1 1}")
+	result("proc middle {} {inner}")
+	result("proc hot {} {+ [middle] 1}")
+	assert call(result,"hot")==["3"]*4
+	assert jitted(vm,"hot")
+	result("proc inner {} {sleep 0\n+ 2 2}")
+	assert not jitted(vm,"hot")
+	assert call(result,"hot")==["5"]*4
+
+def test_bodies_calling_a_later_definition_are_translated_once_it_is_defined(vm,result,evaluate):
+	result("proc hot {} {+ [later] 1}")
+	for _ in range(4):
+		assert vm.is_error(evaluate("hot")[0])
+	assert not jitted(vm,"hot")
+	result("proc later {} {+ 1 1}")
+	assert call(result,"hot")==["3"]*4
+	assert jitted(vm,"hot")
+
+def test_bodies_calling_an_async_definition_are_tried_again_when_it_changes(vm,result):
+	result("proc slow {} {sleep 0\n+ 1 1}")
+	result("proc hot {} {+ [slow] 1}")
+	assert call(result,"hot")==["3"]*4
+	assert not jitted(vm,"hot")
+	result("proc slow {} {+ 2 2}")
+	assert call(result,"hot")==["5"]*4
+	assert jitted(vm,"hot")
@@ -0,0 +1,39 @@
+import pytest
+
+from tclish.std_utils import pack_strings, unpack_strings
+
+
+ITEMS=[
+	[],
+	["a"],
+	["a","b","c"],
+	[""],
+	["","",""],
+	["it's","say \"hi\"","back\\slash"],
+	["{braces}","}","{","[bracket]","$dollar"],
+	["line\nbreak","tab\there","  spaces  "],
+	["ünïcødé","日本語","emoji 🎉"],
+	["'","''","\\'"],
+]
+
+@pytest.mark.parametrize("items",ITEMS)
+def test_round_trip(items):
+	ok,decoded=unpack_strings(None,pack_strings(None,items))
+	assert ok
+	assert decoded==items
+
+def test_known_encodings():
+	assert pack_strings(None,[])=="{}"
+	assert pack_strings(None,["a","b"])=="{'a''b'}"
+	assert unpack_strings(None,"{'a''b'}")==(True,["a","b"])
+
+def test_nested_lists_round_trip():
+	inner=pack_strings(None,["x","y z"])
+	ok,decoded=unpack_strings(None,pack_strings(None,["a",inner]))
+	assert decoded==["a",inner]
+	assert unpack_strings(None,decoded[1])==(True,["x","y z"])
+
+def test_large_lists_round_trip():
+	items=[f"item {n}" if n%3 else f"it's {n}" for n in range(200_000)]
+	ok,decoded=unpack_strings(None,pack_strings(None,items))
+	assert decoded==items
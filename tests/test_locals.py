@@ -0,0 +1,40 @@
+from tclish.compiler import Tclish_local
+
+
+def test_parameters_and_locals_get_slots(vm,result):
+	result("proc area {w h} {\n\tset a [* $w $h]\n\tget a\n}")
+	code=vm.definition_code["area"]
+	assert code.layout=={"w":0,"h":1,"a":2}
+	assert code.params==("w","h")
+	# $w and $h in the body read their slots
+	words=code.body.sentences[0].args[1].code.sentences[0].args
+	assert [type(word) for word in words]==[Tclish_local,Tclish_local]
+	assert result("area 3 4")=="12"
+
+def test_definitions_without_bindings_have_no_layout(vm,result):
+	result("proc hello {} {list hello}")
+	assert vm.definition_code["hello"].layout is None
+	assert result("hello")==vm.pack_strings(["hello"])
+
+def test_missing_arguments_fail(vm,evaluate,result):
+	result("proc area {w h} {* $w $h}")
+	ok,res=evaluate("area 3")
+	assert vm.is_error(ok)
+	assert "argument <h> at pos 2 is missing" in res
+
+def test_recursive_calls_keep_their_own_slots(result):
+	result("proc fact {n} {\n\tif {< $n 2} {return 1}\n\tset m [- $n 1]\n\t* $n [fact $m]\n}")
+	assert result("fact 10")=="3628800"
+
+def test_braced_code_reads_locals_by_name(result):
+	result("proc pick {flag} {\n\tset x yes\n\tif {get flag} {get x} else {list no}\n}")
+	assert result("pick 1")=="yes"
+
+def test_a_local_that_isnt_set_yet_reads_the_callers_binding(result):
+	result("proc late {} {\n\tset seen $shared\n\tset shared mine\n\tlist $seen $shared\n}")
+	assert result("set shared caller\nlate")=="{'caller''mine'}"
+
+def test_defproc_with_args_map(vm,result):
+	result("defproc add {\n\targs map a b\n\t+ $a $b\n}")
+	assert vm.definition_code["add"].params==("a","b")
+	assert result("add 2 3")=="5"
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import make_vm
+
+
+@pytest.fixture(params=[None,2],ids=["interpreted","jit"])
+def vm(request):
+	return make_vm(jit_threshold=request.param)
+
+def test_while_counts(result):
+	assert result("set i 0\nwhile {< $i 1000} {set i [+ $i 1]}\nget i")=="1000"
+
+def test_while_that_never_runs(result):
+	assert result("set i 0\nwhile {} {set i 1}\nget i")=="0"
+
+def test_break_leaves_the_innermost_loop(result):
+	program="""set i 0
+set n 0
+while {< $i 3} {
+	set i [+ $i 1]
+	set j 0
+	while {true} {
+		set j [+ $j 1]
+		if {> $j 2} {break}
+		set n [+ $n 1]
+	}
+}
+get n"""
+	assert result(program)=="6"
+
+def test_continue_skips_the_rest_of_the_body(result):
+	program="""set i 0
+set n 0
+while {< $i 5} {
+	set i [+ $i 1]
+	if {= $i 3} {continue}
+	set n [+ $n $i]
+}
+get n"""
+	assert result(program)=="12"
+
+def test_foreach_and_for_honour_break_and_continue(result):
+	assert result("set n 0\nforeach x [range 5] {if {= $x 3} {continue}\nset n [+ $n $x]}\nget n")=="12"
+	assert result("set n 0\nfor x [range 5] {if {= $x 3} {break}\nset n [+ $n $x]}\nget n")=="3"
+
+def test_return_leaves_a_loop_in_a_definition(result):
+	result("proc first {} {\n\tset i 0\n\twhile {true} {\n\t\tset i [+ $i 1]\n\t\tif {> $i 4} {return $i}\n\t}\n}")
+	assert [result("first") for _ in range(3)]==["5"]*3
+
+@pytest.mark.parametrize("program",["break","continue","proc f {} {break}\nf"])
+def test_break_outside_of_a_loop_fails(vm,evaluate,program):
+	ok,res=evaluate(program)
+	assert vm.is_error(ok)
+	assert "outside of a loop" in res
+
+def test_a_failing_condition_fails_the_loop(vm,evaluate):
+	ok,res=evaluate("while {sub abc x 2} {}")
+	assert vm.is_error(ok)
@@ -0,0 +1,62 @@
+import pytest
+
+from conftest import make_vm
+
+
+@pytest.fixture(params=[None,2],ids=["interpreted","jit"])
+def vm(request):
+	return make_vm(jit_threshold=request.param)
+
+FIB="""proc fib {n} {
+	if {< $n 2} {return $n}
+	+ [fib [- $n 1]] [fib [- $n 2]]
+}"""
+
+def stats(vm,result,name):
+	ok,items=vm.unpack_strings(result(f"memo-cache {name}"))
+	assert ok
+	return dict(zip(items[::2],items[1::2]))
+
+def test_memoized_results_are_kept(vm,result):
+	result(FIB)
+	result("memoize fib 1000")
+	assert result("fib 60")=="1548008755920"
+	assert stats(vm,result,"fib")["misses"]=="61"
+	assert result("fib 60")=="1548008755920"
+	assert stats(vm,result,"fib")["misses"]=="61"
+
+def test_suspending_definitions_can_be_memoized(vm,result):
+	result("proc slow {n} {sleep 0\n* $n 2}")
+	result("memoize slow")
+	assert result("list [slow 2] [slow 2] [slow 3]")==vm.pack_strings(["4","4","6"])
+	counts=stats(vm,result,"slow")
+	assert (counts["hits"],counts["misses"])==("1","2")
+
+def test_errors_are_not_kept(vm,result,evaluate):
+	result("proc broken {n} {sub abc x 2}")
+	result("memoize broken")
+	for _ in range(2):
+		ok,res=evaluate("broken 1")
+		assert vm.is_error(ok)
+	assert stats(vm,result,"broken")["size"]=="0"
+
+def test_redefining_drops_the_kept_results(vm,result):
+	result("proc twice {n} {* $n 2}")
+	result("memoize twice")
+	assert result("twice 4")=="8"
+	result("proc twice {n} {* $n 3}")
+	assert result("twice 4")=="12"
+
+def test_clear_and_off(vm,result):
+	result("proc twice {n} {* $n 2}")
+	result("memoize twice")
+	result("twice 1\ntwice 2")
+	result("memo-cache twice clear {'1'}")
+	assert stats(vm,result,"twice")["size"]=="1"
+	result("memo-cache twice off")
+	assert "twice" not in vm.memos
+	assert result("twice 2")=="4"
+
+def test_memoize_needs_a_definition(vm,evaluate):
+	ok,res=evaluate("memoize nothing")
+	assert vm.is_error(ok)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from tclish import Tclish_task
+from tclish.values import Tclish_number
+from tclish.std_utils import to_number
+
+
+@pytest.mark.parametrize("program,expected",[
+	("+ 1 2","3"),
+	("/ 6 3","2"),
+	("+ 1.5 1.5","3"),
+	("/ 1 4","0.25"),
+	("- 5","-5"),
+	("- 10 3 2","5"),
+	("% 7 3","1"),
+	("* 99999999999 99999999999","9999999999800000000001"),
+	("+ 1 [* 2 3]","7"),
+	("+ 1 a 2","3"),
+	("floor 2.7","2"),
+	("integer? [/ 6 3]","true"),
+	("number? abc",""),
+])
+def test_math_results(result,program,expected):
+	assert result(program)==expected
+
+def test_math_commands_return_numbers(vm):
+	ok,res=asyncio.run(vm.eval(Tclish_task(""),"+ 1 2"))
+	assert type(res) is Tclish_number
+	assert res.number==3
+	assert res=="3"
+
+def test_numbers_are_read_without_parsing():
+	number=Tclish_number(2.5)
+	assert to_number(number)==2.5
+	# the text is only made when asked for
+	assert number.text is None
+	assert str(number)=="2.5"
+
+def test_integral_floats_read_as_integers():
+	number=Tclish_number(4.0)
+	assert number.number==4 and type(number.number) is int
+	assert str(number)=="4"
+
+def test_numbers_as_text(result):
+	assert result("set n [+ 1 2]\nget n")=="3"
+	assert result("lindex [list [+ 1 1] [* 2 2]] 2")=="4"
@@ -0,0 +1,41 @@
+from tclish import Tclish_task
+
+
+def test_programs_are_compiled_once(vm,result):
+	program="+ 1 2"
+	assert result(program)=="3"
+	misses=vm.parse_cache.misses
+	assert result(program)=="3"
+	assert vm.parse_cache.misses==misses
+	assert vm.parse_cache.hits>0
+
+def test_loop_body_is_parsed_once(vm,result):
+	vm.parse_cache.clear()
+	vm.parse_cache.reset_stats()
+	assert result("set n 0\nforeach i [range 50] {+= n $i}\nget n")=="1275"
+	# the program, the body and the range substitution
+	assert vm.parse_cache.misses<=3
+
+def test_cache_is_bounded(vm,result):
+	result("parse-cache size 4")
+	for n in range(10):
+		result(f"+ {n} 1")
+	assert len(vm.parse_cache)<=4
+	assert vm.parse_cache.evictions>0
+
+def test_stats_and_clear(vm,result):
+	result("+ 1 1")
+	ok,stats=vm.unpack_strings(result("parse-cache stats"))
+	assert stats[0::2]==["size","maxsize","hits","misses","evictions"]
+	result("parse-cache clear")
+	assert len(vm.parse_cache)<=1
+	assert result("parse-cache size")=="1024"
+
+def test_invalid_size(vm,evaluate):
+	ok,res=evaluate("parse-cache size -1")
+	assert vm.is_error(ok)
+
+def test_syntax_errors_are_not_cached(vm,evaluate):
+	ok,res=evaluate("set a }")
+	assert vm.is_error(ok)
+	assert "set a }" not in vm.parse_cache
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from tclish import Tclish_task
+from tclish.values import Tclish_range
+
+
+def items(vm,text):
+	ok,items=vm.unpack_strings(text)
+	assert ok
+	return items
+
+@pytest.mark.parametrize("program,expected",[
+	("range 5",["1","2","3","4","5"]),
+	("range -3",["-1","-2","-3"]),
+	("range 0",[]),
+	("range 2 5",["2","3","4","5"]),
+	("range 5 2",["5","4","3","2"]),
+	("range 1 3 9",["1","4","7"]),
+	("range 9 -3 1",["9","6","3"]),
+])
+def test_ranges(vm,result,program,expected):
+	assert items(vm,result(program))==expected
+
+@pytest.mark.parametrize("program",["range","range a","range 1.5","range 1 0 5"])
+def test_bad_ranges_fail(vm,evaluate,program):
+	ok,res=evaluate(program)
+	assert vm.is_error(ok)
+
+def test_consumers_read_the_range_directly(vm,result):
+	assert result("lcount [range 1000000]")=="1000000"
+	assert result("lindex [range 10 20] 3")=="12"
+	assert result("lreduce [range 100] {args map x i acc\n+ $acc $x} 0")=="5050"
+	assert items(vm,result("lfilter [range 10] {args map x\n= [% $x 2] 0}"))==["2","4","6","8","10"]
+	assert items(vm,result("lmap [range 3] {args map x\n* $x 10}"))==["10","20","30"]
+
+def test_a_range_is_only_rendered_when_its_text_is_read(vm):
+	task=Tclish_task("")
+	ok,res=asyncio.run(vm.eval(task,"set r [range 1000]\nset n 0\nforeach x $r {set n [+ $n $x]}\nlist $n $r"))
+	assert vm.is_ok(ok)
+	ok,(total,numbers)=vm.unpack_strings(res)
+	assert total=="500500"
+	assert len(items(vm,numbers))==1000
+	r=Tclish_range(range(1,4))
+	assert r.text is None
+	assert str(r)=="{'1''2''3'}"
+
+def test_appending_to_a_range_while_iterating_over_it(vm,result):
+	program="set r [range 3]\nforeach x $r {set r [lappend $r $x]}\nget r"
+	assert items(vm,result(program))==["1","2","3","1","2","3"]
+
+@pytest.mark.parametrize("command",[
+	"lreduce $l {args map x i acc\nset l [lappend $l $x]\n+ $acc 1} 0",
+	"lcount [lfilter $l {args map x\nset l [lappend $l $x]\ntrue}]",
+])
+def test_loops_over_a_list_they_append_to_see_its_items_once(result,command):
+	assert result(f"set l [lappend [list] 1 2 3]\n{command}")=="3"
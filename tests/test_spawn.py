@@ -0,0 +1,32 @@
+from tclish import stdlib_concurrency
+
+
+def test_await_returns_the_result(vm,result):
+	assert result("await [spawn {+ 1 2}]")=="3"
+	assert result("await [spawn {args map a b\n+ $a $b} 4 5]")=="9"
+
+def test_gather_keeps_the_order_of_the_handles(vm,result):
+	program="""set slow [spawn {sleep 0.02
+list slow}]
+set fast [spawn {list fast}]
+gather $slow $fast"""
+	assert result(program)==vm.pack_strings([vm.pack_strings(["slow"]),vm.pack_strings(["fast"])])
+
+def test_a_failed_task_fails_await(vm,evaluate):
+	ok,res=evaluate("await [spawn {sub abc x 2}]")
+	assert vm.is_error(ok)
+	assert "failed" in res
+
+def test_a_handle_is_collected_once(vm,evaluate):
+	ok,res=evaluate("set t [spawn {+ 1 1}]\nawait $t\nawait $t")
+	assert vm.is_error(ok)
+	assert not vm.spawned and not vm.unclaimed
+
+def test_finished_tasks_waiting_for_await_are_bounded(vm,result,monkeypatch):
+	monkeypatch.setattr(stdlib_concurrency,"unclaimed_limit",2)
+	result("spawn {sub abc x 2}\nspawn {+ 1 1}\nspawn {+ 2 2}\nset last [spawn {+ 3 3}]\nsleep 0.01")
+	assert list(vm.spawned)==["task3","task4"]
+	assert list(vm.unclaimed)==["task3","task4"]
+	# the forgotten task that failed is reported like a failed event
+	events=[timer.payload for timer in vm.event_queue.pending()]
+	assert [(command,args[0]) for task,command,args,handles in events]==[("on-event-error","sub abc x 2")]
@@ -0,0 +1,47 @@
+from tclish.values import Tclish_list
+
+
+def recorder(vm):
+	"""a command keeping the values it is called with"""
+	calls=[]
+	def record(vm,task,args):
+		calls.append(list(args))
+		return vm.ok(str(len(args)))
+	vm.commands.add("record",record,"",values=True)
+	return calls
+
+def test_splat_unpacks_text(vm,result):
+	calls=recorder(vm)
+	assert result("record a {*} {b c} e")=="4"
+	assert [str(arg) for arg in calls[0]]==["a","b","c","e"]
+
+def test_splat_splices_parsed_lists_as_they_are(vm,result):
+	calls=recorder(vm)
+	assert result("record {*} [list x [list y z]]")=="2"
+	x,inner=calls[0]
+	assert x=="x"
+	assert type(inner) is Tclish_list
+
+def test_splat_of_args_list(vm,result):
+	calls=recorder(vm)
+	result("proc forward {args} {record {*} [args list]}")
+	assert result("forward 1 {2 3} 4")=="3"
+	assert [str(arg) for arg in calls[0]]==["1","2 3","4"]
+
+def test_named_callbacks_are_called_with_the_values(vm,result):
+	calls=recorder(vm)
+	result("lmap [list a [list b c]] record")
+	assert type(calls[1][0]) is Tclish_list
+	assert calls[0][0]=="a"
+
+def test_named_definitions_as_callbacks(vm,result):
+	result("proc double {item args} {* $item 2}")
+	assert result("lmap {1 2 3} double")==result("list 2 4 6")
+	result("proc small {item args} {< $item 3}")
+	assert result("lfilter {1 2 3 4} small")==result("list 1 2")
+
+def test_named_callbacks_fail_like_sentences(vm,evaluate):
+	ok,res=evaluate("lmap {1 2} no-such-command")
+	assert vm.is_error(ok)
+	ok,res=evaluate("lmap {1 2} error")
+	assert vm.is_error(ok)
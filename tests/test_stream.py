@@ -0,0 +1,56 @@
+import pytest
+
+from conftest import make_vm
+
+
+@pytest.fixture(params=[None,2],ids=["interpreted","jit"])
+def vm(request):
+	return make_vm(jit_threshold=request.param)
+
+def items(vm,text):
+	ok,values=vm.unpack_strings(text)
+	assert ok
+	return values
+
+def test_stages_run_in_order(vm,result):
+	squares=result("stream from [range 20] filter {args map item\n== [% $item 3] 0} map {args map item\n* $item $item}")
+	assert items(vm,squares)==["9","36","81","144","225","324"]
+
+def test_reduce_is_given_the_accumulator(vm,result):
+	assert result("stream from [range 10] reduce {args map item position total\n+ $total $item} 0")=="55"
+
+def test_take_stops_reading_the_source(vm,result):
+	seen=[]
+	def record(vm,task,args):
+		seen.append(args[0])
+		return vm.ok(args[0])
+	vm.commands.add("record",record,"",values=True)
+	assert items(vm,result("stream from [range 1000000] map {args map item\nrecord $item} take 3"))==["1","2","3"]
+	assert seen==["1","2","3"]
+
+def test_take_nothing_reads_nothing(vm,result):
+	assert items(vm,result("stream from {a b c} map {error no} take 0"))==[]
+
+def test_db_keys_are_streamed(vm,result):
+	result("db set fruit apple red\ndb set fruit pear green\ndb set fruit plum blue")
+	assert items(vm,result("stream db fruit map {args map key\ndb get fruit $key}"))==["red","green","blue"]
+	assert items(vm,result("stream db {nothing here} take 1"))==[]
+
+def test_db_keys_are_read_one_at_a_time(vm):
+	vm.db.set(["n","a"],"1")
+	vm.db.set(["n","b"],"2")
+	keys=vm.db.iter_keys(["n"])
+	assert next(keys)=="a"
+	vm.db.set(["m"],"3")
+	assert next(keys)=="b"
+
+def test_changing_the_streamed_db_entry_is_an_error(vm,evaluate):
+	ok,res=evaluate("db set n a 1\ndb set n b 2\nstream db n map {args map key\ndb set n x$key 0}")
+	assert vm.is_error(ok)
+	assert "changed" in res
+
+def test_errors_in_stages_end_the_stream(vm,evaluate):
+	ok,res=evaluate("stream from {1 2 3} map {error broken}")
+	assert vm.is_error(ok)
+	ok,res=evaluate("stream from {1 2} reduce {} 0 take 1")
+	assert vm.is_error(ok)
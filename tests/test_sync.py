@@ -0,0 +1,78 @@
+import pytest
+
+from tclish import Tclish_task
+
+
+def sync(vm,name):
+	return vm.code_is_sync(vm.definition_code[name])
+
+def test_plain_definitions_are_sync(vm,result):
+	result("proc add {a b} {+ $a $b}")
+	assert sync(vm,"add")
+
+def test_suspending_definitions_are_async(vm,result):
+	result("proc nap {} {sleep 0}")
+	result("proc outer {} {nap}")
+	assert not sync(vm,"nap")
+	assert not sync(vm,"outer")
+
+def test_recursive_definitions_are_sync(vm,result):
+	result("proc fact {n} {\n\tif {< $n 2} {return 1}\n\t* $n [fact [- $n 1]]\n}")
+	assert sync(vm,"fact")
+	assert result("fact 10")=="3628800"
+
+def test_mutual_recursion_is_sync(vm,result):
+	result("proc even {n} {if {== $n 0} {true} else {odd [- $n 1]}}")
+	result("proc odd {n} {if {== $n 0} {false} else {even [- $n 1]}}")
+	assert sync(vm,"even")
+	assert sync(vm,"odd")
+	assert result("even 10")=="true"
+
+@pytest.mark.parametrize("first",["a","b"])
+def test_mutual_recursion_through_an_async_definition(vm,result,first):
+	result("""proc a {n} {
+	if {> $n 0} {b [- $n 1]}
+	+ $n 0
+}
+proc b {n} {
+	a $n
+	sleep 0
+	get n
+}""")
+	assert not sync(vm,first)
+	assert not sync(vm,"a")
+	assert not sync(vm,"b")
+	assert result("a 2")=="2"
+	assert result("b 2")=="2"
+	# the sentence of b calling a was classified while a was still being looked at
+	call=vm.definition_code["b"].body.sentences[0]
+	assert call.name=="a"
+	assert not call.sync
+
+def test_redefining_a_callee_reclassifies(vm,result):
+	result("proc inner {} {+ 1 1}")
+	result("proc outer {} {inner}")
+	assert sync(vm,"outer")
+	result("proc inner {} {sleep 0}")
+	assert not sync(vm,"outer")
+	assert result("outer")==""
+
+def test_control_commands_with_literal_bodies(vm):
+	ok,code=vm.compile(None,"if {> 1 0} {+ 1 1} else {- 1 1}")
+	assert vm.code_is_sync(code)
+	ok,code=vm.compile(None,"if {> 1 0} {sleep 0}")
+	assert not vm.code_is_sync(code)
+	ok,code=vm.compile(None,"if $cond {+ 1 1}")
+	assert not vm.code_is_sync(code)
+
+def test_control_directives_can_suspend(vm,result):
+	assert result("set i 0\nwhile {< $i 3} {\n\tsleep 0\n\tset i [+ $i 1]\n}\nget i")=="3"
+	assert result("if {&& {sleep 0\ntrue} {|| {false} {sleep 0\ntrue}}} {\n\tsleep 0\n\t+ 1 1\n}")=="2"
+
+def test_sync_code_runs_without_an_event_loop(vm,result):
+	result("proc sum {n} {\n\tset t 0\n\tset i 0\n\twhile {< $i $n} {\n\t\tset i [+ $i 1]\n\t\tset t [+ $t $i]\n\t}\n\tget t\n}")
+	code=vm.definition_code["sum"]
+	assert vm.code_is_sync(code)
+	ok,res=vm.eval_sync(Tclish_task(""),code,args=["10"])
+	assert vm.is_ok(ok)
+	assert str(res)=="55"
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from conftest import make_vm
+from tclish import Tclish_task
+from tclish.std_utils import to_text
+
+COUNT="""proc count {n acc} {
+	if {< $n 1} {return $acc}
+	return [count [- $n 1] [+ $acc 1]]
+}"""
+
+def test_tail_recursion_has_no_depth_limit(vm,result):
+	result(COUNT)
+	assert result("count 5000 0")=="5000"
+
+def test_mutual_tail_recursion(vm,result):
+	result("proc even {n} {if {< $n 1} {return yes} else {odd [- $n 1]}}")
+	result("proc odd {n} {if {< $n 1} {return no} else {even [- $n 1]}}")
+	assert result("even 3001")=="no"
+
+DEPTH="proc depth {n} {\n\tif {< $n 1} {return 0}\n\t+ 1 [depth [- $n 1]]\n}"
+
+@pytest.mark.parametrize("threshold",[None,2],ids=["interpreted","jit"])
+def test_non_tail_recursion_runs_on_the_task_stack(threshold):
+	vm=make_vm(jit_threshold=threshold)
+	task=Tclish_task("")
+	for n in (100,5000):
+		ok,res=asyncio.run(vm.eval(task,f"{DEPTH}\ndepth {n}"))
+		assert vm.is_ok(ok),res
+		assert to_text(res)==str(n)
+
+def test_non_tail_recursion_is_limited_by_the_task(vm,result,evaluate):
+	task=Tclish_task("")
+	task.stack_limit=100
+	evaluate(DEPTH,task)
+	assert result("depth 50",task)=="50"
+	ok,res=evaluate("depth 1000",task)
+	assert vm.is_error(ok)
+	assert "stack limit" in res
+
+def test_recursion_through_async_commands_is_limited(vm,result,evaluate):
+	# every level runs the body of foreach in an evaluation of its own
+	evaluate("proc nest {n} {\n\tif {< $n 1} {return 0}\n\tforeach i {1} {return [+ 1 [nest [- $n 1]]]}\n}")
+	assert result("nest 10")=="10"
+	ok,res=evaluate("nest 1000")
+	assert vm.is_error(ok)
+	assert "stack limit" in res
+
+def test_callee_does_not_change_the_callers_bindings(vm,result):
+	# f is called by the last sentence, in the frame of the program
+	assert result("set x 10\nproc f {} {\n\tset x 1\n\tset x\n\tget x\n}\nf")=="10"
+
+def test_callee_sees_the_callers_variables(vm,result):
+	result("proc helper {} {get secret}")
+	result("proc main {} {\n\tset secret 42\n\thelper\n}")
+	assert result("main")=="42"
+
+def test_unset_in_callee_reveals_the_callers_value(vm,result):
+	result("proc f {} {\n\tset x 1\n\tset x\n\tget x\n}")
+	result("proc main {} {\n\tset x 7\n\tf\n}")
+	assert result("main")=="7"
+
+def test_bindings_are_restored_after_the_frame(vm,result):
+	result("proc f {} {set x 1}")
+	result("proc run {} {\n\tset y 2\n\tf\n}")
+	assert result("set x 10\nrun\nlist $x [get y]")==result("list 10 {}")
+
+def test_tail_calls_keep_a_constant_number_of_bindings(vm,result):
+	sizes=[]
+	def probe(vm,task,args):
+		frame=task.states[-1]
+		sizes.append(len(task.vars)+len(frame.shadowed)+len(frame.outer or ()))
+		return vm.ok("")
+	vm.add_command("probe",probe,"")
+	result(COUNT.replace("\tif","\tprobe\n\tif",1))
+	assert result("count 2000 0")=="2000"
+	assert len(sizes)==2001
+	assert max(sizes)==max(sizes[:3])
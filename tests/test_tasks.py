@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from tclish import Tclish_task
+from conftest import make_vm
+
+
+@pytest.fixture(params=[None,2],ids=["interpreted","jit"])
+def vm(request):
+	return make_vm(jit_threshold=request.param)
+
+async def pause(vm,task,args):
+	await asyncio.sleep(0)
+	return vm.ok("")
+
+COUNTER="""class counter \\
+	var count integer? 0 \\
+	method step {
+		set before [self get count]
+		pause
+		self set count [+ $before 1]
+		pause
+		self get count
+	}
+"""
+
+PROGRAM="""new counter c{n}
+set i 0
+while {{< $i {steps}}} {{
+	c{n} step
+	set i [+ $i 1]
+}}
+c{n} get count
+"""
+
+def test_concurrent_tasks_keep_their_own_self(vm,result):
+	# the tasks interleave inside the method, one that saw another task's self
+	# would count on the wrong object
+	vm.commands.add("pause",pause,"")
+	result(COUNTER)
+	async def run():
+		return await asyncio.gather(*[vm.eval(Tclish_task(""),PROGRAM.format(n=n,steps=20)) for n in range(50)])
+	for ok,res in asyncio.run(run()):
+		assert vm.is_ok(ok),res
+		assert str(res)=="20"
+
+def test_a_task_handle_shadows_a_definition(vm,result):
+	result("proc log {message} {get message}")
+	result("proc hot {} {list [log x] [log y]}")
+	async def log(vm,task,args):
+		await asyncio.sleep(0)
+		return vm.ok(f"logged {args[0]}")
+	task=Tclish_task("")
+	task.add_handle("log",log,"")
+	for _ in range(4):
+		assert result("hot",task)==vm.pack_strings(["logged x","logged y"])
+	# other tasks still see the definition
+	assert result("hot")==vm.pack_strings(["x","y"])
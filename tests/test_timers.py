@@ -0,0 +1,72 @@
+import asyncio
+
+from tclish import Tclish_task
+from tclish.timers import Tclish_timer_queue
+
+
+def drain(queue,now):
+	payloads=[]
+	while (payload := queue.pop(now)) is not None:
+		payloads.append(payload)
+	return payloads
+
+def test_timers_come_out_in_time_order():
+	queue=Tclish_timer_queue()
+	for t in (5.0,1.0,3.0,2.0,4.0):
+		queue.add(t,f"at {t}")
+	assert queue.next_time()==1.0
+	assert drain(queue,3.0)==["at 1.0","at 2.0","at 3.0"]
+	assert len(queue)==2
+	assert drain(queue,10.0)==["at 4.0","at 5.0"]
+	assert queue.next_time() is None
+
+def test_timers_due_together_come_out_in_the_order_they_were_added():
+	queue=Tclish_timer_queue()
+	for n in range(10):
+		# payloads that can't be compared, the id has to break the tie
+		queue.add(1.0,{"n":n})
+	assert [payload["n"] for payload in drain(queue,1.0)]==list(range(10))
+
+def test_cancelled_timers_are_skipped():
+	queue=Tclish_timer_queue()
+	first=queue.add(1.0,"first")
+	queue.add(2.0,"second")
+	assert queue.cancel(first)
+	assert not queue.cancel(first)
+	assert len(queue)==1
+	assert queue.next_time()==2.0
+	assert drain(queue,5.0)==["second"]
+
+def test_a_timer_that_ran_cant_be_cancelled():
+	queue=Tclish_timer_queue()
+	timer=queue.add(1.0,"once")
+	assert drain(queue,1.0)==["once"]
+	assert not queue.cancel(timer)
+
+def test_cancelling_most_timers_shrinks_the_heap():
+	queue=Tclish_timer_queue()
+	ids=[queue.add(float(n%100),n) for n in range(1000)]
+	for timer in ids[:900]:
+		queue.cancel(timer)
+	assert len(queue.heap)<=200
+	assert drain(queue,1000.0)==sorted(range(900,1000),key=lambda n:(n%100,n))
+
+def test_pending_lists_the_timers_in_order():
+	queue=Tclish_timer_queue()
+	queue.add(2.0,"b")
+	cancelled=queue.add(1.5,"x")
+	queue.add(1.0,"a")
+	queue.cancel(cancelled)
+	assert [(timer.time,timer.payload) for timer in queue.pending()]==[(1.0,"a"),(2.0,"b")]
+
+def test_scheduled_events_run_and_cancelled_ones_dont(vm,result):
+	task=Tclish_task("")
+	result("proc note {what} {db set events $what $what}")
+	kept=result("schedule-event 0 note kept",task)
+	dropped=result("schedule-event 0 note dropped",task)
+	assert int(kept)<int(dropped)
+	assert result(f"cancel-event {dropped}")=="true"
+	assert result(f"cancel-event {dropped}")==""
+	asyncio.run(vm.process_events(10))
+	assert len(vm.event_queue)==0
+	assert result("db list events")==vm.pack_strings(["kept"])
@@ -0,0 +1,56 @@
+from tclish.values import Tclish_list
+
+
+def test_lists_keep_their_items(vm,result):
+	assert result("lindex [list a b c] 2")=="b"
+	assert result("lcount [list a b c]")=="3"
+	assert result("lappend [list a b] c d")==vm.pack_strings(["a","b","c","d"])
+
+def test_packed_text_is_read_as_a_list(vm,result):
+	packed=vm.pack_strings(["x","y z","w"])
+	assert result(f"lindex {{{packed}}} 2")=="y z"
+	assert result(f"lcount {{{packed}}}")=="3"
+
+def test_appending_leaves_the_original_as_it_was(vm,result):
+	program="""set a [list 1 2]
+set b [lappend $a x]
+set c [lappend $a y]
+list $a $b $c"""
+	assert result(program)==vm.pack_strings([
+		vm.pack_strings(["1","2"]),
+		vm.pack_strings(["1","2","x"]),
+		vm.pack_strings(["1","2","y"])])
+
+def test_appended_values_share_their_items():
+	first=Tclish_list(["a"])
+	second=first.append(["b"])
+	third=second.append(["c"])
+	assert third.items is first.items
+	assert list(first.iter_items())==["a"]
+	assert str(second)=="{'a''b'}"
+
+def test_foreach_over_a_list_it_appends_to(vm,result):
+	program="""set l [list 1 2 3]
+set n 0
+foreach x $l {
+	set l [lappend $l $x]
+	set n [+ $n 1]
+	if {> $n 20} {break}
+}
+list $n $l"""
+	assert result(program)==vm.pack_strings(["3",vm.pack_strings(["1","2","3","1","2","3"])])
+
+def test_lmap_over_a_list_it_appends_to(vm,result):
+	program="""set l [list 1 2 3]
+lmap $l {
+	args map x
+	set l [lappend $l $x]
+	* $x 2
+}"""
+	assert result(program)==vm.pack_strings(["2","4","6"])
+
+def test_lists_behave_like_their_text(vm,result):
+	value=Tclish_list(["a","b"])
+	assert value=="{'a''b'}"
+	assert value.startswith("{'a'")
+	assert hash(value)==hash("{'a''b'}")